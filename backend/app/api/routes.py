@@ -1,25 +1,55 @@
-from fastapi import APIRouter, HTTPException, status
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.requests import HTTPConnection
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pydantic import BaseModel, ValidationError
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import json
 import time
 import logging
 
 from app.models.schemas import (
     ChatRequest,
     ChatResponse,
+    BatchChatRequest,
     HealthResponse,
+    LivenessResponse,
+    ReadinessResponse,
     ModelsResponse,
-    ModelInfo,
     ModelLoadRequest,
     ModelUnloadRequest,
+    ChatStats,
+    ContextInfo,
+    SessionResponse,
     ErrorResponse
 )
-from app.services.ollama_service import ollama_service
+from app.core.config import settings
+from app.core import fast_json
+from app.core.startup import startup_timeline
+from app.services.ollama_service import ollama_service, OllamaConnectionError, OllamaUnavailableError
+from app.services.health_monitor import health_monitor
+from app.services.session_store import session_store
+from app.services.response_cache import response_cache
+from app.services.semantic_cache import semantic_cache
+from app.services.scheduler import request_scheduler, resolve_priority, QueueFullError, ClientDisconnectedError
+from app.services.stats import stats_collector, compute_chat_stats
+from app.services.residency import residency_manager
+from app.services.model_catalog import model_catalog
+from app.services.pinned_context import pinned_contexts
+from app.services.rate_limiter import rate_limiter, client_key, api_key, RateLimitDecision
+from app.services.batch import run_batch
+from app.services import chat_pipeline
 
 logger = logging.getLogger(__name__)
 
 # Create API router
 router = APIRouter()
 
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 @router.get(
     "/health",
     response_model=HealthResponse,
@@ -31,13 +61,15 @@ async def health_check():
     Health check endpoint to verify server and Ollama service status
     """
     try:
-        ollama_healthy = await ollama_service.check_health()
+        ollama_healthy = await health_monitor.is_healthy()
         
-        return HealthResponse(
+        return _model_response(HealthResponse(
             status="healthy" if ollama_healthy else "degraded",
             ollama_status="running" if ollama_healthy else "unavailable",
-            timestamp=datetime.now()
-        )
+            timestamp=datetime.now(),
+            last_checked=health_monitor.last_checked,
+            consecutive_failures=health_monitor.consecutive_failures
+        ))
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return HealthResponse(
@@ -46,29 +78,94 @@ async def health_check():
             timestamp=datetime.now()
         )
 
+@router.get(
+    "/live",
+    response_model=LivenessResponse,
+    summary="Liveness Probe",
+    description="Report that the server process is up, without contacting Ollama"
+)
+async def liveness():
+    """
+    Liveness probe: answers as long as the event loop does
+    """
+    return _model_response(LivenessResponse(uptime=round(startup_timeline.elapsed(), 3)))
+
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    summary="Readiness Probe",
+    description="Report whether chats can be served without a cold model load",
+    responses={503: {"model": ReadinessResponse, "description": "Models still warming up or Ollama unavailable"}}
+)
+async def readiness():
+    """
+    Readiness probe: ready once Ollama is up and the WARMUP_MODELS are loaded
+    
+    Returns:
+        ReadinessResponse with per-model warm-up state and the startup
+        timeline; 503 with Retry-After while not ready
+    """
+    ollama_healthy = await health_monitor.is_healthy()
+    if not ollama_healthy:
+        state = "unavailable"
+    elif not residency_manager.ready:
+        state = "warming"
+    else:
+        state = "ready"
+    
+    body = ReadinessResponse(
+        status=state,
+        ollama_status="running" if ollama_healthy else "unavailable",
+        models=residency_manager.readiness(),
+        uptime=round(startup_timeline.elapsed(), 3),
+        startup=startup_timeline.stages()
+    )
+    if state == "ready":
+        return _model_response(body)
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=body.model_dump(mode="json"),
+        headers={"Retry-After": str(max(1, round(settings.WARMUP_RETRY_INTERVAL)))}
+    )
+
 @router.post(
     "/chat",
     response_model=ChatResponse,
     summary="Chat with Chatbot",
-    description="Send a message to the chatbot and receive a response",
+    description=(
+        "Send a message to the chatbot and receive a response. "
+        "With stream=true the reply is sent token by token as Server-Sent Events, "
+        "or as NDJSON when the client sends Accept: application/x-ndjson."
+    ),
     responses={
-        200: {"model": ChatResponse},
+        200: {
+            "model": ChatResponse,
+            "content": {SSE_MEDIA_TYPE: {}, NDJSON_MEDIA_TYPE: {}}
+        },
         400: {"model": ErrorResponse, "description": "Bad request"},
+        429: {"model": ErrorResponse, "description": "Client rate limit or token quota exceeded"},
         500: {"model": ErrorResponse, "description": "Internal server error"},
         503: {"model": ErrorResponse, "description": "Ollama service unavailable"}
     }
 )
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request, response: Response):
     """
     Main chat endpoint for bi-directional communication with the chatbot
     
     Args:
         request: ChatRequest containing user message and optional model name
-        
+        http_request: Raw HTTP request, used to negotiate the stream format
+            and identify the client for rate limiting
+        response: Response whose headers carry the rate limit state
+    
     Returns:
-        ChatResponse with the chatbot's response and metadata
+        ChatResponse with the chatbot's response and metadata,
+        or a StreamingResponse when request.stream is set
     """
     start_time = time.time()
+    model = request.model or ollama_service.default_model
+    client = _client_key(http_request)
+    request.priority = _priority(request.priority, http_request)
     
     try:
         # Validate that message is not empty
@@ -78,75 +175,755 @@ async def chat(request: ChatRequest):
                 detail="Message cannot be empty"
             )
         
-        # Check Ollama service health
-        if not await ollama_service.check_health():
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Ollama service is not available"
+        limit = _check_rate_limit(client)
+        history, context, cache_key, cached = await _prepare_chat(request, model)
+        
+        if request.stream:
+            if cached is None:
+                request_scheduler.check_admission(model, request.priority)
+            media_type = _negotiate_stream_media_type(http_request.headers.get("accept", ""))
+            return StreamingResponse(
+                _stream_chat(request, model, history, context, cache_key, cached, media_type, start_time, client),
+                media_type=media_type,
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **limit.headers()}
             )
         
-        # Get response from Ollama
-        result = await ollama_service.chat(
-            message=request.message,
-            model=request.model
-        )
+        response.headers.update(limit.headers())
+        
+        if cached is not None:
+            result = cached
+        else:
+            # Get response from Ollama once a generation slot is free
+            result = await chat_pipeline.generate(
+                message=request.message,
+                model=model,
+                history=history,
+                options=request.options,
+                key=cache_key,
+                is_disconnected=http_request.is_disconnected,
+                pin_session=_pin_session(request),
+                session_id=request.session_id,
+                priority=request.priority
+            )
+            rate_limiter.charge(client, result.get("eval_count"))
+            await chat_pipeline.semantic_store(
+                request.message, model, request.options, history, result, request.bypass_cache
+            )
+        _record_turn(request, result["response"])
         
         processing_time = time.time() - start_time
+        stats = chat_pipeline.record_success(model, result, processing_time, cached is not None)
         
-        logger.info(f"Chat request processed in {processing_time:.2f}s using model {result['model']}")
+        logger.info(
+            f"Chat request processed in {processing_time:.2f}s using model {result['model']}"
+            f"{' (cached)' if cached is not None else ''}"
+        )
         
-        return ChatResponse(
+        return _model_response(ChatResponse(
             response=result["response"],
             model=result["model"],
             timestamp=datetime.now(),
-            processing_time=round(processing_time, 2)
-        )
-        
+            processing_time=round(processing_time, 2),
+            session_id=request.session_id,
+            cached=cached is not None,
+            stats=ChatStats(**stats, retrieval_time=context.get("retrieval_time")),
+            context=ContextInfo(**context)
+        ), limit.headers())
+    
     except HTTPException:
         raise
+    except QueueFullError as e:
+        logger.warning(f"Chat request rejected: {e}")
+        chat_pipeline.record_failure(model, e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except ClientDisconnectedError as e:
+        logger.info(str(e))
+        raise HTTPException(status_code=499, detail=str(e))
+    except OllamaConnectionError as e:
+        logger.error(f"Chat endpoint error: {e}")
+        chat_pipeline.record_failure(model, e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Ollama service is not available: {str(e)}",
+            headers=_retry_after_header(e)
+        )
     except Exception as e:
         logger.error(f"Chat endpoint error: {e}")
+        chat_pipeline.record_failure(model, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process chat request: {str(e)}"
         )
 
+@router.post(
+    "/chat/batch",
+    summary="Batch Chat",
+    description=(
+        "Process many prompts with bounded concurrency. Results are streamed back "
+        "as NDJSON in completion order, one line per item tagged with its id, "
+        "followed by a summary line. Failed items are reported individually."
+    ),
+    responses={
+        200: {"content": {NDJSON_MEDIA_TYPE: {}}},
+        413: {"model": ErrorResponse, "description": "Too many items"},
+        429: {"model": ErrorResponse, "description": "Client rate limit or token quota exceeded"},
+        503: {"model": ErrorResponse, "description": "Ollama service unavailable"}
+    }
+)
+async def chat_batch(request: BatchChatRequest, http_request: Request):
+    """
+    Batch chat endpoint for offline bulk prompt processing
+    
+    A batch counts as one request against the client's rate limit; the
+    tokens generated for every item are charged to its token quota.
+    
+    Args:
+        request: BatchChatRequest with items and optional concurrency
+        http_request: Raw HTTP request, used to identify the client
+    
+    Returns:
+        StreamingResponse of NDJSON result lines
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {settings.BATCH_MAX_ITEMS} items"
+        )
+    
+    client = _client_key(http_request)
+    limit = _check_rate_limit(client)
+    priority = _priority(request.priority, http_request, settings.SCHEDULER_BATCH_PRIORITY)
+    
+    if ollama_service.pool.is_open:
+        error = OllamaUnavailableError(ollama_service.pool.retry_after())
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(error),
+            headers=_retry_after_header(error)
+        )
+    if not await health_monitor.is_healthy():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ollama service is not available"
+        )
+    
+    logger.info(f"Batch of {len(request.items)} items started")
+    return StreamingResponse(
+        _stream_batch(request, client, priority),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=limit.headers()
+    )
+
+async def _stream_batch(
+    request: BatchChatRequest,
+    client: Optional[str] = None,
+    priority: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Encode batch results as NDJSON lines, ending with a summary line
+    """
+    start_time = time.time()
+    succeeded = failed = 0
+    items = ({**item.model_dump(), "priority": priority} for item in request.items)
+    
+    async for result in run_batch(items, request.concurrency):
+        if result["status"] == "ok":
+            succeeded += 1
+            if client is not None and not result["cached"]:
+                rate_limiter.charge(client, result["stats"].get("eval_count"))
+        else:
+            failed += 1
+        yield _format_frame(result, NDJSON_MEDIA_TYPE)
+    
+    processing_time = time.time() - start_time
+    logger.info(f"Batch finished in {processing_time:.2f}s ({succeeded} ok, {failed} failed)")
+    yield _format_frame({
+        "done": True,
+        "total": succeeded + failed,
+        "succeeded": succeeded,
+        "failed": failed,
+        "processing_time": round(processing_time, 2)
+    }, NDJSON_MEDIA_TYPE)
+
+async def _prepare_chat(
+    request: ChatRequest,
+    model: str
+) -> Tuple[Optional[List[Dict[str, str]]], Dict[str, Any], Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Add relevant docs, fit the session history, look up the response caches
+    and check Ollama is usable
+    
+    The semantic cache needs Ollama for the prompt embedding, so it is only
+    consulted once Ollama is known to be up.
+    
+    Returns:
+        (fitted history, context report, cache key, cached result or None)
+    
+    Raises:
+        HTTPException: 503 if Ollama is down and the reply is not cached
+        OllamaUnavailableError: Every backend's circuit is open
+    """
+    excerpts, retrieval = [], {}
+    if _use_docs(request):
+        excerpts, retrieval = await chat_pipeline.retrieve_documents(request.message)
+    history, context = chat_pipeline.fit_context(
+        request.message, model, _session_history(request), request.options, excerpts
+    )
+    context.update(retrieval)
+    cache_key = chat_pipeline.cache_key(
+        request.message, model, history, request.options, request.bypass_cache
+    )
+    cached = response_cache.get(cache_key) if cache_key else None
+    if cached is not None and _pin_session(request):
+        # The cached turn is not in the pinned context; re-seed next turn
+        pinned_contexts.discard(request.session_id)
+    
+    # Check Ollama service health (cached by the health monitor);
+    # exact-match cached replies are served even while Ollama is down.
+    # The breaker goes first: once it is open the health probe fails too,
+    # and only the breaker knows when to retry.
+    if cached is None and ollama_service.pool.is_open:
+        raise OllamaUnavailableError(ollama_service.pool.retry_after())
+    if cached is None and not await health_monitor.is_healthy():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ollama service is not available"
+        )
+    if cached is None:
+        cached = await chat_pipeline.semantic_lookup(
+            request.message, model, request.options, history, request.bypass_cache
+        )
+    return history, context, cache_key, cached
+
+def _client_key(http_request: HTTPConnection) -> str:
+    """
+    Rate limit key for the client behind a request or WebSocket
+    """
+    return client_key(http_request.headers, http_request.client.host if http_request.client else None)
+
+def _priority(requested: Optional[str], connection: HTTPConnection, default: Optional[str] = None) -> str:
+    """
+    Scheduler lane for a request, capped by its API key's lane
+    """
+    return resolve_priority(requested, api_key(connection.headers), default)
+
+def _check_rate_limit(client: str) -> RateLimitDecision:
+    """
+    Take one request from the client's rate limit
+    
+    Returns:
+        The decision, whose headers() go on the response
+    
+    Raises:
+        HTTPException: 429 with Retry-After and X-RateLimit-* headers
+    """
+    decision = rate_limiter.check(client)
+    if not decision.allowed:
+        quota = "token quota" if decision.reason == "tokens" else "request rate limit"
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Client {quota} exceeded; retry in {decision.retry_after}s",
+            headers=decision.headers()
+        )
+    return decision
+
+def _session_history(request: ChatRequest) -> Optional[List[Dict[str, str]]]:
+    """
+    Stored history for the request's session, or None for stateless chats
+    """
+    if request.session_id is None:
+        return None
+    return session_store.get_history(request.session_id)
+
+def _pin_session(request: ChatRequest) -> Optional[str]:
+    """
+    Session to continue through Ollama context tokens, or None for plain chat
+    """
+    if request.session_id is None:
+        return None
+    pin = request.pin_context if request.pin_context is not None else settings.SESSION_PIN_CONTEXT
+    return request.session_id if pin else None
+
+def _use_docs(request: ChatRequest) -> bool:
+    """
+    Whether to ground the reply in the document index
+    
+    Pinned sessions continue from Ollama context tokens, which have no room
+    for per-turn excerpts, so they never use docs.
+    """
+    use_docs = request.use_docs if request.use_docs is not None else settings.RAG_ENABLED
+    return use_docs and _pin_session(request) is None
+
+def _record_turn(request: ChatRequest, reply: str) -> None:
+    """
+    Append a completed user/assistant exchange to the request's session
+    """
+    if request.session_id is None:
+        return
+    session_store.append(request.session_id, [
+        {"role": "user", "content": request.message},
+        {"role": "assistant", "content": reply}
+    ])
+
+def _negotiate_stream_media_type(accept: str) -> str:
+    """
+    Pick the streaming format from the Accept header (SSE unless NDJSON is asked for)
+    """
+    if NDJSON_MEDIA_TYPE in accept and SSE_MEDIA_TYPE not in accept:
+        return NDJSON_MEDIA_TYPE
+    return SSE_MEDIA_TYPE
+
+def _model_response(model: BaseModel, headers: Optional[Dict[str, str]] = None) -> Any:
+    """
+    Return a response model, pre-serialized when FAST_JSON_ENABLED is set
+    
+    FastAPI would otherwise dump the model, validate the dump against
+    response_model again and run it through jsonable_encoder.
+    
+    Args:
+        model: Response model built by the handler
+        headers: Headers to send; a returned Response does not pick up the
+            ones set on the injected response parameter
+    """
+    if fast_json.enabled():
+        return fast_json.model_response(model, headers=headers)
+    return model
+
+def _json_response(content: Dict[str, Any]) -> Any:
+    """
+    Return a plain-JSON dict, skipping jsonable_encoder when FAST_JSON_ENABLED is set
+    """
+    if fast_json.enabled():
+        return fast_json.FastJSONResponse(content)
+    return content
+
+def _format_frame(payload: Dict[str, Any], media_type: str) -> str:
+    """
+    Encode one stream frame as an SSE event or an NDJSON line
+    """
+    data = fast_json.dumps_text(payload)
+    if media_type == SSE_MEDIA_TYPE:
+        return f"data: {data}\n\n"
+    return f"{data}\n"
+
+async def _stream_chat(
+    request: ChatRequest,
+    model: str,
+    history: Optional[List[Dict[str, str]]],
+    context: Dict[str, Any],
+    cache_key: Optional[str],
+    cached: Optional[Dict[str, Any]],
+    media_type: str,
+    start_time: float,
+    client: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Relay Ollama chunks to the client as they arrive, as SSE events or NDJSON lines
+    
+    If the client disconnects, Starlette cancels this generator, which closes
+    the upstream request so Ollama stops generating.
+    """
+    async for frame in _chat_frames(request, model, history, context, cache_key, cached, start_time, client):
+        yield _format_frame(frame, media_type)
+
+async def _chat_frames(
+    request: ChatRequest,
+    model: str,
+    history: Optional[List[Dict[str, str]]],
+    context: Dict[str, Any],
+    cache_key: Optional[str],
+    cached: Optional[Dict[str, Any]],
+    start_time: float,
+    client: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Generate the frames of a streamed chat reply
+    
+    Token frames look like {"content": "...", "done": false}. The last frame has
+    done=true plus timing stats, or an "error" field if generation failed.
+    A cached reply is sent as a single token frame followed by the final frame.
+    Cancelling the iteration closes the upstream request. The generated tokens
+    are charged to the client's quota, if a client is given.
+    """
+    first_token_time = None
+    parts: List[str] = []
+    
+    try:
+        if cached is not None:
+            _record_turn(request, cached["response"])
+            chat_pipeline.record_success(model, cached, time.time() - start_time, True)
+            yield {"content": cached["response"], "done": False}
+            yield _final_frame(request, model, cached, context, start_time, time.time() - start_time, True)
+            return
+        
+        pin_session = _pin_session(request)
+        # The (possibly shared) generation holds a slot for the whole stream;
+        # a disconnect while queued cancels this generator and, once no other
+        # client shares the generation, drops it from the queue
+        slot = lambda check: chat_pipeline.generation_slot(model, check, request.priority)
+        if pin_session is None:
+            upstream = ollama_service.chat_stream(
+                message=request.message,
+                model=model,
+                conversation_history=history,
+                options=request.options,
+                session_id=request.session_id,
+                slot=slot
+            )
+        else:
+            upstream = ollama_service.generate_stream(
+                **chat_pipeline.pinned_prompt(pin_session, request.message, model, history, request.options),
+                slot=slot
+            )
+        async for chunk in upstream:
+            if not chunk.get("done"):
+                if first_token_time is None:
+                    first_token_time = time.time() - start_time
+                content = chunk.get("message", {}).get("content", "")
+                parts.append(content)
+                yield {"content": content, "done": False}
+                continue
+            
+            result = {
+                "response": "".join(parts),
+                "model": model,
+                "done": True,
+                "total_duration": chunk.get("total_duration"),
+                "load_duration": chunk.get("load_duration"),
+                "prompt_eval_count": chunk.get("prompt_eval_count"),
+                "prompt_eval_duration": chunk.get("prompt_eval_duration"),
+                "eval_count": chunk.get("eval_count"),
+                "eval_duration": chunk.get("eval_duration")
+            }
+            if pin_session is not None:
+                pinned_contexts.put(pin_session, model, chunk.get("context"))
+            if cache_key:
+                response_cache.put(cache_key, result)
+            await chat_pipeline.semantic_store(
+                request.message, model, request.options, history, result, request.bypass_cache
+            )
+            if client is not None:
+                rate_limiter.charge(client, result["eval_count"])
+            _record_turn(request, result["response"])
+            
+            processing_time = time.time() - start_time
+            chat_pipeline.record_success(model, result, processing_time, False)
+            logger.info(f"Chat stream processed in {processing_time:.2f}s using model {model}")
+            yield _final_frame(request, model, result, context, start_time, first_token_time, False)
+    
+    except asyncio.CancelledError:
+        logger.info(f"Client disconnected after {time.time() - start_time:.2f}s; upstream generation cancelled")
+        raise
+    except OllamaConnectionError as e:
+        logger.error(f"Chat stream error: {e}")
+        chat_pipeline.record_failure(model, e)
+        yield {
+            "done": True,
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "error": f"Ollama service is not available: {str(e)}"
+        }
+    except Exception as e:
+        logger.error(f"Chat stream error: {e}")
+        chat_pipeline.record_failure(model, e)
+        yield {
+            "done": True,
+            "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "error": f"Failed to process chat request: {str(e)}"
+        }
+
+def _final_frame(
+    request: ChatRequest,
+    model: str,
+    result: Dict[str, Any],
+    context: Dict[str, Any],
+    start_time: float,
+    first_token_time: Optional[float],
+    cached: bool
+) -> Dict[str, Any]:
+    """
+    Build the closing stream frame with timing stats
+    """
+    return {
+        "done": True,
+        "model": model,
+        "session_id": request.session_id,
+        "cached": cached,
+        "timestamp": datetime.now().isoformat(),
+        "processing_time": round(time.time() - start_time, 2),
+        "time_to_first_token": round(first_token_time, 3) if first_token_time is not None else None,
+        "total_duration": result.get("total_duration"),
+        "load_duration": result.get("load_duration"),
+        "prompt_eval_count": result.get("prompt_eval_count"),
+        "prompt_eval_duration": result.get("prompt_eval_duration"),
+        "eval_count": result.get("eval_count"),
+        "eval_duration": result.get("eval_duration"),
+        "stats": {**compute_chat_stats(result), "retrieval_time": context.get("retrieval_time")},
+        "context": context
+    }
+
+@router.websocket("/ws/chat")
+async def chat_websocket(websocket: WebSocket):
+    """
+    Chat over one persistent WebSocket, with several conversations at once
+    
+    Client messages are JSON objects with a "type":
+    
+    * {"type": "chat", "id": "c1", "message": "...", ...} starts conversation
+      "c1"; the other fields are those of ChatRequest (the reply always streams)
+    * {"type": "cancel", "id": "c1"} aborts it and its Ollama generation
+    * {"type": "ping"} is answered with {"type": "pong"}; {"type": "pong"}
+      answers the server's heartbeat
+    
+    Messages must be text frames; a binary frame or a message that is not a
+    JSON object is answered with an error frame and the connection stays open.
+    
+    The server sends {"type": "token", "id", "content"} frames, then one
+    {"type": "done", "id", ...stats} frame (as the final stream frame of
+    /chat), or {"type": "error", "id", "status", "error"} or
+    {"type": "cancelled", "id"}. It sends {"type": "ping"} every
+    WS_HEARTBEAT_INTERVAL seconds and closes the connection if nothing is
+    received for WS_HEARTBEAT_TIMEOUT seconds.
+    """
+    await websocket.accept()
+    client = _client_key(websocket)
+    conversations: Dict[str, asyncio.Task] = {}
+    send_lock = asyncio.Lock()
+    
+    async def send(frame: Dict[str, Any]) -> None:
+        async with send_lock:
+            await websocket.send_text(fast_json.dumps_text(frame))
+    
+    async def heartbeat() -> None:
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL)
+            await send({"type": "ping", "timestamp": time.time()})
+    
+    async def converse(conversation_id: str, request: ChatRequest) -> None:
+        try:
+            async for frame in _websocket_chat_frames(request, client):
+                await send({"id": conversation_id, **frame})
+        except Exception as e:
+            # The socket closed mid-reply; the receive loop cleans up
+            logger.info(f"WebSocket conversation {conversation_id} ended early: {e!r}")
+        finally:
+            conversations.pop(conversation_id, None)
+    
+    heartbeat_task = asyncio.create_task(heartbeat())
+    try:
+        while True:
+            try:
+                received = await asyncio.wait_for(websocket.receive(), settings.WS_HEARTBEAT_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.info("WebSocket client missed its heartbeats; closing")
+                await websocket.close(code=status.WS_1001_GOING_AWAY, reason="Heartbeat timeout")
+                break
+            if received["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(received.get("code", status.WS_1000_NORMAL_CLOSURE))
+            raw = received.get("text")
+            if raw is None:
+                await send({"type": "error", "status": 400, "error": "Binary frames are not supported"})
+                continue
+            
+            try:
+                message = json.loads(raw)
+                kind = message.get("type")
+                conversation_id = message.get("id")
+            except (ValueError, AttributeError):
+                await send({"type": "error", "status": 400, "error": "Messages must be JSON objects"})
+                continue
+            
+            if kind == "ping":
+                await send({"type": "pong"})
+            elif kind == "pong":
+                continue
+            elif kind == "cancel":
+                task = conversations.get(conversation_id)
+                if task is not None:
+                    task.cancel()
+                    await asyncio.wait({task})
+                    await send({"type": "cancelled", "id": conversation_id})
+            elif kind == "chat":
+                if not isinstance(conversation_id, str) or not conversation_id:
+                    await send({"type": "error", "status": 400, "error": "Chat messages need a string id"})
+                elif conversation_id in conversations:
+                    await send({
+                        "type": "error", "id": conversation_id, "status": 409,
+                        "error": f"Conversation '{conversation_id}' is already running"
+                    })
+                elif len(conversations) >= settings.WS_MAX_CONVERSATIONS:
+                    await send({
+                        "type": "error", "id": conversation_id, "status": 429,
+                        "error": f"At most {settings.WS_MAX_CONVERSATIONS} conversations may run at once"
+                    })
+                else:
+                    try:
+                        request = ChatRequest.model_validate(
+                            {k: v for k, v in message.items() if k not in ("type", "id")}
+                        )
+                    except ValidationError as e:
+                        await send({
+                            "type": "error", "id": conversation_id, "status": 422,
+                            "error": str(e.errors()[0].get("msg", "Invalid chat message"))
+                        })
+                        continue
+                    request.priority = _priority(request.priority, websocket)
+                    conversations[conversation_id] = asyncio.create_task(
+                        converse(conversation_id, request)
+                    )
+            else:
+                await send({"type": "error", "status": 400, "error": f"Unknown message type: {kind!r}"})
+    except WebSocketDisconnect:
+        logger.info("WebSocket client disconnected")
+    finally:
+        heartbeat_task.cancel()
+        pending = [heartbeat_task, *conversations.values()]
+        for task in pending:
+            task.cancel()
+        # Cancelling a conversation closes its upstream generation
+        await asyncio.gather(*pending, return_exceptions=True)
+
+async def _websocket_chat_frames(request: ChatRequest, client: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run one WebSocket conversation, turning /chat's stream frames into typed messages
+    
+    Each conversation counts as one request against the client's rate limit.
+    """
+    start_time = time.time()
+    model = request.model or ollama_service.default_model
+    try:
+        if not request.message.strip():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Message cannot be empty"
+            )
+        _check_rate_limit(client)
+        history, context, cache_key, cached = await _prepare_chat(request, model)
+        if cached is None:
+            request_scheduler.check_admission(model, request.priority)
+    except HTTPException as e:
+        frame = {"type": "error", "status": e.status_code, "error": e.detail}
+        if e.headers and "Retry-After" in e.headers:
+            frame["retry_after"] = int(e.headers["Retry-After"])
+        yield frame
+        return
+    except QueueFullError as e:
+        chat_pipeline.record_failure(model, e)
+        yield {"type": "error", "status": 503, "error": str(e), "retry_after": e.retry_after}
+        return
+    except OllamaConnectionError as e:
+        chat_pipeline.record_failure(model, e)
+        yield {
+            "type": "error", "status": 503,
+            "error": f"Ollama service is not available: {str(e)}",
+            "retry_after": getattr(e, "retry_after", None)
+        }
+        return
+    except Exception as e:
+        logger.error(f"WebSocket chat error: {e}")
+        chat_pipeline.record_failure(model, e)
+        yield {"type": "error", "status": 500, "error": f"Failed to process chat request: {str(e)}"}
+        return
+    
+    async for frame in _chat_frames(request, model, history, context, cache_key, cached, start_time, client):
+        if not frame.get("done"):
+            yield {"type": "token", "content": frame["content"]}
+        elif "error" in frame:
+            yield {"type": "error", "status": frame["status"], "error": frame["error"]}
+        else:
+            yield {"type": "done", **frame}
+
 @router.get(
     "/models",
     response_model=ModelsResponse,
     summary="List Available Models",
     description="Get a list of all available Ollama models"
 )
-async def list_models():
+async def list_models(http_request: Request):
     """
     List all available models in Ollama
     
+    Served from the model catalog cache with ETag/Last-Modified validators;
+    a matching If-None-Match or If-Modified-Since gets a bodiless 304.
+    
+    Args:
+        http_request: Raw request, for the conditional headers
+    
     Returns:
         ModelsResponse containing list of available models
     """
     try:
-        models_data = await ollama_service.list_models()
-        
-        models = [
-            ModelInfo(
-                name=m["name"],
-                size=m.get("size"),
-                modified_at=m.get("modified_at")
-            )
-            for m in models_data
-        ]
-        
-        return ModelsResponse(
-            models=models,
-            count=len(models)
+        entry = await model_catalog.get()
+    except OllamaUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers=_retry_after_header(e)
         )
-        
     except Exception as e:
         logger.error(f"Failed to list models: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve model list: {str(e)}"
         )
+    
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        "Cache-Control": "no-cache"
+    }
+    if _not_modified(http_request, entry.etag, entry.last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+def _retry_after_header(error: Exception) -> Optional[Dict[str, str]]:
+    """
+    Retry-After header for errors that carry a retry hint
+    """
+    retry_after = getattr(error, "retry_after", None)
+    return {"Retry-After": str(retry_after)} if retry_after is not None else None
+
+def _not_modified(http_request: Request, etag: str, last_modified: datetime) -> bool:
+    """
+    Evaluate conditional GET headers (If-None-Match takes precedence)
+    """
+    if_none_match = http_request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+    
+    if_modified_since = http_request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+    return False
+
+@router.get(
+    "/models/resident",
+    summary="List Resident Models",
+    description="Get the models currently loaded in Ollama's memory with last-used times"
+)
+async def resident_models():
+    """
+    List models resident in memory, most recently used first
+    
+    Returns:
+        Dict with resident models, total size and the memory budget
+    """
+    try:
+        await residency_manager.refresh()
+    except Exception as e:
+        logger.warning(f"Could not refresh resident models, serving last known state: {e}")
+    
+    return residency_manager.snapshot()
 
 @router.post(
     "/models/load",
@@ -159,7 +936,7 @@ async def load_model(request: ModelLoadRequest):
     
     Args:
         request: ModelLoadRequest with model name and keep_alive duration
-        
+    
     Returns:
         Dict with load status
     """
@@ -169,9 +946,11 @@ async def load_model(request: ModelLoadRequest):
             keep_alive=request.keep_alive
         )
         
+        residency_manager.mark_loaded(request.model)
+        model_catalog.invalidate()
         logger.info(f"Model {request.model} loaded successfully")
         return result
-        
+    
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         raise HTTPException(
@@ -190,19 +969,170 @@ async def unload_model(request: ModelUnloadRequest):
     
     Args:
         request: ModelUnloadRequest with model name
-        
+    
     Returns:
         Dict with unload status
     """
     try:
         result = await ollama_service.unload_model(model=request.model)
         
+        residency_manager.mark_unloaded(request.model)
+        model_catalog.invalidate()
         logger.info(f"Model {request.model} unloaded successfully")
         return result
-        
+    
     except Exception as e:
         logger.error(f"Failed to unload model: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to unload model: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get(
+    "/sessions/{session_id}",
+    response_model=SessionResponse,
+    summary="Get Session History",
+    description="Get the stored conversation history of a session"
+)
+async def get_session(session_id: str):
+    """
+    Return the messages stored for a conversation session
+    
+    Args:
+        session_id: Session identifier
+    
+    Returns:
+        SessionResponse with the session's messages, oldest first
+    """
+    messages = session_store.get_history(session_id)
+    if not messages:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session '{session_id}' not found"
+        )
+    
+    return SessionResponse(
+        session_id=session_id,
+        messages=list(messages),
+        count=len(messages)
+    )
+
+@router.delete(
+    "/sessions/{session_id}",
+    summary="Delete Session",
+    description="Forget the conversation history of a session"
+)
+async def delete_session(session_id: str):
+    """
+    Delete a conversation session
+    
+    Args:
+        session_id: Session identifier
+    
+    Returns:
+        Dict with delete status
+    """
+    pinned_contexts.discard(session_id)
+    ollama_service.pool.forget_session(session_id)
+    if not session_store.delete(session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session '{session_id}' not found"
+        )
+    
+    logger.info(f"Session {session_id} deleted")
+    return {"status": "deleted", "session_id": session_id}
+
+@router.get(
+    "/cache/stats",
+    summary="Response Cache Statistics",
+    description="Get hit/miss counters and memory usage of the response cache"
+)
+async def cache_stats():
+    """
+    Report response cache usage
+    
+    Returns:
+        Dict with entries, bytes, hits, misses and hit rate, plus the
+        semantic cache's entries, hit rate and lookup latency under "semantic"
+    """
+    return _json_response({**response_cache.stats(), "semantic": semantic_cache.stats()})
+
+@router.delete(
+    "/cache",
+    summary="Clear Response Cache",
+    description="Drop all cached chat replies"
+)
+async def clear_cache():
+    """
+    Clear the response cache
+    
+    Returns:
+        Dict with clear status
+    """
+    response_cache.clear()
+    semantic_cache.clear()
+    logger.info("Response cache cleared")
+    return {"status": "cleared"}
+
+@router.get(
+    "/queue",
+    summary="Request Queue Statistics",
+    description="Get per-model concurrency slots, queue depth and wait-time metrics"
+)
+async def queue_stats():
+    """
+    Report scheduler state for each model
+    
+    Returns:
+        Dict with per-model slots, active, queued, rejected and wait times,
+        plus request coalescing and rate limiting counters
+    """
+    return _json_response({
+        **request_scheduler.stats(),
+        "coalescing": ollama_service.flights.stats(),
+        "rate_limits": rate_limiter.stats()
+    })
+
+@router.get(
+    "/circuit",
+    summary="Circuit Breaker State",
+    description="Get each Ollama backend's circuit breaker state, failure count and transition counts"
+)
+async def circuit_state():
+    """
+    Report the Ollama circuit breakers, one per backend
+    
+    Returns:
+        Dict with a list of breakers (state, consecutive failures, rejections, transitions)
+    """
+    return {"backends": [backend.breaker.snapshot() for backend in ollama_service.pool.backends]}
+
+@router.get(
+    "/backends",
+    summary="Ollama Backends",
+    description="Get health, load, circuit state and resident models of each Ollama node"
+)
+async def backend_state():
+    """
+    Report the Ollama backend pool
+    
+    Returns:
+        Dict with per-backend routing state and the number of pinned sessions
+    """
+    return ollama_service.pool.snapshot()
+
+@router.get(
+    "/stats",
+    summary="Performance Statistics",
+    description="Get rolling latency and throughput percentiles per model"
+)
+async def performance_stats():
+    """
+    Report p50/p95/p99 latency, tokens/sec and load time per model
+    over the most recent STATS_WINDOW_SIZE generations
+    
+    Returns:
+        Dict with per-model request counts, cold starts and percentiles
+    """
+    return _json_response(stats_collector.summary())
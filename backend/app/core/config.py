@@ -16,6 +16,131 @@ class Settings(BaseSettings):
     OLLAMA_TIMEOUT: int = 120  # seconds
     OLLAMA_KEEP_ALIVE: str = "5m"  # Keep model loaded for 5 minutes
     
+    # Multi-Backend Settings
+    OLLAMA_BACKENDS: list = []  # several Ollama URLs to load-balance across; empty = OLLAMA_BASE_URL
+    OLLAMA_RESIDENT_SLACK: int = 2  # extra in-flight requests tolerated to stay on a node with the model loaded
+    
+    # Ollama Connection Pool Settings
+    OLLAMA_MAX_CONNECTIONS: int = 10
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    OLLAMA_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept open
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0  # seconds
+    OLLAMA_HEALTH_TIMEOUT: float = 5.0  # seconds
+    OLLAMA_LIST_TIMEOUT: float = 10.0  # seconds
+    OLLAMA_LOAD_TIMEOUT: float = 60.0  # seconds
+    OLLAMA_UNLOAD_TIMEOUT: float = 10.0  # seconds
+    
+    # Circuit Breaker and Retry Settings
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive connection failures before opening
+    CIRCUIT_RECOVERY_TIMEOUT: float = 15.0  # seconds open before a half-open trial call
+    OLLAMA_RETRY_ATTEMPTS: int = 3  # attempts for idempotent calls (list models, health)
+    OLLAMA_RETRY_BASE_DELAY: float = 0.25  # seconds, doubled per attempt with full jitter
+    OLLAMA_RETRY_MAX_DELAY: float = 2.0  # seconds
+    
+    # Health Monitor Settings
+    HEALTH_CHECK_INTERVAL: float = 10.0  # seconds between probes while healthy
+    HEALTH_CHECK_UNHEALTHY_INTERVAL: float = 2.0  # seconds between probes while unavailable
+    
+    # Conversation Session Settings
+    SESSION_BACKEND: str = "memory"  # "memory" or "sqlite"
+    SESSION_SQLITE_PATH: str = "sessions.db"
+    SESSION_TTL: int = 3600  # seconds of inactivity before a session expires
+    SESSION_MAX_SESSIONS: int = 1000
+    SESSION_MAX_MESSAGES: int = 40  # per session
+    SESSION_MAX_TOKENS: int = 4096  # per session (estimated)
+    SESSION_MEMORY_BUDGET: int = 32 * 1024 * 1024  # bytes across all sessions
+    
+    # Session-Pinned Context Settings
+    SESSION_PIN_CONTEXT: bool = False  # continue sessions via /api/generate context tokens by default
+    PINNED_CONTEXT_MAX_SESSIONS: int = 100  # sessions whose context tokens are kept (LRU)
+    
+    # Response Cache Settings
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    RESPONSE_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    RESPONSE_CACHE_TTL: int = 3600  # seconds
+    RESPONSE_CACHE_DETERMINISTIC_ONLY: bool = True  # only cache chats with temperature 0 or a fixed seed
+    
+    # Semantic Cache Settings (requires numpy)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_EMBED_MODEL: str = "nomic-embed-text"  # must be pulled in Ollama
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # cosine similarity needed for a hit
+    SEMANTIC_CACHE_CAPACITY: int = 2048  # entries; least recently used are overwritten
+    SEMANTIC_CACHE_TTL: int = 86400  # seconds
+    SEMANTIC_CACHE_PATH: str = ""  # directory for the memory-mapped index; empty = memory only
+    
+    # Document Retrieval (RAG) Settings (requires numpy)
+    RAG_ENABLED: bool = False  # ground chats in the document index unless a request sets use_docs
+    RAG_INDEX_PATH: str = "docs_index"  # directory written by ingest_docs.py
+    RAG_EMBED_MODEL: str = "nomic-embed-text"  # must match the model used for ingestion
+    RAG_TOP_K: int = 4  # chunks retrieved per chat
+    RAG_HYBRID_WEIGHT: float = 0.5  # weight of embedding similarity against BM25 keyword score
+    RAG_MIN_SCORE: float = 0.25  # chunks scoring lower are not injected
+    RAG_MAX_CONTEXT_TOKENS: int = 768  # retrieved text added to the prompt at most
+    RAG_CHUNK_WORDS: int = 160  # ingestion chunk size
+    RAG_CHUNK_OVERLAP: int = 32  # words shared by consecutive chunks
+    
+    # WebSocket Chat Settings
+    WS_HEARTBEAT_INTERVAL: float = 15.0  # seconds between server pings
+    WS_HEARTBEAT_TIMEOUT: float = 45.0  # seconds without any client message before closing
+    WS_MAX_CONVERSATIONS: int = 8  # concurrent conversations per connection
+    
+    # Request Coalescing Settings
+    COALESCE_REQUESTS: bool = True  # identical concurrent chats share one Ollama generation
+    
+    # Rate Limiting Settings
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_REQUESTS_PER_MINUTE: int = 30  # per client; 0 disables the request limit
+    RATE_LIMIT_TOKENS_PER_HOUR: int = 20000  # generated tokens (eval_count) per client; 0 disables
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" or "sqlite" (shared by workers on one host)
+    RATE_LIMIT_SQLITE_PATH: str = "ratelimit.db"
+    RATE_LIMIT_IDLE_TTL: float = 3600.0  # seconds before an idle client's buckets are dropped
+    RATE_LIMIT_MAX_KEYS: int = 10000  # clients tracked at most
+    RATE_LIMIT_TRUST_PROXY: bool = False  # key clients by X-Forwarded-For (behind a reverse proxy only)
+    
+    # Request Scheduler Settings
+    SCHEDULER_CONCURRENCY: int = 1  # concurrent generations per model and backend
+    SCHEDULER_MAX_QUEUE: int = 8  # waiting requests per model before rejecting
+    SCHEDULER_MODEL_CONCURRENCY: dict = {}  # per-model overrides, e.g. {"gemma2:2b": 2}
+    SCHEDULER_DISCONNECT_POLL_INTERVAL: float = 0.5  # seconds
+    SCHEDULER_DEFAULT_PRIORITY: str = "standard"  # lane of chats that name none: interactive, standard or bulk
+    SCHEDULER_BATCH_PRIORITY: str = "bulk"  # lane of /chat/batch items
+    SCHEDULER_STARVATION_LIMIT: int = 4  # dispatches a waiting lower-priority request can be passed over
+    SCHEDULER_API_KEY_PRIORITIES: dict = {}  # highest lane per API key, e.g. {"etl-key": "bulk"}
+    
+    # Performance Stats Settings
+    STATS_WINDOW_SIZE: int = 256  # recent requests kept per model for percentiles
+    COLD_LOAD_THRESHOLD: float = 0.5  # seconds of load time that count as a cold start
+    
+    # Model Residency Settings
+    WARMUP_MODELS: list = []  # models preloaded at startup, e.g. ["llama3.2"]
+    MODEL_MEMORY_BUDGET: int = 0  # bytes of loaded models before LRU eviction (0 = unlimited)
+    RESIDENCY_REFRESH_INTERVAL: float = 60.0  # seconds between /api/ps syncs
+    WARMUP_RETRY_INTERVAL: float = 5.0  # seconds between retries of failed warm-ups (e.g. Ollama still booting)
+    
+    # Startup Settings
+    STARTUP_PROFILE: bool = False  # log the startup timeline (imports, init, warm-up) as stages complete
+    
+    # Context Window Settings
+    CONTEXT_TOKEN_BUDGET: int = 2048  # default context window (Ollama's default num_ctx)
+    CONTEXT_MODEL_BUDGETS: dict = {}  # per-model windows, e.g. {"llama3.2": 4096}
+    CONTEXT_RESPONSE_RESERVE: int = 256  # tokens kept free for the reply (num_predict overrides)
+    CONTEXT_STRATEGY: str = "summarize"  # "summarize" or "trim" for turns that do not fit
+    CONTEXT_SUMMARY_TOKENS: int = 128  # budget for the summary of dropped turns
+    CONTEXT_TOKEN_CACHE_SIZE: int = 4096  # distinct message texts with a cached token count
+    CONTEXT_TRIM_BLOCK: int = 8  # messages dropped at a time, so the kept prefix stays stable
+    
+    # Model Catalog Settings
+    MODEL_CATALOG_TTL: float = 30.0  # seconds GET /api/models serves the cached /api/tags result
+    
+    # Batch Chat Settings
+    BATCH_CONCURRENCY: int = 2  # items in flight per batch
+    BATCH_MAX_ITEMS: int = 10000  # items accepted per request
+    BATCH_MAX_RETRIES: int = 5  # retries per item while the model queue is full
+    
+    # Serialization Settings
+    FAST_JSON_ENABLED: bool = False  # orjson and pre-serialized responses on hot endpoints (requires orjson)
+    
     # Server Settings
     HOST: str = "0.0.0.0"
     PORT: int = 8000
@@ -0,0 +1,92 @@
+"""
+JSON encoding for the request hot path
+
+With FAST_JSON_ENABLED (and orjson installed) payloads are encoded and
+decoded with orjson, and handlers may return pre-serialized responses that
+skip FastAPI's re-validation of models the server built itself. Otherwise
+everything falls back to the standard library, producing the same bytes as
+Starlette's JSONResponse.
+"""
+from typing import Any, Optional, Dict, Union
+import json
+import logging
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+JSON_MEDIA_TYPE = "application/json"
+
+if settings.FAST_JSON_ENABLED and orjson is None:
+    logger.warning("FAST_JSON_ENABLED is set but orjson is not installed; using the standard json module")
+
+def enabled() -> bool:
+    """
+    Whether the fast path is on (read per call so tests can toggle it)
+    """
+    return settings.FAST_JSON_ENABLED and orjson is not None
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode to compact UTF-8 JSON
+    """
+    if enabled():
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def dumps_text(content: Any) -> str:
+    """
+    Encode a stream frame or WebSocket message (json.dumps output when off)
+    """
+    if enabled():
+        return orjson.dumps(content).decode()
+    return json.dumps(content)
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode JSON straight from the bytes received
+    """
+    if enabled():
+        return orjson.loads(data)
+    return json.loads(data)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when the fast path is on
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def response_class() -> type:
+    """
+    Default response class for the app: the stock JSONResponse unless the fast path is on
+    """
+    return FastJSONResponse if enabled() else JSONResponse
+
+def model_response(
+    model: BaseModel,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serialize a response model the server built itself
+    
+    Returning a Response bypasses FastAPI's response_model handling, which
+    would dump the model, validate the dump again and run it through
+    jsonable_encoder. The model is serialized once, by pydantic-core.
+    """
+    return Response(
+        content=model.model_dump_json(),
+        status_code=status_code,
+        headers=headers,
+        media_type=JSON_MEDIA_TYPE
+    )
@@ -0,0 +1,54 @@
+"""
+Deferred imports for heavy optional dependencies
+
+`np = optional_module("numpy")` replaces the usual
+`try: import numpy as np / except ImportError: np = None`: the result is
+still None when the package is missing, but the package itself is only
+imported the first time an attribute is used. Features that are switched
+off then cost nothing at startup.
+"""
+from typing import Any, Optional
+import importlib
+import importlib.util
+import types
+
+class LazyModule:
+    """
+    Module proxy that imports the real module on first attribute access
+    """
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[types.ModuleType] = None
+    
+    def _load(self) -> types.ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+    
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether the module has been imported
+        """
+        return self._module is not None
+    
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+    
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}{' (loaded)' if self.loaded else ''}>"
+
+def optional_module(name: str) -> Optional[LazyModule]:
+    """
+    Lazily import a top-level package if it is installed
+    
+    Args:
+        name: Package name, e.g. "numpy"
+    
+    Returns:
+        A LazyModule, or None if the package is not installed
+    """
+    if importlib.util.find_spec(name) is None:
+        return None
+    return LazyModule(name)
@@ -0,0 +1,80 @@
+"""
+Startup timeline for cold-start profiling
+
+Records when each startup stage finished, measured from the start of the
+process (taken from /proc on Linux, so interpreter start-up and imports are
+included) rather than from when this module was imported. With
+STARTUP_PROFILE set, the timeline is logged as each stage completes.
+"""
+from typing import Optional, Dict, List, Tuple
+import logging
+import os
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def process_age() -> Optional[float]:
+    """
+    Seconds since the current process started, or None if unknown
+    
+    Read from /proc (start time in clock ticks since boot, and the system
+    uptime), which avoids depending on psutil.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces; fields resume after ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StartupTimeline:
+    """
+    Seconds from process start to each startup stage
+    """
+    
+    def __init__(self, profile: bool = settings.STARTUP_PROFILE):
+        self.profile = profile
+        # /proc has a resolution of one clock tick and is read once;
+        # elapsed times use the monotonic clock from here on
+        self._origin = time.monotonic() - (process_age() or 0.0)
+        self._stages: List[Tuple[str, float]] = []
+    
+    def elapsed(self) -> float:
+        """
+        Seconds since the process started
+        """
+        return time.monotonic() - self._origin
+    
+    def mark(self, stage: str) -> float:
+        """
+        Record that a stage has finished (only the first mark of a stage counts)
+        
+        Args:
+            stage: Stage name, e.g. "imports" or "models_warm"
+        
+        Returns:
+            float: Seconds since process start when the stage first finished
+        """
+        for name, at in self._stages:
+            if name == stage:
+                return at
+        at = round(self.elapsed(), 3)
+        self._stages.append((stage, at))
+        if self.profile:
+            previous = self._stages[-2][1] if len(self._stages) > 1 else 0.0
+            logger.info(f"Startup: {stage} at {at:.3f}s (+{at - previous:.3f}s)")
+        return at
+    
+    def stages(self) -> Dict[str, float]:
+        """
+        Stage name to seconds since process start, in completion order
+        """
+        return dict(self._stages)
+
+# Create a singleton instance
+startup_timeline = StartupTimeline()
@@ -1,10 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 import logging
 
 from app.core.config import settings
+from app.core import fast_json
+from app.core.startup import startup_timeline
 from app.api.routes import router
+from app.services.ollama_service import ollama_service
+from app.services.health_monitor import health_monitor
+from app.services.residency import residency_manager
+from app.services.semantic_cache import semantic_cache
+from app.services.metrics import registry
 
 # Configure logging
 logging.basicConfig(
@@ -12,6 +19,7 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+startup_timeline.mark("imports")
 
 # Create FastAPI application
 app = FastAPI(
@@ -32,7 +40,8 @@ app = FastAPI(
     Default model: llama3.2
     """,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=fast_json.response_class()
 )
 
 # Configure CORS
@@ -47,17 +56,33 @@ app.add_middleware(
 # Include API routes
 app.include_router(router, prefix=settings.API_V1_STR)
 
+ROOT_INFO = {
+    "message": "Raspberry Pi Chatbot Server API",
+    "version": settings.VERSION,
+    "docs": "/docs",
+    "health": f"{settings.API_V1_STR}/health"
+}
+# The root payload never changes, so it is encoded once
+ROOT_BODY = fast_json.dumps(ROOT_INFO)
+
 @app.get("/", tags=["Root"])
 async def root():
     """
     Root endpoint - returns basic API information
     """
-    return {
-        "message": "Raspberry Pi Chatbot Server API",
-        "version": settings.VERSION,
-        "docs": "/docs",
-        "health": f"{settings.API_V1_STR}/health"
-    }
+    if fast_json.enabled():
+        return Response(ROOT_BODY, media_type=fast_json.JSON_MEDIA_TYPE)
+    return ROOT_INFO
+
+@app.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics endpoint
+    """
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 @app.on_event("startup")
 async def startup_event():
@@ -65,9 +90,14 @@ async def startup_event():
     Application startup event
     """
     logger.info(f"Starting {settings.PROJECT_NAME} v{settings.VERSION}")
-    logger.info(f"Ollama base URL: {settings.OLLAMA_BASE_URL}")
+    logger.info(f"Ollama backends: {', '.join(b.url for b in ollama_service.pool.backends)}")
     logger.info(f"Default model: {settings.OLLAMA_DEFAULT_MODEL}")
-    logger.info("Server is ready to accept connections")
+    startup_timeline.mark("app")
+    await ollama_service.start()
+    await health_monitor.start()
+    await residency_manager.start()
+    startup_timeline.mark("startup")
+    logger.info("Server is accepting connections; /api/ready reports when models are warm")
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -75,6 +105,10 @@ async def shutdown_event():
     Application shutdown event
     """
     logger.info("Shutting down server...")
+    await residency_manager.stop()
+    await health_monitor.stop()
+    await ollama_service.close()
+    semantic_cache.flush()
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 # Request Models
@@ -10,13 +10,78 @@ class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, description="User message to the chatbot")
     model: Optional[str] = Field(None, description="Ollama model to use (default: llama3.2)")
     stream: bool = Field(False, description="Whether to stream the response")
+    session_id: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=128,
+        description="Conversation session id; history is kept server-side across turns"
+    )
+    options: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Ollama generation options (temperature, seed, num_predict, ...)"
+    )
+    bypass_cache: bool = Field(False, description="Skip the response cache and always generate")
+    pin_context: Optional[bool] = Field(
+        None,
+        description=(
+            "Continue the session through Ollama context tokens so earlier turns are not "
+            "re-evaluated (default: SESSION_PIN_CONTEXT); requires session_id"
+        )
+    )
+    use_docs: Optional[bool] = Field(
+        None,
+        description=(
+            "Ground the reply in excerpts from the local document index "
+            "(default: RAG_ENABLED); ignored for pinned sessions"
+        )
+    )
+    priority: Optional[Literal["interactive", "standard", "bulk"]] = Field(
+        None,
+        description=(
+            "Scheduling lane; interactive requests get the next free generation slot "
+            "(default: SCHEDULER_DEFAULT_PRIORITY, capped by the API key's lane)"
+        )
+    )
     
     class Config:
         json_schema_extra = {
             "example": {
                 "message": "Why is the sky blue?",
                 "model": "llama3.2",
-                "stream": False
+                "stream": False,
+                "session_id": "3f1c9a2e-kiosk-1"
+            }
+        }
+
+class BatchChatItem(BaseModel):
+    """
+    A single prompt in a batch chat request
+    """
+    id: str = Field(..., min_length=1, description="Caller-chosen id echoed in the result")
+    message: str = Field(..., min_length=1, description="User message to the chatbot")
+    model: Optional[str] = Field(None, description="Ollama model to use (default: llama3.2)")
+    options: Optional[Dict[str, Any]] = Field(None, description="Ollama generation options")
+    bypass_cache: bool = Field(False, description="Skip the response cache and always generate")
+
+class BatchChatRequest(BaseModel):
+    """
+    Request model for the batch chat endpoint
+    """
+    items: List[BatchChatItem] = Field(..., min_length=1, description="Prompts to process")
+    concurrency: Optional[int] = Field(None, ge=1, le=32, description="Items processed at once")
+    priority: Optional[Literal["interactive", "standard", "bulk"]] = Field(
+        None,
+        description="Scheduling lane for every item (default: SCHEDULER_BATCH_PRIORITY)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"id": "q1", "message": "What is Ollama?"},
+                    {"id": "q2", "message": "Summarize Rayleigh scattering", "model": "llama3.2"}
+                ],
+                "concurrency": 2
             }
         }
 
@@ -49,6 +114,37 @@ class ModelUnloadRequest(BaseModel):
         }
 
 # Response Models
+class ChatStats(BaseModel):
+    """
+    Ollama performance stats for a single chat request
+    """
+    prompt_eval_count: Optional[int] = Field(None, description="Prompt tokens evaluated")
+    eval_count: Optional[int] = Field(None, description="Tokens generated")
+    prompt_tokens_per_second: Optional[float] = Field(None, description="Prompt evaluation throughput")
+    eval_tokens_per_second: Optional[float] = Field(None, description="Generation throughput")
+    load_time: Optional[float] = Field(None, description="Model load time (seconds)")
+    total_duration: Optional[float] = Field(None, description="Total time reported by Ollama (seconds)")
+    cold_start: bool = Field(False, description="Whether the model had to be loaded for this request")
+    retrieval_time: Optional[float] = Field(None, description="Document retrieval time (seconds), if docs were used")
+
+class RetrievedDocument(BaseModel):
+    """
+    Document excerpt added to the prompt
+    """
+    source: str = Field(..., description="Indexed file the excerpt comes from")
+    score: float = Field(..., description="Hybrid relevance score (0-1)")
+
+class ContextInfo(BaseModel):
+    """
+    Prompt size before and after fitting history into the context window
+    """
+    prompt_tokens_before: int = Field(..., description="Estimated prompt tokens with the full history")
+    prompt_tokens_after: int = Field(..., description="Estimated prompt tokens actually sent")
+    budget: int = Field(..., description="Prompt token budget for the model")
+    dropped_messages: int = Field(0, description="Older messages left out of the prompt")
+    summarized: bool = Field(False, description="Whether dropped turns were replaced by a summary")
+    documents: Optional[List[RetrievedDocument]] = Field(None, description="Document excerpts added to the prompt")
+
 class ChatResponse(BaseModel):
     """
     Response model for chat endpoint
@@ -57,6 +153,10 @@ class ChatResponse(BaseModel):
     model: str = Field(..., description="Model used for generation")
     timestamp: datetime = Field(default_factory=datetime.now, description="Response timestamp")
     processing_time: Optional[float] = Field(None, description="Time taken to generate response (seconds)")
+    session_id: Optional[str] = Field(None, description="Conversation session id, if any")
+    cached: bool = Field(False, description="Whether the reply was served from the response cache")
+    stats: Optional[ChatStats] = Field(None, description="Ollama performance stats")
+    context: Optional[ContextInfo] = Field(None, description="Prompt size before and after history trimming")
     
     class Config:
         json_schema_extra = {
@@ -64,7 +164,18 @@ class ChatResponse(BaseModel):
                 "response": "The sky appears blue because of Rayleigh scattering...",
                 "model": "llama3.2",
                 "timestamp": "2025-11-10T12:00:00Z",
-                "processing_time": 2.5
+                "processing_time": 2.5,
+                "session_id": "3f1c9a2e-kiosk-1",
+                "cached": False,
+                "stats": {
+                    "prompt_eval_count": 26,
+                    "eval_count": 112,
+                    "prompt_tokens_per_second": 41.3,
+                    "eval_tokens_per_second": 6.8,
+                    "load_time": 0.012,
+                    "total_duration": 17.1,
+                    "cold_start": False
+                }
             }
         }
 
@@ -75,16 +186,58 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Server status")
     ollama_status: str = Field(..., description="Ollama service status")
     timestamp: datetime = Field(default_factory=datetime.now)
+    last_checked: Optional[datetime] = Field(None, description="When Ollama was last probed")
+    consecutive_failures: int = Field(0, description="Failed probes in a row")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "status": "healthy",
                 "ollama_status": "running",
-                "timestamp": "2025-11-10T12:00:00Z"
+                "timestamp": "2025-11-10T12:00:00Z",
+                "last_checked": "2025-11-10T11:59:55Z",
+                "consecutive_failures": 0
+            }
+        }
+
+class LivenessResponse(BaseModel):
+    """
+    Response model for the liveness probe
+    """
+    status: str = Field("alive", description="Always \"alive\" while the process serves requests")
+    uptime: float = Field(..., description="Seconds since the process started")
+
+class ReadinessResponse(BaseModel):
+    """
+    Response model for the readiness probe
+    """
+    status: str = Field(..., description="ready, warming or unavailable")
+    ollama_status: str = Field(..., description="Ollama service status")
+    models: Dict[str, str] = Field(default_factory=dict, description="Warm-up state per model: warm, loading or failed")
+    uptime: float = Field(..., description="Seconds since the process started")
+    startup: Dict[str, float] = Field(
+        default_factory=dict, description="Seconds from process start to each completed startup stage"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "warming",
+                "ollama_status": "running",
+                "models": {"llama3.2": "loading"},
+                "uptime": 4.2,
+                "startup": {"imports": 1.31, "startup": 1.38}
             }
         }
 
+class SessionResponse(BaseModel):
+    """
+    Response model for a conversation session
+    """
+    session_id: str
+    messages: List[Dict[str, str]]
+    count: int
+
 class ModelInfo(BaseModel):
     """
     Model information
@@ -0,0 +1,212 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Set, Iterable, Iterator
+import logging
+
+from app.core.config import settings
+from app.services.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+def canonical_name(model: str) -> str:
+    """
+    Normalize a model name the way Ollama reports it ("llama3.2" -> "llama3.2:latest")
+    """
+    return model if ":" in model else f"{model}:latest"
+
+class Backend:
+    """
+    One Ollama node and its routing state
+    """
+    
+    def __init__(self, url: str, breaker: CircuitBreaker):
+        self.url = url.rstrip("/")
+        self.breaker = breaker
+        self.healthy: Optional[bool] = None  # None until the first probe
+        self.last_checked: Optional[datetime] = None
+        self.outstanding = 0
+        self.requests = 0
+        self.resident: Set[str] = set()
+    
+    @property
+    def available(self) -> bool:
+        """
+        Whether the node takes new requests (not ejected, circuit not open)
+        """
+        return self.healthy is not False and not self.breaker.is_open
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "available": self.available,
+            "circuit": self.breaker.state,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "resident_models": sorted(self.resident),
+            "last_checked": self.last_checked.isoformat() if self.last_checked else None
+        }
+
+class BackendPool:
+    """
+    Routes requests across several Ollama nodes
+    
+    A chat goes to the node with the fewest outstanding requests, preferring
+    nodes that already have the model loaded (unless they are more than
+    `resident_slack` requests busier) and keeping a session on the node it
+    used last. Nodes that fail a health probe or a connection are ejected
+    until a probe succeeds again; if every node is ejected, all nodes whose
+    circuit is not open are tried anyway.
+    """
+    
+    def __init__(
+        self,
+        urls: Iterable[str],
+        failure_threshold: int = settings.CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout: float = settings.CIRCUIT_RECOVERY_TIMEOUT,
+        resident_slack: int = settings.OLLAMA_RESIDENT_SLACK,
+        max_affinity: int = settings.SESSION_MAX_SESSIONS
+    ):
+        self.backends = [
+            Backend(url, CircuitBreaker(url.rstrip("/"), failure_threshold, recovery_timeout))
+            for url in dict.fromkeys(urls)
+        ]
+        if not self.backends:
+            raise ValueError("At least one Ollama backend is required")
+        self.resident_slack = resident_slack
+        self.max_affinity = max_affinity
+        self._affinity: "OrderedDict[str, Backend]" = OrderedDict()
+    
+    @property
+    def primary(self) -> Backend:
+        return self.backends[0]
+    
+    @property
+    def is_open(self) -> bool:
+        """
+        Whether every node's circuit is open (requests should fail fast)
+        """
+        return all(backend.breaker.is_open for backend in self.backends)
+    
+    def retry_after(self) -> int:
+        """
+        Seconds until the first node accepts a trial call again
+        """
+        return min(backend.breaker.retry_after() for backend in self.backends)
+    
+    def reachable(self, exclude: Iterable[Backend] = ()) -> List[Backend]:
+        """
+        Nodes to try: available ones, else any whose circuit is not open
+        """
+        candidates = [b for b in self.backends if b not in exclude and not b.breaker.is_open]
+        return [b for b in candidates if b.healthy is not False] or candidates
+    
+    def select(
+        self,
+        model: str,
+        session_id: Optional[str] = None,
+        exclude: Iterable[Backend] = ()
+    ) -> Optional[Backend]:
+        """
+        Pick the node for a generation
+        
+        Args:
+            model: Model name
+            session_id: Conversation session for affinity, if any
+            exclude: Nodes already tried for this request
+            
+        Returns:
+            The chosen Backend, or None if no node can take the request
+        """
+        candidates = self.reachable(exclude)
+        if not candidates:
+            return None
+        
+        if session_id is not None:
+            pinned = self._affinity.get(session_id)
+            if pinned in candidates:
+                self._affinity.move_to_end(session_id)
+                return pinned
+        
+        least_loaded = min(candidates, key=lambda b: (b.outstanding, b.requests))
+        name = canonical_name(model)
+        warm = [b for b in candidates if name in b.resident]
+        choice = least_loaded
+        if warm:
+            best_warm = min(warm, key=lambda b: (b.outstanding, b.requests))
+            if best_warm.outstanding - least_loaded.outstanding <= self.resident_slack:
+                choice = best_warm
+        
+        if session_id is not None:
+            self._affinity[session_id] = choice
+            self._affinity.move_to_end(session_id)
+            while len(self._affinity) > self.max_affinity:
+                self._affinity.popitem(last=False)
+        return choice
+    
+    @contextmanager
+    def track(self, backend: Backend) -> Iterator[Backend]:
+        """
+        Count a request as outstanding on a node while the block runs
+        """
+        backend.outstanding += 1
+        backend.requests += 1
+        try:
+            yield backend
+        finally:
+            backend.outstanding -= 1
+    
+    def mark_health(self, backend: Backend, healthy: bool) -> None:
+        """
+        Record a probe or connection result, ejecting or re-admitting the node
+        """
+        if healthy != backend.healthy and backend.healthy is not None:
+            if healthy:
+                logger.info(f"Ollama backend {backend.url} is back, re-admitting")
+            else:
+                logger.warning(f"Ollama backend {backend.url} is unhealthy, ejecting")
+        backend.healthy = healthy
+        backend.last_checked = datetime.now()
+    
+    def mark_resident(self, backend: Backend, model: str, resident: bool) -> None:
+        """
+        Record that a node loaded or unloaded a model
+        """
+        if resident:
+            backend.resident.add(canonical_name(model))
+        else:
+            backend.resident.discard(canonical_name(model))
+    
+    def set_resident(self, backend: Backend, models: Iterable[str]) -> None:
+        """
+        Replace a node's resident models with what its /api/ps reported
+        """
+        backend.resident = {canonical_name(model) for model in models}
+    
+    def forget_session(self, session_id: str) -> None:
+        """
+        Drop a session's node affinity
+        """
+        self._affinity.pop(session_id, None)
+    
+    def reset(self) -> None:
+        """
+        Clear health, circuit and affinity state
+        """
+        for backend in self.backends:
+            backend.healthy = None
+            backend.outstanding = 0
+            backend.requests = 0
+            backend.resident.clear()
+            backend.breaker.reset()
+        self._affinity.clear()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get per-node routing state for monitoring
+        """
+        return {
+            "backends": [backend.snapshot() for backend in self.backends],
+            "sessions_pinned": len(self._affinity)
+        }
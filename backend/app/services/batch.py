@@ -0,0 +1,126 @@
+from typing import Optional, Dict, Any, Iterable, AsyncIterator
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.services.ollama_service import ollama_service
+from app.services.response_cache import response_cache
+from app.services.scheduler import QueueFullError
+from app.services import chat_pipeline
+
+logger = logging.getLogger(__name__)
+
+async def process_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one batch item through the chat pipeline
+    
+    Failures are reported in the returned dict instead of raised, so one bad
+    item never aborts the batch. A full scheduler queue is retried after its
+    Retry-After hint rather than failing the item.
+    
+    Args:
+        item: Dict with id, message and optional model, options, bypass_cache, priority
+    
+    Returns:
+        Dict with id, status ("ok" or "error") and the reply or error
+    """
+    start_time = time.time()
+    model = item.get("model") or ollama_service.default_model
+    
+    try:
+        key = chat_pipeline.cache_key(
+            item["message"], model, None, item.get("options"), item.get("bypass_cache", False)
+        )
+        result = response_cache.get(key) if key else None
+        if result is None:
+            result = await chat_pipeline.semantic_lookup(
+                item["message"], model, item.get("options"), None, item.get("bypass_cache", False)
+            )
+        cached = result is not None
+        
+        attempt = 0
+        while result is None:
+            try:
+                result = await chat_pipeline.generate(
+                    message=item["message"],
+                    model=model,
+                    options=item.get("options"),
+                    key=key,
+                    priority=item.get("priority") or settings.SCHEDULER_BATCH_PRIORITY
+                )
+            except QueueFullError as e:
+                attempt += 1
+                if attempt > settings.BATCH_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(e.retry_after)
+        if not cached:
+            await chat_pipeline.semantic_store(
+                item["message"], model, item.get("options"), None, result, item.get("bypass_cache", False)
+            )
+        
+        processing_time = time.time() - start_time
+        stats = chat_pipeline.record_success(model, result, processing_time, cached)
+        return {
+            "id": item["id"],
+            "status": "ok",
+            "response": result["response"],
+            "model": model,
+            "cached": cached,
+            "processing_time": round(processing_time, 2),
+            "stats": stats
+        }
+    
+    except Exception as e:
+        logger.error(f"Batch item {item.get('id')} failed: {e}")
+        chat_pipeline.record_failure(model, e)
+        return {
+            "id": item.get("id"),
+            "status": "error",
+            "model": model,
+            "error": str(e),
+            "processing_time": round(time.time() - start_time, 2)
+        }
+
+async def run_batch(
+    items: Iterable[Dict[str, Any]],
+    concurrency: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Process items with bounded concurrency, yielding results as they complete
+    
+    Items are pulled lazily by a fixed set of workers, so memory stays flat
+    for large inputs. Closing the generator cancels outstanding work.
+    
+    Args:
+        items: Batch items (see process_item)
+        concurrency: Items in flight at once (default: BATCH_CONCURRENCY)
+    
+    Yields:
+        Per-item result dicts in completion order
+    """
+    concurrency = max(1, concurrency or settings.BATCH_CONCURRENCY)
+    iterator = iter(items)
+    results: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    
+    async def worker():
+        try:
+            for item in iterator:
+                await results.put(await process_item(item))
+        finally:
+            results.put_nowait(finished)
+    
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    remaining = len(workers)
+    try:
+        while remaining:
+            result = await results.get()
+            if result is finished:
+                remaining -= 1
+                continue
+            yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
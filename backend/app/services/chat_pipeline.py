@@ -0,0 +1,293 @@
+"""
+Shared steps of a chat generation, used by the HTTP chat and batch endpoints:
+document retrieval, context fitting, cache lookup, admission through the scheduler, the Ollama
+call, and the bookkeeping (metrics, rolling stats, model residency) once it
+finishes.
+"""
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple
+import logging
+
+from app.core.startup import startup_timeline
+from app.services.ollama_service import ollama_service, OllamaConnectionError
+from app.services.health_monitor import health_monitor
+from app.services.response_cache import response_cache
+from app.services.semantic_cache import semantic_cache
+from app.services.retrieval import retriever
+from app.services.scheduler import request_scheduler, DisconnectCheck, QueueFullError
+from app.services.stats import stats_collector, compute_chat_stats
+from app.services.residency import residency_manager
+from app.services.context_window import context_window, count_tokens
+from app.services.pinned_context import pinned_contexts
+from app.services.metrics import (
+    chat_requests,
+    request_latency,
+    queue_wait,
+    upstream_errors,
+    context_trimmed_tokens,
+    observe_generation
+)
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_HEADER = "Conversation so far:"
+
+def fit_context(
+    message: str,
+    model: str,
+    history: Optional[List[Dict[str, str]]],
+    options: Optional[Dict[str, Any]] = None,
+    trailing: Optional[List[Dict[str, str]]] = None
+) -> Tuple[Optional[List[Dict[str, str]]], Dict[str, Any]]:
+    """
+    Fit the history into the model's context window and count what was trimmed
+    
+    Args:
+        trailing: Messages appended after the fitted history (document excerpts)
+    
+    Returns:
+        (history to send, context report)
+    """
+    fitted, report = context_window.fit(message, model, history, options, trailing)
+    trimmed = report["prompt_tokens_before"] - report["prompt_tokens_after"]
+    if trimmed > 0:
+        context_trimmed_tokens.inc(model, amount=trimmed)
+    return fitted, report
+
+def cache_key(
+    message: str,
+    model: str,
+    history: Optional[List[Dict[str, str]]],
+    options: Optional[Dict[str, Any]],
+    bypass_cache: bool = False
+) -> Optional[str]:
+    """
+    Response cache key for a chat turn, or None if caching does not apply
+    """
+    if bypass_cache or not response_cache.enabled:
+        return None
+    resolved = ollama_service.resolve_options(options)
+    if not response_cache.cacheable(resolved):
+        return None
+    return response_cache.make_key(model, ollama_service.build_messages(message, history), resolved)
+
+async def retrieve_documents(message: str) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """
+    Excerpts of the local document index relevant to the message
+    
+    The excerpts form one system message, to be passed to fit_context() as a
+    trailing message: it then goes after the fitted history, so the history
+    prefix of the prompt stays the same from turn to turn.
+    
+    Returns:
+        (excerpt messages, possibly empty; report with retrieval_time and documents)
+    """
+    if not retriever.available:
+        return [], {}
+    chunks, seconds = await retriever.retrieve(message)
+    report: Dict[str, Any] = {"retrieval_time": round(seconds, 4), "documents": []}
+    chunks = retriever.fit_budget(chunks)
+    if not chunks:
+        return [], report
+    report["documents"] = [{"source": chunk.source, "score": round(chunk.score, 4)} for chunk in chunks]
+    return [retriever.context_message(chunks)], report
+
+async def semantic_lookup(
+    message: str,
+    model: str,
+    options: Optional[Dict[str, Any]],
+    history: Optional[List[Dict[str, str]]],
+    bypass_cache: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Stored reply to an equivalent earlier prompt, for chats without history
+    
+    Like the exact cache, only deterministic requests are served (see
+    ResponseCache.replayable).
+    """
+    scope = _semantic_scope(model, options, history, bypass_cache)
+    if scope is None:
+        return None
+    return await semantic_cache.get(message, scope)
+
+async def semantic_store(
+    message: str,
+    model: str,
+    options: Optional[Dict[str, Any]],
+    history: Optional[List[Dict[str, str]]],
+    result: Dict[str, Any],
+    bypass_cache: bool = False
+) -> None:
+    """
+    Remember a generated reply in the semantic cache (see semantic_lookup)
+    """
+    scope = _semantic_scope(model, options, history, bypass_cache)
+    if scope is not None:
+        await semantic_cache.put(message, scope, result)
+
+def _semantic_scope(
+    model: str,
+    options: Optional[Dict[str, Any]],
+    history: Optional[List[Dict[str, str]]],
+    bypass_cache: bool
+) -> Optional[str]:
+    """
+    Semantic cache scope for a chat turn, or None if the cache does not apply
+    """
+    if bypass_cache or history or not semantic_cache.enabled:
+        return None
+    resolved = ollama_service.resolve_options(options)
+    if not response_cache.replayable(resolved):
+        return None
+    return semantic_cache.scope(model, resolved)
+
+def pinned_prompt(
+    session_id: str,
+    message: str,
+    model: str,
+    history: Optional[List[Dict[str, str]]],
+    options: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Arguments for OllamaService.generate()/generate_stream() in a pinned session
+    
+    With stored context tokens for the same model that still fit the budget,
+    only the new message is sent and Ollama reuses the KV cache of everything
+    before it. Otherwise the session is re-seeded from its (already fitted)
+    history, rendered as a transcript prompt, and pins the context it returns.
+    
+    Args:
+        session_id: Session identifier
+        message: New user message
+        model: Resolved model name
+        history: Fitted conversation history
+        options: Generation options
+    
+    Returns:
+        Keyword arguments for generate()
+    """
+    context = pinned_contexts.get(session_id, model)
+    if context is not None:
+        if len(context) + count_tokens(message) <= context_window.budget_for(model, options):
+            return {
+                "prompt": message, "model": model, "context": context,
+                "options": options, "session_id": session_id
+            }
+        logger.info(f"Pinned context of session {session_id} outgrew the budget; re-seeding")
+    
+    history = history or []
+    system = "\n\n".join(m["content"] for m in history if m["role"] == "system") or None
+    lines = [
+        f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}"
+        for m in history if m["role"] != "system"
+    ]
+    prompt = "\n".join([TRANSCRIPT_HEADER, *lines, "", message]) if lines else message
+    return {
+        "prompt": prompt, "model": model, "context": None, "system": system,
+        "options": options, "session_id": session_id
+    }
+
+@asynccontextmanager
+async def generation_slot(
+    model: str,
+    is_disconnected: Optional[DisconnectCheck] = None,
+    priority: str = "standard"
+) -> AsyncIterator[float]:
+    """
+    Hold a scheduler slot for the model and record the queue wait
+    
+    Yields:
+        Seconds spent waiting in the queue
+    """
+    async with request_scheduler.slot(model, is_disconnected, priority) as wait:
+        queue_wait.observe(wait, model)
+        yield wait
+
+async def generate(
+    message: str,
+    model: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    options: Optional[Dict[str, Any]] = None,
+    key: Optional[str] = None,
+    is_disconnected: Optional[DisconnectCheck] = None,
+    pin_session: Optional[str] = None,
+    session_id: Optional[str] = None,
+    priority: str = "standard"
+) -> Dict[str, Any]:
+    """
+    Run a non-streaming generation once a scheduler slot is free
+    
+    Args:
+        message: User message
+        model: Resolved model name
+        history: Previous conversation messages
+        options: Generation options
+        key: Response cache key to store the result under
+        is_disconnected: Polled while queued and generating; an abandoned
+            generation is cancelled so Ollama stops
+        pin_session: Session to continue through Ollama context tokens
+        session_id: Session to keep on the same Ollama node
+        priority: Scheduler lane to wait in
+    
+    Returns:
+        Result dict from OllamaService.chat (or generate, when pinned)
+    """
+    # Identical concurrent requests share one generation, which takes the slot
+    # in the lane of the request that started it
+    slot = lambda check: generation_slot(model, check, priority)
+    if pin_session is None:
+        result = await ollama_service.chat(
+            message=message,
+            model=model,
+            conversation_history=history,
+            options=options,
+            session_id=session_id,
+            slot=slot,
+            is_disconnected=is_disconnected
+        )
+    else:
+        result = await ollama_service.generate(
+            **pinned_prompt(pin_session, message, model, history, options),
+            slot=slot,
+            is_disconnected=is_disconnected
+        )
+        pinned_contexts.put(pin_session, model, result.pop("context", None))
+    if key:
+        response_cache.put(key, result)
+    return result
+
+def record_success(
+    model: str,
+    result: Dict[str, Any],
+    processing_time: float,
+    cached: bool
+) -> Dict[str, Any]:
+    """
+    Record metrics and rolling stats for a completed chat
+    
+    Returns:
+        Per-request stats from compute_chat_stats()
+    """
+    stats = compute_chat_stats(result)
+    request_latency.observe(processing_time, model)
+    chat_requests.inc(model, "cached" if cached else "ok")
+    if not cached:
+        observe_generation(model, stats)
+        stats_collector.record(model, processing_time, stats)
+        residency_manager.mark_used(model)
+    startup_timeline.mark("first_chat")
+    return stats
+
+def record_failure(model: str, error: Exception) -> None:
+    """
+    Count a failed chat; connection errors also trigger a health re-probe
+    """
+    if isinstance(error, QueueFullError):
+        chat_requests.inc(model, "rejected")
+        return
+    chat_requests.inc(model, "error")
+    if isinstance(error, OllamaConnectionError):
+        upstream_errors.inc(model, "connection")
+        health_monitor.request_refresh()
+    else:
+        upstream_errors.inc(model, "error")
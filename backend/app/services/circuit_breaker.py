@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+import logging
+import math
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Numeric encoding for the Prometheus state gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with full jitter
+    
+    Args:
+        attempt: Zero-based retry number
+        base: Delay before the first retry
+        cap: Upper bound on the delay
+        
+    Returns:
+        Seconds to sleep, uniform in [0, min(cap, base * 2**attempt)]
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker
+    
+    After `failure_threshold` consecutive failures the circuit opens and
+    allow() refuses calls for `recovery_timeout` seconds. Then a single trial
+    call is let through (half-open): success closes the circuit, failure
+    re-opens it. A trial that never reports back (e.g. cancelled) is replaced
+    after another recovery_timeout.
+    """
+    
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+        self.last_changed: Optional[datetime] = None
+        self._opened_at = 0.0  # monotonic
+        self._trial_started: Optional[float] = None
+    
+    def _transition(self, state: str) -> None:
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        logger.warning(f"Circuit '{self.name}' {self.state} -> {state}")
+        self.state = state
+        self.last_changed = datetime.now()
+    
+    @property
+    def is_open(self) -> bool:
+        """
+        Whether calls are currently refused (read-only, never starts a trial)
+        """
+        return self.state == OPEN and time.monotonic() - self._opened_at < self.recovery_timeout
+    
+    def allow(self) -> bool:
+        """
+        Check whether a call may go through, moving open -> half-open when due
+        
+        Returns:
+            bool: False if the caller should fail fast
+        """
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            self._transition(HALF_OPEN)
+            self._trial_started = None
+        
+        if self.state == HALF_OPEN:
+            if self._trial_started is not None and now - self._trial_started < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            self._trial_started = now
+        return True
+    
+    def record_success(self) -> None:
+        """
+        Record a call that reached the upstream
+        """
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+        self._trial_started = None
+    
+    def record_failure(self) -> None:
+        """
+        Record a call that could not reach the upstream
+        """
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._transition(OPEN)
+            self._opened_at = time.monotonic()
+            self._trial_started = None
+    
+    def reset(self) -> None:
+        """
+        Close the circuit and clear the failure count
+        """
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._trial_started = None
+    
+    def retry_after(self) -> int:
+        """
+        Seconds until the next trial call is allowed (at least 1)
+        """
+        if self.state != OPEN:
+            return 1
+        remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+        return max(1, math.ceil(remaining))
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get breaker state and counters for monitoring
+        """
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+            "retry_after": self.retry_after() if self.state == OPEN else None,
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+            "last_changed": self.last_changed.isoformat() if self.last_changed else None
+        }
@@ -0,0 +1,205 @@
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+import re
+
+from app.core.config import settings
+from app.services.backend_pool import canonical_name
+
+logger = logging.getLogger(__name__)
+
+# Role markers and separators the chat template adds around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+SUMMARY_LINE_CHARS = 120
+
+@lru_cache(maxsize=settings.CONTEXT_TOKEN_CACHE_SIZE)
+def count_tokens(text: str) -> int:
+    """
+    Approximate the model tokenizer's count for a piece of text
+    
+    Common words and punctuation are about one token each, long words and
+    digit runs split into several, and non-ASCII scripts are close to one
+    token per character. Cached by content, so stored history is only
+    counted once however many turns it is resent.
+    
+    Args:
+        text: Message content
+    
+    Returns:
+        Estimated token count
+    """
+    tokens = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        word = match.group()
+        if not word.isascii():
+            tokens += len(word)
+        elif word.isdigit():
+            tokens += (len(word) + 2) // 3
+        else:
+            tokens += 1 + len(word) // 8
+    return tokens
+
+def message_tokens(message: Dict[str, str]) -> int:
+    """
+    Estimated tokens a message occupies in the prompt
+    """
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+def _first_sentence(text: str) -> str:
+    sentence = SENTENCE_END.split(" ".join(text.split()), 1)[0]
+    if len(sentence) > SUMMARY_LINE_CHARS:
+        sentence = sentence[:SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+    return sentence
+
+class ContextWindow:
+    """
+    Fits conversation history into a model's context window
+    
+    System messages and the new user message are always kept; older turns
+    are dropped oldest first, in blocks, until the prompt fits the budget. With the
+    "summarize" strategy the dropped turns are replaced by a short extractive
+    summary (first sentence of each), which costs no extra generation.
+    """
+    
+    def __init__(
+        self,
+        default_budget: int = settings.CONTEXT_TOKEN_BUDGET,
+        model_budgets: Optional[Dict[str, int]] = None,
+        response_reserve: int = settings.CONTEXT_RESPONSE_RESERVE,
+        strategy: str = settings.CONTEXT_STRATEGY,
+        summary_tokens: int = settings.CONTEXT_SUMMARY_TOKENS,
+        trim_block: int = settings.CONTEXT_TRIM_BLOCK
+    ):
+        self.default_budget = default_budget
+        budgets = settings.CONTEXT_MODEL_BUDGETS if model_budgets is None else model_budgets
+        self.model_budgets = {canonical_name(name): int(size) for name, size in budgets.items()}
+        self.response_reserve = response_reserve
+        self.strategy = strategy
+        self.summary_tokens = summary_tokens
+        self.trim_block = trim_block
+    
+    def budget_for(self, model: str, options: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Prompt token budget for a model (context window minus the reply reserve)
+        
+        Args:
+            model: Model name
+            options: Request options; num_ctx and num_predict override the settings
+        
+        Returns:
+            Maximum prompt tokens
+        """
+        options = options or {}
+        window = options.get("num_ctx") or self.model_budgets.get(canonical_name(model), self.default_budget)
+        reserve = options.get("num_predict")
+        if not isinstance(reserve, int) or reserve <= 0:
+            reserve = self.response_reserve
+        return max(window - reserve, window // 2)
+    
+    def fit(
+        self,
+        message: str,
+        model: str,
+        history: Optional[List[Dict[str, str]]],
+        options: Optional[Dict[str, Any]] = None,
+        trailing: Optional[List[Dict[str, str]]] = None
+    ) -> Tuple[Optional[List[Dict[str, str]]], Dict[str, Any]]:
+        """
+        Trim (or summarize) history so the prompt fits the model's budget
+        
+        Args:
+            message: New user message
+            model: Model name
+            history: Previous conversation messages (not modified)
+            options: Request generation options
+            trailing: Per-turn messages sent after the history, such as
+                document excerpts. They are always kept and their tokens are
+                reserved, so they never move ahead of the kept turns.
+        
+        Returns:
+            (history to send, report with prompt_tokens_before/after, budget,
+            dropped_messages and summarized). The original list is returned
+            when nothing had to be dropped and there are no trailing messages.
+        """
+        budget = self.budget_for(model, options)
+        history = history or []
+        trailing = trailing or []
+        costs = [message_tokens(m) for m in history]
+        fixed = count_tokens(message) + MESSAGE_OVERHEAD_TOKENS
+        fixed += sum(cost for m, cost in zip(history, costs) if m["role"] == "system")
+        fixed += sum(message_tokens(m) for m in trailing)
+        before = fixed + sum(cost for m, cost in zip(history, costs) if m["role"] != "system")
+        
+        report = {
+            "prompt_tokens_before": before,
+            "prompt_tokens_after": before,
+            "budget": budget,
+            "dropped_messages": 0,
+            "summarized": False
+        }
+        if before <= budget:
+            if trailing:
+                return history + trailing, report
+            return history or None, report
+        
+        turns = [(m, cost) for m, cost in zip(history, costs) if m["role"] != "system"]
+        summarize = self.strategy == "summarize" and self.summary_tokens > 0
+        available = budget - fixed - (self.summary_tokens if summarize else 0)
+        
+        # Keep the most recent turns that fit. The cut is rounded up to a
+        # multiple of trim_block so it only moves every few turns, keeping the
+        # prompt prefix byte-identical in between (Ollama reuses its KV cache
+        # for an unchanged prefix). The kept part starts on a user turn.
+        kept_cost = 0
+        cut = len(turns)
+        while cut > 0 and kept_cost + turns[cut - 1][1] <= available:
+            cut -= 1
+            kept_cost += turns[cut][1]
+        if self.trim_block > 1:
+            cut = min(len(turns), -(-cut // self.trim_block) * self.trim_block)
+        while cut < len(turns) and turns[cut][0]["role"] != "user":
+            cut += 1
+        kept_cost = sum(cost for _, cost in turns[cut:])
+        
+        dropped = [m for m, _ in turns[:cut]]
+        fitted = [m for m in history if m["role"] == "system"]
+        after = fixed + kept_cost
+        if summarize and dropped:
+            summary = self._summarize(dropped)
+            fitted.append(summary)
+            after += message_tokens(summary)
+            report["summarized"] = True
+        fitted.extend(m for m, _ in turns[cut:])
+        fitted.extend(trailing)
+        
+        report["prompt_tokens_after"] = after
+        report["dropped_messages"] = len(dropped)
+        logger.debug(f"Context for {model} trimmed from {before} to {after} tokens (budget {budget})")
+        return fitted, report
+    
+    def _summarize(self, dropped: List[Dict[str, str]]) -> Dict[str, str]:
+        """
+        Extractive summary of dropped turns, newest lines kept if it overflows
+        """
+        lines: List[str] = []
+        used = count_tokens(SUMMARY_HEADER) + MESSAGE_OVERHEAD_TOKENS
+        for m in reversed(dropped):
+            speaker = "User" if m["role"] == "user" else "Assistant"
+            line = f"- {speaker}: {_first_sentence(m['content'])}"
+            cost = count_tokens(line)
+            if used + cost > self.summary_tokens:
+                break
+            lines.append(line)
+            used += cost
+        return {
+            "role": "system",
+            "content": "\n".join([SUMMARY_HEADER, *reversed(lines)])
+        }
+
+# Create a singleton instance
+context_window = ContextWindow()
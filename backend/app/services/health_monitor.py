@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime
+from typing import Optional, Dict, Any
+import logging
+import time
+
+from app.core.config import settings
+from app.services.ollama_service import OllamaService, ollama_service
+
+logger = logging.getLogger(__name__)
+
+class HealthMonitor:
+    """
+    Background task that polls Ollama and caches the latest health state
+    
+    Request handlers read the cached state instead of probing Ollama on
+    every call. A refresh can be requested early, e.g. after a chat fails
+    with a connection error.
+    """
+    
+    def __init__(self, service: OllamaService):
+        self.service = service
+        self.interval = settings.HEALTH_CHECK_INTERVAL
+        self.unhealthy_interval = settings.HEALTH_CHECK_UNHEALTHY_INTERVAL
+        self.healthy: Optional[bool] = None
+        self.last_checked: Optional[datetime] = None
+        self.last_changed: Optional[datetime] = None
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self._checked_at = 0.0  # monotonic time of the last probe
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    async def start(self) -> None:
+        """
+        Probe once and start the polling task (called on application startup)
+        """
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Health monitor started (interval={self.interval}s)")
+    
+    async def stop(self) -> None:
+        """
+        Cancel the polling task (called on application shutdown)
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._wake = None
+    
+    async def refresh(self) -> bool:
+        """
+        Probe Ollama now and record the result
+        
+        Returns:
+            bool: True if Ollama is accessible
+        """
+        healthy = await self.service.check_health()
+        now = datetime.now()
+        
+        if healthy:
+            self.consecutive_successes += 1
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            self.consecutive_successes = 0
+        
+        if healthy != self.healthy:
+            if self.healthy is not None:
+                logger.warning(f"Ollama health changed: {'running' if healthy else 'unavailable'}")
+            self.last_changed = now
+        
+        self.healthy = healthy
+        self.last_checked = now
+        self._checked_at = time.monotonic()
+        return healthy
+    
+    def request_refresh(self) -> None:
+        """
+        Ask the polling task to probe immediately instead of waiting for the interval
+        """
+        if self._wake is not None:
+            self._wake.set()
+    
+    async def is_healthy(self) -> bool:
+        """
+        Return the cached health state
+        
+        Without a running monitor (e.g. lifespan events not triggered) a
+        stale or missing state is refreshed inline.
+        
+        Returns:
+            bool: True if Ollama was accessible at the last probe
+        """
+        if self.healthy is None or (
+            not self.running and time.monotonic() - self._checked_at > self.interval
+        ):
+            return await self.refresh()
+        return self.healthy
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current health state for reporting
+        """
+        return {
+            "healthy": self.healthy,
+            "last_checked": self.last_checked,
+            "last_changed": self.last_changed,
+            "consecutive_failures": self.consecutive_failures,
+            "consecutive_successes": self.consecutive_successes
+        }
+    
+    async def _run(self) -> None:
+        while True:
+            delay = self.interval if self.healthy else self.unhealthy_interval
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health monitor probe failed: {e}")
+
+# Create a singleton instance
+health_monitor = HealthMonitor(ollama_service)
@@ -0,0 +1,221 @@
+from bisect import bisect_left
+from typing import Dict, List, Tuple, Sequence, Callable, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Bucket bounds in seconds for end-to-end latency on a Pi (sub-second to minutes)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+QUEUE_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LOAD_BUCKETS = (0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+TOKENS_PER_SECOND_BUCKETS = (0.5, 1.0, 2.0, 4.0, 6.0, 8.0, 12.0, 16.0, 24.0, 32.0, 64.0, 128.0)
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    """
+    Monotonic counter with labels
+    
+    Updates are plain dict/int operations on the event loop thread, so no
+    locking is needed; each uvicorn worker keeps its own values.
+    """
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+    
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+    
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+
+class Gauge:
+    """
+    Gauge whose samples are read from a callback at scrape time
+    
+    The callback returns {label values: value}, so hot paths never touch it.
+    """
+    
+    kind = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str],
+        collect: Callable[[], Dict[LabelValues, float]]
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._collect = collect
+    
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._collect().items():
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+
+class CallbackCounter(Gauge):
+    """
+    Counter whose samples are read from a callback at scrape time
+    
+    For components that already keep their own monotonic counts.
+    """
+    
+    kind = "counter"
+
+class Histogram:
+    """
+    Fixed-bucket histogram with labels
+    
+    observe() increments a single (non-cumulative) bucket found by bisection;
+    cumulative counts are only computed when the endpoint is scraped.
+    """
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count, sum, count]
+        self._series: Dict[LabelValues, List[float]] = {}
+    
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+    
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[-1] if series else 0
+    
+    def samples(self) -> Iterable[str]:
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                label_str = _format_labels(self.label_names, labels, 'le="' + le + '"')
+                yield f"{self.name}_bucket{label_str} {cumulative}"
+            label_str = _format_labels(self.label_names, labels)
+            yield f"{self.name}_sum{label_str} {_format_value(series[-2])}"
+            yield f"{self.name}_count{label_str} {series[-1]}"
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered in the Prometheus text exposition format
+    """
+    
+    def __init__(self):
+        self._metrics: List = []
+    
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.samples())
+            except Exception as e:
+                logger.error(f"Failed to collect metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+# Create a singleton registry and the application metrics
+registry = MetricsRegistry()
+
+chat_requests = registry.register(Counter(
+    "chatbot_chat_requests_total",
+    "Chat requests by model and outcome (ok, cached, rejected, error)",
+    ["model", "outcome"]
+))
+request_latency = registry.register(Histogram(
+    "chatbot_request_duration_seconds",
+    "End-to-end chat latency including queueing",
+    ["model"],
+    LATENCY_BUCKETS
+))
+queue_wait = registry.register(Histogram(
+    "chatbot_queue_wait_seconds",
+    "Time spent waiting for a generation slot",
+    ["model"],
+    QUEUE_WAIT_BUCKETS
+))
+model_load = registry.register(Histogram(
+    "chatbot_model_load_seconds",
+    "Ollama model load time reported per request",
+    ["model"],
+    LOAD_BUCKETS
+))
+prompt_eval_rate = registry.register(Histogram(
+    "chatbot_prompt_eval_tokens_per_second",
+    "Prompt evaluation throughput reported by Ollama",
+    ["model"],
+    TOKENS_PER_SECOND_BUCKETS
+))
+eval_rate = registry.register(Histogram(
+    "chatbot_eval_tokens_per_second",
+    "Generation throughput reported by Ollama",
+    ["model"],
+    TOKENS_PER_SECOND_BUCKETS
+))
+upstream_errors = registry.register(Counter(
+    "chatbot_upstream_errors_total",
+    "Failed calls to Ollama by model and kind (connection, error)",
+    ["model", "kind"]
+))
+
+context_trimmed_tokens = registry.register(Counter(
+    "chatbot_context_trimmed_tokens_total",
+    "Estimated prompt tokens removed by history trimming/summarization",
+    ["model"]
+))
+
+def observe_generation(model: str, stats: Dict) -> None:
+    """
+    Record Ollama's timing breakdown for a finished generation
+    
+    Args:
+        model: Model name
+        stats: Output of app.services.stats.compute_chat_stats()
+    """
+    if stats.get("load_time") is not None:
+        model_load.observe(stats["load_time"], model)
+    if stats.get("prompt_tokens_per_second") is not None:
+        prompt_eval_rate.observe(stats["prompt_tokens_per_second"], model)
+    if stats.get("eval_tokens_per_second") is not None:
+        eval_rate.observe(stats["eval_tokens_per_second"], model)
@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+import asyncio
+import hashlib
+import logging
+import time
+
+from app.core.config import settings
+from app.models.schemas import ModelsResponse, ModelInfo
+from app.services.ollama_service import ollama_service, OllamaService
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CatalogEntry:
+    """
+    A serialized model list with its validators
+    """
+    body: bytes
+    etag: str
+    last_modified: datetime
+    fetched_at: float
+    count: int
+
+class ModelCatalog:
+    """
+    TTL cache of the model list served by GET /api/models
+    
+    The ModelsResponse is built and serialized once per refresh; polls within
+    the TTL reuse the same bytes and ETag. Load/unload call invalidate() so the
+    next poll refetches. Concurrent refreshes share one /api/tags round trip.
+    """
+    
+    def __init__(self, service: OllamaService, ttl: float = settings.MODEL_CATALOG_TTL):
+        self.service = service
+        self.ttl = ttl
+        self._entry: Optional[CatalogEntry] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.hits = 0
+        self.refreshes = 0
+    
+    def _is_fresh(self) -> bool:
+        return (
+            self._entry is not None
+            and time.monotonic() - self._entry.fetched_at < self.ttl
+        )
+    
+    async def get(self) -> CatalogEntry:
+        """
+        Return the cached catalog, refreshing it from Ollama when stale
+        
+        Returns:
+            CatalogEntry with the serialized ModelsResponse
+        """
+        if self._is_fresh():
+            self.hits += 1
+            return self._entry
+        
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                return self._entry
+            return await self._refresh()
+    
+    async def _refresh(self) -> CatalogEntry:
+        models_data = await self.service.list_models()
+        models = [
+            ModelInfo(
+                name=m["name"],
+                size=m.get("size"),
+                modified_at=m.get("modified_at")
+            )
+            for m in models_data
+        ]
+        body = ModelsResponse(models=models, count=len(models)).model_dump_json().encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        
+        previous = self._entry
+        if previous is not None and previous.etag == etag:
+            # Unchanged list: keep the validators so clients still get 304s
+            last_modified = previous.last_modified
+        else:
+            last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        
+        self._entry = CatalogEntry(
+            body=body,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=time.monotonic(),
+            count=len(models)
+        )
+        self.refreshes += 1
+        return self._entry
+    
+    def invalidate(self) -> None:
+        """
+        Force the next get() to refetch (after a load, unload or pull)
+        
+        The validators of the last entry are kept, so an unchanged list
+        still answers conditional requests with 304.
+        """
+        if self._entry is not None:
+            self._entry.fetched_at = float("-inf")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get catalog cache counters
+        """
+        entry = self._entry
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "cached": self._is_fresh(),
+            "etag": entry.etag if entry else None,
+            "count": entry.count if entry else None
+        }
+
+# Create singleton instance
+model_catalog = ModelCatalog(ollama_service)
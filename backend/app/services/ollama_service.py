@@ -1,134 +1,843 @@
 import httpx
-from typing import Optional, Dict, Any, List
+from contextlib import aclosing, asynccontextmanager, nullcontext
+from typing import Optional, Dict, Any, List, AsyncIterator, AsyncContextManager, Callable, Tuple
+import asyncio
 import logging
+from app.core import fast_json
 from app.core.config import settings
+from app.services.circuit_breaker import CircuitBreaker, backoff_delay, STATE_VALUES
+from app.services.backend_pool import BackendPool, Backend
+from app.services.metrics import registry, Gauge, CallbackCounter
+from app.services.scheduler import DisconnectCheck, cancel_on_disconnect
+from app.services.single_flight import SingleFlight, flight_key
 
 logger = logging.getLogger(__name__)
 
+class OllamaConnectionError(Exception):
+    """
+    Raised when Ollama cannot be reached (connection refused, reset, etc.)
+    """
+
+class OllamaUnavailableError(OllamaConnectionError):
+    """
+    Raised without contacting Ollama while the circuit breaker is open
+    """
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"Ollama is unavailable (circuit open), retry in {retry_after}s")
+        self.retry_after = retry_after
+
+# Failures where the request never reached Ollama, so another node can take it
+FAILOVER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# Acquires a generation slot; receives a disconnect check for the queue wait
+SlotFactory = Callable[[Optional[DisconnectCheck]], AsyncContextManager[Any]]
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def _json_body(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    httpx arguments sending a JSON body, pre-encoded on the fast path
+    """
+    if fast_json.enabled():
+        return {"content": fast_json.dumps(payload), "headers": JSON_HEADERS}
+    return {"json": payload}
+
+async def _iter_json_lines(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Decode an NDJSON stream straight from the received bytes
+    """
+    buffer = b""
+    async for data in response.aiter_bytes():
+        buffer += data
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield fast_json.loads(line)
+    if buffer.strip():
+        yield fast_json.loads(buffer)
+
 class OllamaService:
     """
     Service class for interacting with Ollama API
+    
+    Generations are routed across the nodes in OLLAMA_BACKENDS (or the single
+    OLLAMA_BASE_URL); model listing, health, load and unload go to every node.
+    Concurrent identical chats, model listings and health probes share one
+    upstream call (see SingleFlight).
     """
     
     def __init__(self):
-        self.base_url = settings.OLLAMA_BASE_URL
+        self.pool = BackendPool(settings.OLLAMA_BACKENDS or [settings.OLLAMA_BASE_URL])
         self.timeout = settings.OLLAMA_TIMEOUT
         self.default_model = settings.OLLAMA_DEFAULT_MODEL
+        self.default_options: Dict[str, Any] = {"temperature": 0.7}
+        self.keep_alive = settings.OLLAMA_KEEP_ALIVE
+        self._client: Optional[httpx.AsyncClient] = None
+        self.flights = SingleFlight(settings.COALESCE_REQUESTS)
+    
+    @property
+    def base_url(self) -> str:
+        """
+        URL of the primary (first) backend; assigning it replaces the pool
+        """
+        return self.pool.primary.url
+    
+    @base_url.setter
+    def base_url(self, url: str) -> None:
+        self.pool = BackendPool([url])
+    
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """
+        Circuit breaker of the primary backend
+        """
+        return self.pool.primary.breaker
+    
+    @breaker.setter
+    def breaker(self, breaker: CircuitBreaker) -> None:
+        self.pool.primary.breaker = breaker
+    
+    def _build_client(self) -> httpx.AsyncClient:
+        """
+        Create the shared HTTP client with keep-alive connection pooling
+        
+        Returns:
+            httpx.AsyncClient configured from settings
+        """
+        limits = httpx.Limits(
+            max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(self.timeout, connect=settings.OLLAMA_CONNECT_TIMEOUT)
+        return httpx.AsyncClient(limits=limits, timeout=timeout)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Shared HTTP client, created lazily if start() has not been called
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+    
+    async def start(self) -> None:
+        """
+        Open the shared HTTP client (called on application startup)
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+            logger.info(
+                f"Ollama client pool opened (max_connections={settings.OLLAMA_MAX_CONNECTIONS}, "
+                f"keepalive={settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS})"
+            )
+    
+    async def close(self) -> None:
+        """
+        Close the shared HTTP client (called on application shutdown)
+        """
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("Ollama client pool closed")
+        self._client = None
+    
+    def _check_circuit(self, backend: Backend) -> None:
+        """
+        Fail fast while the backend's circuit breaker is open
+        
+        Raises:
+            OllamaUnavailableError: The breaker refused the call
+        """
+        if not backend.breaker.allow():
+            raise OllamaUnavailableError(backend.breaker.retry_after())
+    
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        idempotent: bool = False,
+        backend: Optional[Backend] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request to one Ollama node through its circuit breaker
+        
+        Transport failures (refused, reset, timed out) count against the
+        breaker; any HTTP response counts as success. Idempotent calls are
+        retried with jittered exponential backoff.
+        
+        Args:
+            method: HTTP method
+            path: API path, e.g. "/api/tags"
+            idempotent: Whether the call may be retried
+            backend: Node to call (default: the primary backend)
+            **kwargs: Passed to httpx (json, timeout, ...)
+        
+        Returns:
+            The httpx response
+        
+        Raises:
+            OllamaUnavailableError: The circuit is open
+            httpx.TransportError: The last attempt failed to reach Ollama
+        """
+        backend = backend or self.pool.primary
+        attempts = max(1, settings.OLLAMA_RETRY_ATTEMPTS) if idempotent else 1
+        for attempt in range(attempts):
+            self._check_circuit(backend)
+            try:
+                response = await self.client.request(method, f"{backend.url}{path}", **kwargs)
+            except httpx.TransportError as e:
+                backend.breaker.record_failure()
+                if attempt + 1 == attempts:
+                    raise
+                delay = backoff_delay(attempt, settings.OLLAMA_RETRY_BASE_DELAY, settings.OLLAMA_RETRY_MAX_DELAY)
+                logger.warning(f"Ollama {backend.url}{path} failed ({e!r}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            backend.breaker.record_success()
+            return response
+    
+    async def _routed_request(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        session_id: Optional[str] = None
+    ) -> Tuple[Backend, httpx.Response]:
+        """
+        POST a generation to the best node, failing over if it cannot be reached
+        
+        Only connection failures fail over: the request never reached the
+        node, so it is safe to send elsewhere. The failed node is ejected.
+        
+        Args:
+            path: API path ("/api/chat" or "/api/generate")
+            payload: Request body (its "model" drives routing)
+            session_id: Conversation session for node affinity
+        
+        Returns:
+            (node that answered, response)
+        """
+        tried: List[Backend] = []
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self.pool.select(payload["model"], session_id, exclude=tried)
+            if backend is None:
+                if tried:
+                    raise last_error
+                raise OllamaUnavailableError(self.pool.retry_after())
+            tried.append(backend)
+            try:
+                with self.pool.track(backend):
+                    response = await self._request("POST", path, backend=backend, **_json_body(payload))
+            except FAILOVER_ERRORS as e:
+                self.pool.mark_health(backend, False)
+                logger.warning(f"Ollama backend {backend.url} unreachable ({e!r}), failing over")
+                last_error = e
+                continue
+            except OllamaUnavailableError as e:
+                last_error = e
+                continue
+            if response.is_success:
+                self.pool.mark_resident(backend, payload["model"], True)
+            return backend, response
+    
+    @asynccontextmanager
+    async def _routed_stream(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Open a streaming generation on the best node, failing over on connect errors
         
+        Yields:
+            The streaming httpx response (headers received)
+        """
+        tried: List[Backend] = []
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self.pool.select(payload["model"], session_id, exclude=tried)
+            if backend is None:
+                if tried:
+                    raise last_error
+                raise OllamaUnavailableError(self.pool.retry_after())
+            tried.append(backend)
+            if not backend.breaker.allow():
+                last_error = OllamaUnavailableError(backend.breaker.retry_after())
+                continue
+            
+            opened = False
+            try:
+                with self.pool.track(backend):
+                    async with self.client.stream("POST", f"{backend.url}{path}", **_json_body(payload)) as response:
+                        opened = True
+                        backend.breaker.record_success()
+                        if response.is_success:
+                            self.pool.mark_resident(backend, payload["model"], True)
+                        try:
+                            yield response
+                        except httpx.TransportError:
+                            backend.breaker.record_failure()
+                            raise
+                        return
+            except FAILOVER_ERRORS as e:
+                if opened:
+                    raise
+                backend.breaker.record_failure()
+                self.pool.mark_health(backend, False)
+                logger.warning(f"Ollama backend {backend.url} unreachable ({e!r}), failing over")
+                last_error = e
+            except httpx.TransportError:
+                if not opened:
+                    backend.breaker.record_failure()
+                raise
+    
+    async def _broadcast(
+        self,
+        method: str,
+        path: str,
+        idempotent: bool = False,
+        **kwargs
+    ) -> List[Tuple[Backend, httpx.Response]]:
+        """
+        Send a request to every reachable node
+        
+        Returns:
+            (node, response) for each node that answered with a 2xx status
+        
+        Raises:
+            The first node's error if none succeeded
+        """
+        backends = self.pool.reachable()
+        if not backends:
+            raise OllamaUnavailableError(self.pool.retry_after())
+        
+        async def send(backend: Backend) -> httpx.Response:
+            response = await self._request(method, path, idempotent=idempotent, backend=backend, **kwargs)
+            response.raise_for_status()
+            return response
+        
+        results = await asyncio.gather(*(send(b) for b in backends), return_exceptions=True)
+        succeeded = []
+        for backend, result in zip(backends, results):
+            if isinstance(result, Exception):
+                if len(backends) > 1:
+                    logger.warning(f"Ollama backend {backend.url} failed {path}: {result}")
+            else:
+                succeeded.append((backend, result))
+        if not succeeded:
+            raise results[0]
+        return succeeded
+    
     async def check_health(self) -> bool:
         """
         Check if Ollama service is running
         
+        Every node is probed; failing nodes are ejected from routing until
+        a later probe succeeds.
+        
         Returns:
-            bool: True if Ollama is accessible, False otherwise
+            bool: True if at least one node is accessible, False otherwise
         """
+        return await self.flights.do("health", lambda _: self._check_health(), kind="health")
+    
+    async def _check_health(self) -> bool:
+        results = await asyncio.gather(*(self._probe(b) for b in self.pool.backends))
+        return any(results)
+    
+    async def _probe(self, backend: Backend) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                return response.status_code == 200
+            response = await self._request(
+                "GET",
+                "/api/tags",
+                idempotent=True,
+                backend=backend,
+                timeout=settings.OLLAMA_HEALTH_TIMEOUT
+            )
+            healthy = response.status_code == 200
+        except OllamaUnavailableError:
+            healthy = False
         except Exception as e:
-            logger.error(f"Failed to connect to Ollama: {e}")
-            return False
+            logger.error(f"Failed to connect to Ollama at {backend.url}: {e}")
+            healthy = False
+        self.pool.mark_health(backend, healthy)
+        return healthy
     
     async def chat(
         self, 
         message: str, 
         model: Optional[str] = None,
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        slot: Optional[SlotFactory] = None,
+        is_disconnected: Optional[DisconnectCheck] = None
     ) -> Dict[str, Any]:
         """
         Send a chat message to Ollama
         
+        Identical concurrent calls (same model, messages and options) share
+        one generation; only that generation takes a slot.
+        
         Args:
             message: User message
             model: Model name (default: llama3.2)
             conversation_history: Previous conversation messages
-            
+            options: Generation options overriding the defaults
+            session_id: Conversation session, keeps it on the same node
+            slot: Acquires a scheduler slot around the upstream call
+            is_disconnected: Polled while queued and generating; the shared
+                call is cancelled once every caller's client is gone
+        
         Returns:
             Dict containing the response and metadata
         """
         model = model or self.default_model
+        payload = self._build_chat_payload(message, model, conversation_history, options, stream=False)
+        return await self._coalesced("/api/chat", payload, session_id, slot, is_disconnected, self._chat)
+    
+    async def _coalesced(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        session_id: Optional[str],
+        slot: Optional[SlotFactory],
+        is_disconnected: Optional[DisconnectCheck],
+        send: Callable[[Dict[str, Any], Optional[str]], Any]
+    ) -> Dict[str, Any]:
+        async def call(abandoned: DisconnectCheck) -> Dict[str, Any]:
+            async with (slot(abandoned) if slot else nullcontext()):
+                # Stop Ollama once every caller's client has gone
+                return await cancel_on_disconnect(send(payload, session_id), abandoned)
         
-        # Prepare messages
-        messages = conversation_history or []
-        messages.append({
-            "role": "user",
-            "content": message
-        })
-        
-        payload = {
-            "model": model,
-            "messages": messages,
-            "stream": False,
-            "options": {
-                "temperature": 0.7
+        result = await self.flights.do(
+            flight_key(path, payload), call, is_disconnected, kind=path.rsplit("/", 1)[-1]
+        )
+        # Each caller gets its own dict; the shared result stays intact
+        return dict(result)
+    
+    async def _chat(self, payload: Dict[str, Any], session_id: Optional[str]) -> Dict[str, Any]:
+        model = payload["model"]
+        try:
+            _, response = await self._routed_request("/api/chat", payload, session_id)
+            response.raise_for_status()
+            data = fast_json.loads(response.content)
+            
+            return {
+                "response": data.get("message", {}).get("content", ""),
+                "model": model,
+                "done": data.get("done", False),
+                "total_duration": data.get("total_duration"),
+                "load_duration": data.get("load_duration"),
+                "prompt_eval_count": data.get("prompt_eval_count"),
+                "prompt_eval_duration": data.get("prompt_eval_duration"),
+                "eval_count": data.get("eval_count"),
+                "eval_duration": data.get("eval_duration")
             }
-        }
         
+        except OllamaUnavailableError:
+            raise
+        except httpx.TimeoutException:
+            logger.error(f"Timeout while communicating with Ollama (model: {model})")
+            raise Exception(f"Request timeout - model '{model}' took too long to respond")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error from Ollama: {e}")
+            raise Exception(f"Ollama API error: {e.response.text}")
+        except httpx.TransportError as e:
+            logger.error(f"Connection error communicating with Ollama: {e}")
+            raise OllamaConnectionError(f"Failed to communicate with Ollama: {str(e)}")
+        except Exception as e:
+            logger.error(f"Unexpected error communicating with Ollama: {e}")
+            raise Exception(f"Failed to communicate with Ollama: {str(e)}")
+    
+    async def chat_stream(
+        self,
+        message: str,
+        model: Optional[str] = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        slot: Optional[SlotFactory] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat completion from Ollama chunk by chunk
+        
+        Identical concurrent streams share one generation whose chunks fan
+        out to every caller. Closing the generator (e.g. when the HTTP client
+        disconnects) only unsubscribes; the upstream response is closed, and
+        Ollama stops generating, once the last caller has gone.
+        
+        Args:
+            message: User message
+            model: Model name (default: llama3.2)
+            conversation_history: Previous conversation messages
+            options: Generation options overriding the defaults
+            session_id: Conversation session, keeps it on the same node
+            slot: Acquires a scheduler slot for the shared generation
+        
+        Yields:
+            Raw Ollama chunks; the last one has done=True and timing stats
+        """
+        model = model or self.default_model
+        payload = self._build_chat_payload(message, model, conversation_history, options, stream=True)
+        async for chunk in self.flights.stream(
+            flight_key("/api/chat", payload),
+            lambda: self._stream("/api/chat", payload, session_id, slot),
+            kind="chat_stream"
+        ):
+            yield chunk
+    
+    async def _stream(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        session_id: Optional[str],
+        slot: Optional[SlotFactory]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Relay one upstream stream, reshaping /api/generate chunks like /api/chat's
+        """
+        model = payload["model"]
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/chat",
-                    json=payload
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                return {
-                    "response": data.get("message", {}).get("content", ""),
-                    "model": model,
-                    "done": data.get("done", False),
-                    "total_duration": data.get("total_duration"),
-                    "load_duration": data.get("load_duration"),
-                    "prompt_eval_count": data.get("prompt_eval_count"),
-                    "eval_count": data.get("eval_count")
-                }
-                
+            async with (slot(None) if slot else nullcontext()):
+                async with self._routed_stream(path, payload, session_id) as response:
+                    if response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+                    async with aclosing(_iter_json_lines(response)) as chunks:
+                        async for chunk in chunks:
+                            if "error" in chunk:
+                                raise Exception(f"Ollama API error: {chunk['error']}")
+                            if "response" in chunk:
+                                chunk["message"] = {"role": "assistant", "content": chunk.pop("response")}
+                            yield chunk
+                            if chunk.get("done"):
+                                return
+        
+        except httpx.TimeoutException:
+            logger.error(f"Timeout while streaming from Ollama (model: {model})")
+            raise Exception(f"Request timeout - model '{model}' took too long to respond")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error from Ollama: {e}")
+            raise Exception(f"Ollama API error: {e.response.text}")
+        except httpx.TransportError as e:
+            logger.error(f"Connection error streaming from Ollama: {e}")
+            raise OllamaConnectionError(f"Failed to communicate with Ollama: {str(e)}")
+        except httpx.HTTPError as e:
+            logger.error(f"Unexpected error streaming from Ollama: {e}")
+            raise Exception(f"Failed to communicate with Ollama: {str(e)}")
+    
+    async def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        system: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        slot: Optional[SlotFactory] = None,
+        is_disconnected: Optional[DisconnectCheck] = None
+    ) -> Dict[str, Any]:
+        """
+        Continue a session-pinned conversation through /api/generate
+        
+        The `context` tokens returned by the previous turn are passed back,
+        so Ollama reuses their KV cache and only evaluates the new prompt.
+        
+        Args:
+            prompt: New user message (or a transcript when re-seeding)
+            model: Model name (default: llama3.2)
+            context: Context tokens from the previous turn, if any
+            system: System prompt, only needed when starting without context
+            options: Generation options overriding the defaults
+            session_id: Conversation session, keeps it on the same node
+            slot: Acquires a scheduler slot around the upstream call
+            is_disconnected: Polled while queued and generating (see chat())
+        
+        Returns:
+            Dict shaped like chat()'s result plus the new "context" tokens
+        """
+        model = model or self.default_model
+        payload = self._build_generate_payload(prompt, model, context, system, options, stream=False)
+        return await self._coalesced("/api/generate", payload, session_id, slot, is_disconnected, self._generate)
+    
+    async def _generate(self, payload: Dict[str, Any], session_id: Optional[str]) -> Dict[str, Any]:
+        model = payload["model"]
+        try:
+            _, response = await self._routed_request("/api/generate", payload, session_id)
+            response.raise_for_status()
+            data = fast_json.loads(response.content)
+            
+            return {
+                "response": data.get("response", ""),
+                "model": model,
+                "done": data.get("done", False),
+                "total_duration": data.get("total_duration"),
+                "load_duration": data.get("load_duration"),
+                "prompt_eval_count": data.get("prompt_eval_count"),
+                "prompt_eval_duration": data.get("prompt_eval_duration"),
+                "eval_count": data.get("eval_count"),
+                "eval_duration": data.get("eval_duration"),
+                "context": data.get("context")
+            }
+        
+        except OllamaUnavailableError:
+            raise
         except httpx.TimeoutException:
             logger.error(f"Timeout while communicating with Ollama (model: {model})")
             raise Exception(f"Request timeout - model '{model}' took too long to respond")
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error from Ollama: {e}")
             raise Exception(f"Ollama API error: {e.response.text}")
+        except httpx.TransportError as e:
+            logger.error(f"Connection error communicating with Ollama: {e}")
+            raise OllamaConnectionError(f"Failed to communicate with Ollama: {str(e)}")
         except Exception as e:
             logger.error(f"Unexpected error communicating with Ollama: {e}")
             raise Exception(f"Failed to communicate with Ollama: {str(e)}")
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        system: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        slot: Optional[SlotFactory] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate()
+        
+        Chunks are reshaped like chat_stream()'s ({"message": {"content": ...}}),
+        so callers can relay either; the final chunk carries "context".
+        
+        Yields:
+            Chat-shaped chunks; the last one has done=True, timing stats and context
+        """
+        model = model or self.default_model
+        payload = self._build_generate_payload(prompt, model, context, system, options, stream=True)
+        async for chunk in self.flights.stream(
+            flight_key("/api/generate", payload),
+            lambda: self._stream("/api/generate", payload, session_id, slot),
+            kind="generate_stream"
+        ):
+            yield chunk
+    
+    async def embed(self, text: str, model: str) -> List[float]:
+        """
+        Embed a text with Ollama's embeddings API (/api/embeddings)
+        
+        Args:
+            text: Text to embed
+            model: Embedding model, e.g. nomic-embed-text
+        
+        Returns:
+            The embedding vector
+        """
+        try:
+            _, response = await self._routed_request("/api/embeddings", {"model": model, "prompt": text})
+            response.raise_for_status()
+            return fast_json.loads(response.content).get("embedding") or []
+        
+        except OllamaUnavailableError:
+            raise
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error from Ollama: {e}")
+            raise Exception(f"Ollama API error: {e.response.text}")
+        except httpx.TransportError as e:
+            logger.error(f"Connection error communicating with Ollama: {e}")
+            raise OllamaConnectionError(f"Failed to communicate with Ollama: {str(e)}")
+    
+    def resolve_options(self, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Merge request generation options over the service defaults
+        
+        Args:
+            options: Per-request options (temperature, seed, num_predict, ...)
+        
+        Returns:
+            Effective options sent to Ollama
+        """
+        if not options:
+            return self.default_options
+        return {**self.default_options, **options}
+    
+    @staticmethod
+    def build_messages(
+        message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Build the message list for a chat turn
+        
+        The caller's history is not mutated; message dicts are shared and
+        only the list of references is new.
+        
+        Args:
+            message: User message
+            conversation_history: Previous conversation messages
+        
+        Returns:
+            History followed by the new user message
+        """
+        return [*(conversation_history or ()), {
+            "role": "user",
+            "content": message
+        }]
+    
+    def _build_chat_payload(
+        self,
+        message: str,
+        model: str,
+        conversation_history: Optional[List[Dict[str, str]]],
+        options: Optional[Dict[str, Any]],
+        stream: bool
+    ) -> Dict[str, Any]:
+        """
+        Build the request body for Ollama's /api/chat
+        
+        Args:
+            message: User message
+            model: Model name
+            conversation_history: Previous conversation messages
+            options: Generation options overriding the defaults
+            stream: Whether Ollama should stream the response
+        
+        Returns:
+            Request payload
+        """
+        return {
+            "model": model,
+            "messages": self.build_messages(message, conversation_history),
+            "stream": stream,
+            "options": self.resolve_options(options),
+            "keep_alive": self.keep_alive
+        }
+    
+    def _build_generate_payload(
+        self,
+        prompt: str,
+        model: str,
+        context: Optional[List[int]],
+        system: Optional[str],
+        options: Optional[Dict[str, Any]],
+        stream: bool
+    ) -> Dict[str, Any]:
+        """
+        Build the request body for Ollama's /api/generate
+        
+        Returns:
+            Request payload; context and system are omitted when not given
+        """
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": self.resolve_options(options),
+            "keep_alive": self.keep_alive
+        }
+        if context:
+            payload["context"] = context
+        if system:
+            payload["system"] = system
+        return payload
+    
     async def list_models(self) -> List[Dict[str, Any]]:
         """
         List all available Ollama models
         
+        With several backends this is the union of every reachable node's
+        models, de-duplicated by name.
+        
         Returns:
             List of model information dictionaries
         """
+        results = await self.flights.do("GET /api/tags", lambda _: self._list_models(), kind="tags")
+        return [dict(item) for item in results]
+    
+    async def _list_models(self) -> List[Dict[str, Any]]:
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                response.raise_for_status()
-                data = response.json()
-                
-                models = []
-                for model in data.get("models", []):
-                    models.append({
-                        "name": model.get("name", ""),
+            results = await self._broadcast(
+                "GET",
+                "/api/tags",
+                idempotent=True,
+                timeout=settings.OLLAMA_LIST_TIMEOUT
+            )
+            
+            models = {}
+            for _, response in results:
+                for model in fast_json.loads(response.content).get("models", []):
+                    name = model.get("name", "")
+                    models.setdefault(name, {
+                        "name": name,
                         "size": self._format_size(model.get("size", 0)),
                         "modified_at": model.get("modified_at", "")
                     })
-                
-                return models
-                
+            
+            return list(models.values())
+        
+        except OllamaUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Failed to list models: {e}")
             raise Exception(f"Failed to retrieve model list: {str(e)}")
     
+    async def list_running(self) -> List[Dict[str, Any]]:
+        """
+        List models currently loaded in Ollama's memory (/api/ps)
+        
+        Each node's answer also refreshes the pool's view of what is warm
+        there. A model resident on several nodes is reported once.
+        
+        Returns:
+            List of dicts with name, size, size_vram and expires_at
+        """
+        results = await self.flights.do("GET /api/ps", lambda _: self._list_running(), kind="ps")
+        return [dict(item) for item in results]
+    
+    async def _list_running(self) -> List[Dict[str, Any]]:
+        try:
+            results = await self._broadcast(
+                "GET",
+                "/api/ps",
+                idempotent=True,
+                timeout=settings.OLLAMA_LIST_TIMEOUT
+            )
+            
+            running = {}
+            for backend, response in results:
+                models = fast_json.loads(response.content).get("models", [])
+                self.pool.set_resident(backend, [model.get("name", "") for model in models])
+                for model in models:
+                    name = model.get("name", "")
+                    if name not in running or model.get("size", 0) > running[name]["size"]:
+                        running[name] = {
+                            "name": name,
+                            "size": model.get("size", 0),
+                            "size_vram": model.get("size_vram", 0),
+                            "expires_at": model.get("expires_at")
+                        }
+            
+            return list(running.values())
+        
+        except OllamaUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to list running models: {e}")
+            raise Exception(f"Failed to retrieve running models: {str(e)}")
+    
     async def load_model(self, model: str, keep_alive: str = "5m") -> Dict[str, Any]:
         """
-        Load a model into memory
+        Load a model into memory on every reachable node
         
         Args:
             model: Model name
             keep_alive: How long to keep model in memory
-            
+        
         Returns:
             Dict containing load status
         """
@@ -138,30 +847,32 @@ class OllamaService:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json=payload
-                )
-                response.raise_for_status()
-                
-                return {
-                    "status": "loaded",
-                    "model": model,
-                    "keep_alive": keep_alive
-                }
-                
+            results = await self._broadcast(
+                "POST",
+                "/api/generate",
+                json=payload,
+                timeout=settings.OLLAMA_LOAD_TIMEOUT
+            )
+            for backend, _ in results:
+                self.pool.mark_resident(backend, model, True)
+            
+            return {
+                "status": "loaded",
+                "model": model,
+                "keep_alive": keep_alive
+            }
+        
         except Exception as e:
             logger.error(f"Failed to load model {model}: {e}")
             raise Exception(f"Failed to load model: {str(e)}")
     
     async def unload_model(self, model: str) -> Dict[str, Any]:
         """
-        Unload a model from memory
+        Unload a model from memory on every reachable node
         
         Args:
             model: Model name
-            
+        
         Returns:
             Dict containing unload status
         """
@@ -171,18 +882,20 @@ class OllamaService:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json=payload
-                )
-                response.raise_for_status()
-                
-                return {
-                    "status": "unloaded",
-                    "model": model
-                }
-                
+            results = await self._broadcast(
+                "POST",
+                "/api/generate",
+                json=payload,
+                timeout=settings.OLLAMA_UNLOAD_TIMEOUT
+            )
+            for backend, _ in results:
+                self.pool.mark_resident(backend, model, False)
+            
+            return {
+                "status": "unloaded",
+                "model": model
+            }
+        
         except Exception as e:
             logger.error(f"Failed to unload model {model}: {e}")
             raise Exception(f"Failed to unload model: {str(e)}")
@@ -194,7 +907,7 @@ class OllamaService:
         
         Args:
             size_bytes: Size in bytes
-            
+        
         Returns:
             Formatted size string
         """
@@ -205,4 +918,51 @@ class OllamaService:
         return f"{size_bytes:.1f}PB"
 
 # Create a singleton instance
-ollama_service = OllamaService()
\ No newline at end of file
+ollama_service = OllamaService()
+
+registry.register(Gauge(
+    "chatbot_circuit_state",
+    "Ollama circuit breaker state per backend (0 closed, 1 half-open, 2 open)",
+    ["backend"],
+    lambda: {(b.url,): STATE_VALUES[b.breaker.state] for b in ollama_service.pool.backends}
+))
+registry.register(CallbackCounter(
+    "chatbot_circuit_transitions_total",
+    "Ollama circuit breaker state transitions",
+    ["backend", "transition"],
+    lambda: {
+        (b.url, key): count
+        for b in ollama_service.pool.backends
+        for key, count in b.breaker.transitions.items()
+    }
+))
+registry.register(CallbackCounter(
+    "chatbot_circuit_rejections_total",
+    "Ollama calls refused while the circuit was open",
+    ["backend"],
+    lambda: {(b.url,): b.breaker.rejected for b in ollama_service.pool.backends}
+))
+registry.register(CallbackCounter(
+    "chatbot_coalesced_requests_total",
+    "Calls that joined an identical in-flight Ollama call instead of starting one",
+    ["kind"],
+    lambda: {(kind,): count for kind, count in ollama_service.flights.followers.items()}
+))
+registry.register(Gauge(
+    "chatbot_backend_outstanding",
+    "Requests currently in flight per Ollama backend",
+    ["backend"],
+    lambda: {(b.url,): b.outstanding for b in ollama_service.pool.backends}
+))
+registry.register(Gauge(
+    "chatbot_backend_healthy",
+    "Whether each Ollama backend passed its last health probe",
+    ["backend"],
+    lambda: {(b.url,): int(b.healthy) for b in ollama_service.pool.backends}
+))
+registry.register(CallbackCounter(
+    "chatbot_backend_requests_total",
+    "Generations routed to each Ollama backend",
+    ["backend"],
+    lambda: {(b.url,): b.requests for b in ollama_service.pool.backends}
+))
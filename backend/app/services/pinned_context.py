@@ -0,0 +1,78 @@
+from array import array
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+import time
+
+from app.core.config import settings
+from app.services.backend_pool import canonical_name
+
+logger = logging.getLogger(__name__)
+
+class PinnedContextStore:
+    """
+    Ollama context tokens per session, for session-pinned generation
+    
+    Tokens are held in compact int arrays (4 bytes each instead of a Python
+    int object per token) and bound to the model that produced them. The
+    least recently used sessions are dropped beyond `max_sessions`; a session
+    without stored context simply re-seeds from its message history.
+    """
+    
+    def __init__(
+        self,
+        max_sessions: int = settings.PINNED_CONTEXT_MAX_SESSIONS,
+        ttl: float = settings.SESSION_TTL
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._contexts: "OrderedDict[str, Tuple[str, array, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, session_id: str, model: str) -> Optional[List[int]]:
+        """
+        Get the stored context tokens of a session for a model
+        
+        Returns:
+            Token list, or None if missing, expired or from another model
+        """
+        entry = self._contexts.get(session_id)
+        if entry is None or entry[0] != canonical_name(model) or time.monotonic() - entry[2] > self.ttl:
+            self.misses += 1
+            return None
+        self._contexts.move_to_end(session_id)
+        self.hits += 1
+        return entry[1].tolist()
+    
+    def put(self, session_id: str, model: str, context: Optional[List[int]]) -> None:
+        """
+        Store the context tokens returned by a turn (None discards)
+        """
+        if not context:
+            self.discard(session_id)
+            return
+        self._contexts[session_id] = (canonical_name(model), array("I", context), time.monotonic())
+        self._contexts.move_to_end(session_id)
+        while len(self._contexts) > self.max_sessions:
+            self._contexts.popitem(last=False)
+    
+    def discard(self, session_id: str) -> None:
+        """
+        Forget a session's context (it re-seeds from history next turn)
+        """
+        self._contexts.pop(session_id, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store usage and hit counters
+        """
+        return {
+            "sessions": len(self._contexts),
+            "tokens": sum(len(tokens) for _, tokens, _ in self._contexts.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+# Create a singleton instance
+pinned_contexts = PinnedContextStore()
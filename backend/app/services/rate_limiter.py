@@ -0,0 +1,356 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Callable, Mapping, Tuple
+import hashlib
+import logging
+import math
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+from app.services.metrics import registry, CallbackCounter
+
+logger = logging.getLogger(__name__)
+
+# (request tokens left, generation tokens left, last update time)
+BucketState = Tuple[float, float, float]
+
+def api_key(headers: Mapping[str, str]) -> Optional[str]:
+    """
+    API key sent as X-API-Key or a Bearer token, if any
+    """
+    key = headers.get("x-api-key")
+    authorization = headers.get("authorization", "")
+    if not key and authorization.lower().startswith("bearer "):
+        key = authorization[7:].strip()
+    return key or None
+
+def client_key(headers: Mapping[str, str], host: Optional[str]) -> str:
+    """
+    Identify the client a request is charged to
+    
+    An API key (X-API-Key or a Bearer token) wins over the client address;
+    keys are hashed so they are never stored. X-Forwarded-For is only used
+    with RATE_LIMIT_TRUST_PROXY, since clients can set it freely.
+    
+    Args:
+        headers: Request headers
+        host: Peer address of the connection
+    
+    Returns:
+        "key:<hash>" or "ip:<address>"
+    """
+    key = api_key(headers)
+    if key:
+        return "key:" + hashlib.sha256(key.encode()).hexdigest()[:16]
+    if settings.RATE_LIMIT_TRUST_PROXY and headers.get("x-forwarded-for"):
+        host = headers["x-forwarded-for"].split(",")[0].strip()
+    return f"ip:{host or 'unknown'}"
+
+@dataclass
+class RateLimitDecision:
+    """
+    Outcome of a rate limit check, with the numbers for response headers
+    """
+    allowed: bool
+    reason: Optional[str]  # "requests" or "tokens" when rejected
+    retry_after: int
+    requests_limit: int
+    requests_remaining: int
+    requests_reset: int
+    tokens_limit: int
+    tokens_remaining: int
+    tokens_reset: int
+    
+    def headers(self) -> Dict[str, str]:
+        """
+        X-RateLimit-* headers (reset values are seconds until the bucket is full)
+        """
+        headers = {}
+        if self.requests_limit:
+            headers["X-RateLimit-Limit-Requests"] = str(self.requests_limit)
+            headers["X-RateLimit-Remaining-Requests"] = str(self.requests_remaining)
+            headers["X-RateLimit-Reset-Requests"] = str(self.requests_reset)
+        if self.tokens_limit:
+            headers["X-RateLimit-Limit-Tokens"] = str(self.tokens_limit)
+            headers["X-RateLimit-Remaining-Tokens"] = str(self.tokens_remaining)
+            headers["X-RateLimit-Reset-Tokens"] = str(self.tokens_reset)
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+class RateLimiter(ABC):
+    """
+    Base class for per-client token bucket rate limiting
+    
+    Each client has two buckets: requests (refilled at requests_per_minute)
+    and generated tokens (refilled at tokens_per_hour). A request takes one
+    request token up front; its eval_count is charged to the token bucket once
+    the reply is done, which may drive it negative. New requests are refused
+    while either bucket is empty. A limit of 0 disables that bucket.
+    
+    Subclasses store the buckets and evict clients idle for idle_ttl seconds
+    (by then their buckets are full again, so nothing is lost).
+    """
+    
+    def __init__(
+        self,
+        requests_per_minute: int = settings.RATE_LIMIT_REQUESTS_PER_MINUTE,
+        tokens_per_hour: int = settings.RATE_LIMIT_TOKENS_PER_HOUR,
+        idle_ttl: float = settings.RATE_LIMIT_IDLE_TTL,
+        max_keys: int = settings.RATE_LIMIT_MAX_KEYS,
+        enabled: bool = settings.RATE_LIMIT_ENABLED
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_hour = tokens_per_hour
+        self.idle_ttl = idle_ttl
+        self.max_keys = max_keys
+        self.enabled = enabled
+        self.rejected: Dict[str, int] = {"requests": 0, "tokens": 0}
+        self.evictions = 0
+    
+    def check(self, key: str, cost: int = 1) -> RateLimitDecision:
+        """
+        Admit a request for a client, taking `cost` request tokens if allowed
+        
+        Args:
+            key: Client key (see client_key)
+            cost: Request tokens to take
+        
+        Returns:
+            RateLimitDecision; callers answer 429 when not allowed
+        """
+        if not self.enabled:
+            return self._decision(True, None, 0, None)
+        
+        outcome = {}
+        
+        def take(requests: float, tokens: float) -> Tuple[float, float]:
+            if self.requests_per_minute and requests < cost:
+                outcome["reason"] = "requests"
+                outcome["wait"] = (cost - requests) / self._request_rate
+            elif self.tokens_per_hour and tokens < 1:
+                outcome["reason"] = "tokens"
+                outcome["wait"] = (1 - tokens) / self._token_rate
+            else:
+                requests -= cost
+            return requests, tokens
+        
+        state = self._update(key, take)
+        reason = outcome.get("reason")
+        if reason is not None:
+            self.rejected[reason] += 1
+            logger.info(f"Rate limited {key} ({reason})")
+        return self._decision(reason is None, reason, outcome.get("wait", 0), state)
+    
+    def charge(self, key: str, tokens: Optional[int]) -> None:
+        """
+        Charge generated tokens (Ollama's eval_count) to a client
+        """
+        if not self.enabled or not self.tokens_per_hour or not tokens:
+            return
+        self._update(key, lambda requests, left: (requests, left - tokens))
+    
+    @property
+    def _request_rate(self) -> float:
+        return self.requests_per_minute / 60.0
+    
+    @property
+    def _token_rate(self) -> float:
+        return self.tokens_per_hour / 3600.0
+    
+    def _refill(self, state: Optional[BucketState], now: float) -> Tuple[float, float]:
+        if state is None:
+            return float(self.requests_per_minute), float(self.tokens_per_hour)
+        requests, tokens, updated = state
+        elapsed = max(0.0, now - updated)
+        return (
+            min(self.requests_per_minute, requests + elapsed * self._request_rate),
+            min(self.tokens_per_hour, tokens + elapsed * self._token_rate)
+        )
+    
+    def _decision(
+        self,
+        allowed: bool,
+        reason: Optional[str],
+        wait: float,
+        state: Optional[BucketState]
+    ) -> RateLimitDecision:
+        requests, tokens = (state[0], state[1]) if state else (self.requests_per_minute, self.tokens_per_hour)
+        
+        def reset(left: float, limit: int, rate: float) -> int:
+            return math.ceil((limit - left) / rate) if limit else 0
+        
+        return RateLimitDecision(
+            allowed=allowed,
+            reason=reason,
+            retry_after=max(1, math.ceil(wait)) if not allowed else 0,
+            requests_limit=self.requests_per_minute,
+            requests_remaining=max(0, int(requests)),
+            requests_reset=reset(requests, self.requests_per_minute, self._request_rate or 1),
+            tokens_limit=self.tokens_per_hour,
+            tokens_remaining=max(0, int(tokens)),
+            tokens_reset=reset(tokens, self.tokens_per_hour, self._token_rate or 1)
+        )
+    
+    @abstractmethod
+    def _update(
+        self,
+        key: str,
+        fn: Callable[[float, float], Tuple[float, float]]
+    ) -> BucketState:
+        """
+        Atomically refill a client's buckets, apply fn and store the result
+        
+        Returns:
+            The stored (requests, tokens, updated) state
+        """
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """
+        Limiter usage for monitoring
+        """
+
+class InMemoryRateLimiter(RateLimiter):
+    """
+    Per-process rate limiter; buckets live in an LRU-ordered dict
+    """
+    
+    def __init__(self, clock: Callable[[], float] = time.monotonic, **kwargs):
+        super().__init__(**kwargs)
+        self._clock = clock
+        self._buckets: "OrderedDict[str, BucketState]" = OrderedDict()
+    
+    def _update(
+        self,
+        key: str,
+        fn: Callable[[float, float], Tuple[float, float]]
+    ) -> BucketState:
+        now = self._clock()
+        requests, tokens = fn(*self._refill(self._buckets.get(key), now))
+        self._buckets[key] = state = (requests, tokens, now)
+        self._buckets.move_to_end(key)
+        self._evict(now)
+        return state
+    
+    def _evict(self, now: float) -> None:
+        # Oldest entries come first, so stop at the first one still in use
+        while self._buckets:
+            key, (_, _, updated) = next(iter(self._buckets.items()))
+            if now - updated <= self.idle_ttl and len(self._buckets) <= self.max_keys:
+                break
+            del self._buckets[key]
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "enabled": self.enabled,
+            "clients": len(self._buckets),
+            "rejected": dict(self.rejected),
+            "evictions": self.evictions
+        }
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    Rate limiter backed by a local SQLite file
+    
+    Several worker processes pointing at the same file enforce one shared
+    quota per client; each update is a single IMMEDIATE transaction.
+    """
+    
+    # Updates between sweeps of idle clients
+    SWEEP_EVERY = 256
+    
+    def __init__(
+        self,
+        path: str = settings.RATE_LIMIT_SQLITE_PATH,
+        clock: Callable[[], float] = time.time,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.path = path
+        # Wall-clock time by default, so every process agrees on refill
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                client TEXT PRIMARY KEY,
+                requests REAL NOT NULL,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_rate_limits_updated ON rate_limits (updated);
+        """)
+    
+    def _update(
+        self,
+        key: str,
+        fn: Callable[[float, float], Tuple[float, float]]
+    ) -> BucketState:
+        now = self._clock()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT requests, tokens, updated FROM rate_limits WHERE client = ?", (key,)
+            ).fetchone()
+            requests, tokens = fn(*self._refill(row, now))
+            self._conn.execute(
+                "INSERT INTO rate_limits (client, requests, tokens, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(client) DO UPDATE SET requests = excluded.requests, "
+                "tokens = excluded.tokens, updated = excluded.updated",
+                (key, requests, tokens, now)
+            )
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                self._evict(now)
+        return requests, tokens, now
+    
+    def _evict(self, now: float) -> None:
+        self.evictions += self._conn.execute(
+            "DELETE FROM rate_limits WHERE updated < ?", (now - self.idle_ttl,)
+        ).rowcount
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()
+        if count > self.max_keys:
+            self.evictions += self._conn.execute(
+                "DELETE FROM rate_limits WHERE client IN "
+                "(SELECT client FROM rate_limits ORDER BY updated LIMIT ?)",
+                (count - self.max_keys,)
+            ).rowcount
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (clients,) = self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()
+        return {
+            "backend": "sqlite",
+            "enabled": self.enabled,
+            "clients": clients,
+            "rejected": dict(self.rejected),
+            "evictions": self.evictions
+        }
+
+def create_rate_limiter() -> RateLimiter:
+    """
+    Build the rate limiter selected by settings.RATE_LIMIT_BACKEND
+    """
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        logger.info(f"Using SQLite rate limit store at {settings.RATE_LIMIT_SQLITE_PATH}")
+        return SQLiteRateLimiter()
+    return InMemoryRateLimiter()
+
+# Create a singleton instance
+rate_limiter = create_rate_limiter()
+
+registry.register(CallbackCounter(
+    "chatbot_rate_limited_total",
+    "Requests refused by the per-client rate limiter",
+    ["reason"],
+    lambda: {(reason,): count for reason, count in rate_limiter.rejected.items()}
+))
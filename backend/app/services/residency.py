@@ -0,0 +1,287 @@
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.core.startup import startup_timeline
+from app.services.ollama_service import OllamaService, ollama_service
+from app.services.backend_pool import canonical_name
+from app.services.scheduler import RequestScheduler, request_scheduler
+
+logger = logging.getLogger(__name__)
+
+class _ModelState:
+    __slots__ = ("name", "resident", "size", "size_vram", "expires_at", "last_used", "loaded_at")
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.resident = False
+        self.size = 0
+        self.size_vram = 0
+        self.expires_at: Optional[str] = None
+        self.last_used: Optional[float] = None  # wall-clock timestamp
+        self.loaded_at: Optional[float] = None
+
+class ModelResidencyManager:
+    """
+    Keeps frequently used models loaded in Ollama
+    
+    Warms up the configured models at startup, tracks what is resident via
+    /api/ps and when each model was last used, and unloads least recently
+    used idle models when their total size exceeds MODEL_MEMORY_BUDGET.
+    
+    The server is ready once every warm-up model has been loaded. Failed
+    warm-ups (typically Ollama still booting after a power cycle) are
+    retried every WARMUP_RETRY_INTERVAL seconds until they succeed.
+    """
+    
+    def __init__(
+        self,
+        service: OllamaService,
+        scheduler: RequestScheduler,
+        warmup_models: Optional[List[str]] = None,
+        memory_budget: int = settings.MODEL_MEMORY_BUDGET,
+        refresh_interval: float = settings.RESIDENCY_REFRESH_INTERVAL,
+        retry_interval: float = settings.WARMUP_RETRY_INTERVAL
+    ):
+        self.service = service
+        self.scheduler = scheduler
+        self.warmup_models = settings.WARMUP_MODELS if warmup_models is None else warmup_models
+        self.memory_budget = memory_budget
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.evictions = 0
+        self.warmed_up = not self.warmup_models
+        self.warmup_errors: Dict[str, str] = {}
+        self._models: Dict[str, _ModelState] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Budget check started by mark_used (kept so it is not collected mid-run)
+        self._budget_task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+    
+    def _state(self, model: str) -> _ModelState:
+        name = canonical_name(model)
+        state = self._models.get(name)
+        if state is None:
+            state = self._models[name] = _ModelState(name)
+        return state
+    
+    async def start(self) -> None:
+        """
+        Start warm-up and periodic residency refresh (called on application startup)
+        """
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """
+        Cancel the background task (called on application shutdown)
+        """
+        for task in (self._task, self._budget_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._budget_task = None
+    
+    async def warm_up(self, models: Optional[List[str]] = None) -> None:
+        """
+        Load models into memory, one at a time
+        
+        Args:
+            models: Models to load (default: all warm-up models)
+        """
+        for model in self.warmup_models if models is None else models:
+            start = time.monotonic()
+            try:
+                await self.service.load_model(model, keep_alive=self.service.keep_alive)
+                self.mark_loaded(model)
+                self.warmup_errors.pop(model, None)
+                logger.info(f"Warmed up model {model} in {time.monotonic() - start:.1f}s")
+            except Exception as e:
+                self.warmup_errors[model] = str(e)
+                logger.error(f"Failed to warm up model {model}: {e}")
+        self.warmed_up = True
+    
+    def pending_warmup(self) -> List[str]:
+        """
+        Warm-up models that have not been loaded since the server started
+        
+        A model counts as warm once it was loaded by the warm-up, by a chat
+        or found resident in /api/ps; a later eviction does not undo that.
+        """
+        pending = []
+        for model in self.warmup_models:
+            state = self._models.get(canonical_name(model))
+            if state is None or (state.loaded_at is None and state.last_used is None):
+                pending.append(model)
+        return pending
+    
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the warm-up has run and every warm-up model is loaded
+        """
+        return self.warmed_up and not self.pending_warmup()
+    
+    def readiness(self) -> Dict[str, str]:
+        """
+        Warm-up state per model: "warm", "loading" or "failed"
+        """
+        pending = self.pending_warmup()
+        return {
+            model: "warm" if model not in pending else "failed" if model in self.warmup_errors else "loading"
+            for model in self.warmup_models
+        }
+    
+    def mark_used(self, model: str) -> None:
+        """
+        Record that a request just ran on the model (it is resident now)
+        
+        A model that was not known to be resident triggers a budget check
+        in the background, since loading it may have pushed memory over.
+        Only one check runs at a time; a model loaded while one is running
+        is caught by the next periodic refresh.
+        """
+        state = self._state(model)
+        was_resident = state.resident
+        state.resident = True
+        state.last_used = time.time()
+        if not was_resident and self.memory_budget and self._lock is not None:
+            if self._budget_task is None or self._budget_task.done():
+                self._budget_task = asyncio.create_task(self.enforce_budget())
+                self._budget_task.add_done_callback(self._budget_check_done)
+    
+    @staticmethod
+    def _budget_check_done(task: asyncio.Task) -> None:
+        """
+        Log a failed background budget check instead of leaving it unretrieved
+        """
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Memory budget check failed: {task.exception()}")
+    
+    def mark_loaded(self, model: str) -> None:
+        """
+        Record an explicit load
+        """
+        state = self._state(model)
+        state.resident = True
+        state.loaded_at = time.time()
+        if state.last_used is None:
+            state.last_used = state.loaded_at
+    
+    def mark_unloaded(self, model: str) -> None:
+        """
+        Record an explicit unload
+        """
+        self._state(model).resident = False
+    
+    async def refresh(self) -> None:
+        """
+        Sync the resident set with Ollama's /api/ps
+        """
+        running = {canonical_name(m["name"]): m for m in await self.service.list_running()}
+        for name, info in running.items():
+            state = self._state(name)
+            if not state.resident:
+                state.loaded_at = time.time()
+            state.resident = True
+            state.size = info.get("size") or 0
+            state.size_vram = info.get("size_vram") or 0
+            state.expires_at = info.get("expires_at")
+        for name, state in self._models.items():
+            if name not in running:
+                state.resident = False
+    
+    async def enforce_budget(self) -> List[str]:
+        """
+        Unload least recently used idle models until the budget is met
+        
+        Returns:
+            Names of the models that were unloaded
+        """
+        if not self.memory_budget or self._lock is None:
+            return []
+        evicted = []
+        async with self._lock:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Residency refresh failed: {e}")
+                return []
+            
+            resident = sorted(
+                (s for s in self._models.values() if s.resident),
+                key=lambda s: s.last_used or 0.0
+            )
+            total = sum(s.size for s in resident)
+            for state in resident:
+                if total <= self.memory_budget:
+                    break
+                if self.scheduler.is_busy(state.name):
+                    continue
+                try:
+                    await self.service.unload_model(state.name)
+                except Exception as e:
+                    logger.error(f"Failed to evict model {state.name}: {e}")
+                    continue
+                state.resident = False
+                total -= state.size
+                self.evictions += 1
+                evicted.append(state.name)
+                logger.info(f"Evicted model {state.name} to stay within memory budget")
+        return evicted
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Resident models with sizes and last-used times
+        """
+        def iso(ts: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+        
+        models = [
+            {
+                "name": s.name,
+                "size": s.size,
+                "size_vram": s.size_vram,
+                "expires_at": s.expires_at,
+                "last_used": iso(s.last_used),
+                "loaded_at": iso(s.loaded_at)
+            }
+            for s in sorted(self._models.values(), key=lambda s: s.last_used or 0.0, reverse=True)
+            if s.resident
+        ]
+        return {
+            "models": models,
+            "count": len(models),
+            "total_size": sum(m["size"] for m in models),
+            "memory_budget": self.memory_budget,
+            "evictions": self.evictions,
+            "warmed_up": self.warmed_up
+        }
+    
+    async def _run(self) -> None:
+        await self.warm_up()
+        while True:
+            pending = self.pending_warmup()
+            if pending:
+                await asyncio.sleep(self.retry_interval)
+                await self.warm_up(pending)
+                continue
+            startup_timeline.mark("models_warm")
+            try:
+                if self.memory_budget:
+                    await self.enforce_budget()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"Residency refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+# Create a singleton instance
+residency_manager = ModelResidencyManager(ollama_service, request_scheduler)
@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+import hashlib
+import json
+import logging
+import time
+
+from app.core.config import settings
+from app.services.metrics import registry, CallbackCounter
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry bookkeeping overhead (key, dict, OrderedDict node) in bytes
+ENTRY_OVERHEAD_BYTES = 300
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize message text for cache keys (case and whitespace insensitive)
+    """
+    return " ".join(text.split()).casefold()
+
+class ResponseCache:
+    """
+    LRU + TTL cache of chat replies with a byte-size budget
+    
+    Keys are derived from the model, the normalized messages and the
+    generation options, so "What can you do?" and "what can  you do?"
+    share one entry. With deterministic_only, sampled replies (temperature
+    above 0 and no fixed seed) are not cached, since replaying one would
+    pass a random draw off as the answer.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = settings.RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = settings.RESPONSE_CACHE_MAX_BYTES,
+        ttl: float = settings.RESPONSE_CACHE_TTL,
+        enabled: bool = settings.RESPONSE_CACHE_ENABLED,
+        deterministic_only: bool = settings.RESPONSE_CACHE_DETERMINISTIC_ONLY
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self.deterministic_only = deterministic_only
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def is_deterministic(options: Dict[str, Any]) -> bool:
+        """
+        Whether resolved generation options always produce the same reply
+        
+        Greedy decoding (temperature 0) or a fixed seed makes Ollama's output
+        repeatable for the same prompt.
+        """
+        return options.get("temperature") == 0 or options.get("seed") is not None
+    
+    def replayable(self, options: Dict[str, Any]) -> bool:
+        """
+        Whether a reply generated with these resolved options may be replayed
+        
+        Also applied by the semantic cache, which has its own enabled flag.
+        """
+        return not self.deterministic_only or self.is_deterministic(options)
+    
+    def cacheable(self, options: Dict[str, Any]) -> bool:
+        """
+        Whether a chat with these resolved options may be cached
+        """
+        return self.enabled and self.replayable(options)
+    
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any]
+    ) -> str:
+        """
+        Build a cache key for a chat request
+        
+        Args:
+            model: Resolved model name
+            messages: Full message list sent to Ollama
+            options: Resolved generation options
+        
+        Returns:
+            Hex digest identifying the request
+        """
+        canonical = json.dumps(
+            [
+                model,
+                [[m["role"], normalize_text(m["content"])] for m in messages],
+                options
+            ],
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached reply
+        
+        Returns:
+            The stored result dict, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, size, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a reply, evicting least recently used entries to stay in budget
+        
+        Args:
+            key: Key from make_key()
+            value: Result dict; must contain "response"
+        """
+        if not self.enabled:
+            return
+        size = len(value["response"].encode("utf-8")) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic(), size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        """
+        Drop all entries (counters are kept)
+        """
+        self._entries.clear()
+        self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache usage and hit/miss counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+    
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+# Create a singleton instance
+response_cache = ResponseCache()
+
+registry.register(CallbackCounter(
+    "chatbot_response_cache_lookups_total",
+    "Response cache lookups by result (hit, miss)",
+    ["result"],
+    lambda: {("hit",): response_cache.hits, ("miss",): response_cache.misses}
+))
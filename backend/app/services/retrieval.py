@@ -0,0 +1,511 @@
+"""
+Retrieval over a local document index, used to ground chat replies in our
+own docs (retrieval-augmented generation).
+
+The index is a directory written by ingest_docs.py:
+
+* vectors.npy - one unit embedding per chunk, float16, opened memory-mapped
+  so only the pages a search touches are read into RAM
+* index.db - SQLite with the chunk texts, corpus statistics and a BM25
+  inverted index (term -> chunk, term frequency)
+
+A query is scored by a weighted sum of embedding similarity and normalized
+BM25, so exact keywords (error codes, option names) are found even when the
+embedding misses them. NumPy is optional; without it retrieval is disabled.
+"""
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable, Iterable, Iterator
+import asyncio
+import logging
+import math
+import os
+import re
+import shutil
+import sqlite3
+import time
+
+from app.core.config import settings
+from app.core.lazy_import import optional_module
+from app.services.context_window import count_tokens
+from app.services.metrics import registry, Histogram
+from app.services.ollama_service import ollama_service
+
+logger = logging.getLogger(__name__)
+
+# numpy is only imported when an index is built or searched
+np = optional_module("numpy")
+
+Embedder = Callable[[str], Awaitable[List[float]]]
+
+DOCUMENT_EXTENSIONS = (".md", ".markdown", ".txt", ".rst")
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Rows multiplied per step of the dense scan, bounding the float32 copy
+SCAN_BLOCK_ROWS = 8192
+
+# Keyword candidates scored by embedding similarity, per chunk returned
+CANDIDATES_PER_RESULT = 4
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in is it of on or that the this to what when where which "
+    "who why with you your".split()
+)
+
+retrieval_latency = registry.register(Histogram(
+    "chatbot_retrieval_seconds",
+    "Document retrieval time per chat, query embedding included",
+    (),
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+))
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens without stopwords, for BM25
+    """
+    return [t for t in re.findall(r"[a-z0-9_]+", text.lower()) if t not in STOPWORDS]
+
+def chunk_text(text: str, chunk_words: int, overlap: int) -> List[str]:
+    """
+    Split a document into chunks of about chunk_words words
+    
+    Chunks are cut at paragraph boundaries when possible; a paragraph longer
+    than a chunk is split by words. Consecutive chunks share `overlap` words
+    so a passage cut in two is still found whole in one of them.
+    """
+    paragraphs = [" ".join(p.split()) for p in re.split(r"\n\s*\n", text)]
+    words: List[str] = []
+    chunks: List[str] = []
+    for paragraph in filter(None, paragraphs):
+        paragraph_words = paragraph.split()
+        if words and len(words) + len(paragraph_words) > chunk_words:
+            chunks.append(" ".join(words))
+            words = words[-overlap:] if overlap else []
+        words.extend(paragraph_words)
+        while len(words) > chunk_words:
+            chunks.append(" ".join(words[:chunk_words]))
+            words = words[chunk_words - overlap:] if overlap else words[chunk_words:]
+    if words and (not chunks or len(words) > overlap):
+        chunks.append(" ".join(words))
+    return chunks
+
+def iter_documents(paths: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (source path, text) for the text/markdown files under the given paths
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(DOCUMENT_EXTENSIONS):
+                        full = os.path.join(root, name)
+                        yield full, _read(full)
+        else:
+            yield path, _read(path)
+
+def _read(path: str) -> str:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+@dataclass
+class RetrievedChunk:
+    """
+    A chunk returned by a search
+    """
+    source: str
+    position: int  # chunk number within its source
+    text: str
+    score: float
+
+async def build_index(
+    paths: Iterable[str],
+    out_dir: str,
+    embed: Optional[Embedder],
+    chunk_words: int = settings.RAG_CHUNK_WORDS,
+    overlap: int = settings.RAG_CHUNK_OVERLAP,
+    embed_model: str = settings.RAG_EMBED_MODEL,
+    concurrency: int = 4
+) -> Dict[str, Any]:
+    """
+    Chunk, embed and index documents into out_dir
+    
+    The index is written next to out_dir and renamed into place when
+    complete, so a running server never sees a half-written index. The old
+    index is renamed aside first and deleted only once the new one is in
+    place; if the final rename fails it is put back. Chunk texts go straight
+    to SQLite and embeddings straight to the memory-mapped matrix, so memory
+    use does not grow with the corpus.
+    
+    Args:
+        paths: Files and directories to index
+        out_dir: Index directory
+        embed: Embedding function, or None for a keyword-only (BM25) index
+        chunk_words: Words per chunk
+        overlap: Words shared by consecutive chunks
+        embed_model: Recorded in the index; queries must use the same model
+        concurrency: Embedding requests in flight
+    
+    Returns:
+        Dict with documents, chunks, terms and dim
+    """
+    tmp_dir = out_dir.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    conn = sqlite3.connect(os.path.join(tmp_dir, "index.db"))
+    conn.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE chunks (
+            id INTEGER PRIMARY KEY,
+            source TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            text TEXT NOT NULL
+        );
+        CREATE TABLE postings (
+            term TEXT NOT NULL,
+            chunk_id INTEGER NOT NULL,
+            tf INTEGER NOT NULL,
+            PRIMARY KEY (term, chunk_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;
+    """)
+    
+    documents = chunk_count = total_length = 0
+    document_frequency: Dict[str, int] = {}
+    with conn:
+        for source, text in iter_documents(paths):
+            documents += 1
+            for position, chunk in enumerate(chunk_text(text, chunk_words, overlap)):
+                tokens = tokenize(chunk)
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                conn.execute(
+                    "INSERT INTO chunks (id, source, position, length, text) VALUES (?, ?, ?, ?, ?)",
+                    (chunk_count, source, position, len(tokens), chunk)
+                )
+                conn.executemany(
+                    "INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)",
+                    [(term, chunk_count, tf) for term, tf in counts.items()]
+                )
+                for term in counts:
+                    document_frequency[term] = document_frequency.get(term, 0) + 1
+                chunk_count += 1
+                total_length += len(tokens)
+        conn.executemany("INSERT INTO terms (term, df) VALUES (?, ?)", document_frequency.items())
+    
+    dim = 0
+    if embed is not None and chunk_count:
+        dim = await _embed_chunks(conn, tmp_dir, embed, chunk_count, concurrency)
+    
+    with conn:
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+            ("chunks", str(chunk_count)),
+            ("avg_length", str(total_length / chunk_count if chunk_count else 0.0)),
+            ("dim", str(dim)),
+            ("embed_model", embed_model if dim else ""),
+            ("created_at", str(time.time()))
+        ])
+    conn.close()
+    
+    old_dir = out_dir.rstrip("/") + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.isdir(out_dir):
+        os.replace(out_dir, old_dir)
+    try:
+        os.replace(tmp_dir, out_dir)
+    except OSError:
+        if os.path.isdir(old_dir):
+            os.replace(old_dir, out_dir)
+        raise
+    shutil.rmtree(old_dir, ignore_errors=True)
+    logger.info(f"Indexed {chunk_count} chunks from {documents} documents into {out_dir}")
+    return {"documents": documents, "chunks": chunk_count, "terms": len(document_frequency), "dim": dim}
+
+async def _embed_chunks(
+    conn: sqlite3.Connection,
+    out_dir: str,
+    embed: Embedder,
+    chunk_count: int,
+    concurrency: int
+) -> int:
+    """
+    Embed every chunk into a float16 memory-mapped matrix of unit vectors
+    
+    Returns:
+        Embedding dimension
+    """
+    vectors = None
+    batch: List[Tuple[int, str]] = []
+    
+    async def flush() -> None:
+        nonlocal vectors
+        embeddings = await asyncio.gather(*(embed(text) for _, text in batch))
+        for (chunk_id, _), embedding in zip(batch, embeddings):
+            vector = np.asarray(embedding, dtype=np.float32)
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    os.path.join(out_dir, "vectors.npy"), mode="w+",
+                    dtype=np.float16, shape=(chunk_count, vector.shape[0])
+                )
+            norm = float(np.linalg.norm(vector))
+            vectors[chunk_id] = vector / norm if norm else vector
+        batch.clear()
+    
+    for chunk_id, text in conn.execute("SELECT id, text FROM chunks ORDER BY id"):
+        batch.append((chunk_id, text))
+        if len(batch) >= concurrency:
+            await flush()
+    if batch:
+        await flush()
+    vectors.flush()
+    return int(vectors.shape[1])
+
+class DocumentIndex:
+    """
+    Read-only view of an index directory
+    
+    Opening reads only the corpus statistics; vectors are memory mapped and
+    chunk texts and postings are read from SQLite per query.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(
+            f"file:{os.path.join(path, 'index.db')}?mode=ro", uri=True, check_same_thread=False
+        )
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        self.chunks = int(meta["chunks"])
+        self.avg_length = float(meta["avg_length"]) or 1.0
+        self.dim = int(meta["dim"])
+        self.embed_model = meta["embed_model"]
+        self.vectors = (
+            np.load(os.path.join(path, "vectors.npy"), mmap_mode="r") if self.dim else None
+        )
+    
+    def close(self) -> None:
+        self._conn.close()
+    
+    def dense_scores(self, query_vector, chunk_ids: List[int]) -> Dict[int, float]:
+        """
+        Cosine similarity of the given chunks to a unit query vector
+        
+        The ids are read in sorted order, so only their pages of the memory
+        map are touched.
+        """
+        ids = sorted(chunk_ids)
+        scores = self.vectors[ids].astype(np.float32) @ query_vector
+        return dict(zip(ids, scores.tolist()))
+    
+    def dense_nearest(self, query_vector, n: int) -> Dict[int, float]:
+        """
+        The n chunks most similar to a unit query vector, scanning every chunk in blocks
+        """
+        scores = np.empty(self.chunks, dtype=np.float32)
+        for start in range(0, self.chunks, SCAN_BLOCK_ROWS):
+            block = self.vectors[start:start + SCAN_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query_vector
+        top = np.argpartition(-scores, n - 1)[:n]
+        return {int(i): float(scores[i]) for i in top}
+    
+    def bm25_scores(self, query: str) -> Dict[int, float]:
+        """
+        BM25 score of every chunk containing at least one query term
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            row = self._conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+            if row is None:
+                continue
+            df = row[0]
+            idf = math.log(1 + (self.chunks - df + 0.5) / (df + 0.5))
+            for chunk_id, tf, length in self._conn.execute(
+                "SELECT p.chunk_id, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk_id "
+                "WHERE p.term = ?",
+                (term,)
+            ):
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        return scores
+    
+    def search(
+        self,
+        query: str,
+        query_vector,
+        k: int,
+        dense_weight: float,
+        min_score: float
+    ) -> List[RetrievedChunk]:
+        """
+        Hybrid search: dense_weight * cosine + (1 - dense_weight) * BM25 / best BM25
+        
+        Only the best keyword matches are scored by embedding similarity, so
+        a search reads just their rows of the vector matrix. The whole matrix
+        is scanned only when no chunk matches a query term.
+        
+        Args:
+            query: Query text (for BM25)
+            query_vector: Unit query embedding, or None for keyword-only search
+            k: Chunks to return
+            dense_weight: Weight of embedding similarity in [0, 1]
+            min_score: Chunks scoring below this are left out
+        
+        Returns:
+            Up to k chunks, best first
+        """
+        if not self.chunks:
+            return []
+        keyword = self.bm25_scores(query)
+        best_keyword = max(keyword.values(), default=0.0)
+        candidates = sorted(keyword, key=keyword.get, reverse=True)[:k * CANDIDATES_PER_RESULT]
+        
+        dense = None
+        if query_vector is not None and self.vectors is not None and len(query_vector) == self.dim:
+            if candidates:
+                dense = self.dense_scores(query_vector, candidates)
+            else:
+                dense = self.dense_nearest(query_vector, min(k * CANDIDATES_PER_RESULT, self.chunks))
+                candidates = list(dense)
+        else:
+            dense_weight = 0.0
+        
+        scored = []
+        for chunk_id in candidates:
+            score = (1 - dense_weight) * (keyword.get(chunk_id, 0.0) / best_keyword if best_keyword else 0.0)
+            if dense is not None:
+                score += dense_weight * max(0.0, dense[chunk_id])
+            if score >= min_score:
+                scored.append((score, chunk_id))
+        scored.sort(reverse=True)
+        
+        results = []
+        for score, chunk_id in scored[:k]:
+            source, position, text = self._conn.execute(
+                "SELECT source, position, text FROM chunks WHERE id = ?", (chunk_id,)
+            ).fetchone()
+            results.append(RetrievedChunk(source, position, text, round(score, 4)))
+        return results
+
+class Retriever:
+    """
+    Finds the chunks of the document index relevant to a chat message
+    
+    The index is opened on first use and reopened when ingest_docs.py
+    replaces it. If the query cannot be embedded (e.g. the embedding model
+    is missing) the search falls back to BM25 alone.
+    """
+    
+    def __init__(
+        self,
+        path: str = settings.RAG_INDEX_PATH,
+        embedder: Optional[Embedder] = None,
+        top_k: int = settings.RAG_TOP_K,
+        dense_weight: float = settings.RAG_HYBRID_WEIGHT,
+        min_score: float = settings.RAG_MIN_SCORE,
+        max_context_tokens: int = settings.RAG_MAX_CONTEXT_TOKENS
+    ):
+        self.path = path
+        self.embedder = embedder
+        self.top_k = top_k
+        self.dense_weight = dense_weight
+        self.min_score = min_score
+        self.max_context_tokens = max_context_tokens
+        self._index: Optional[DocumentIndex] = None
+        self._index_version: Optional[Tuple[int, int]] = None
+    
+    @property
+    def available(self) -> bool:
+        return np is not None and os.path.exists(os.path.join(self.path, "index.db"))
+    
+    def _open(self) -> Optional[DocumentIndex]:
+        try:
+            stat = os.stat(os.path.join(self.path, "index.db"))
+        except OSError:
+            return None
+        # ingest_docs.py swaps in a new directory, so the file changes inode
+        version = (stat.st_ino, stat.st_mtime_ns)
+        if self._index is None or version != self._index_version:
+            if self._index is not None:
+                self._index.close()
+            self._index = DocumentIndex(self.path)
+            self._index_version = version
+            logger.info(f"Opened document index {self.path} ({self._index.chunks} chunks)")
+            if self._index.embed_model and self._index.embed_model != settings.RAG_EMBED_MODEL:
+                logger.warning(
+                    f"Document index was embedded with {self._index.embed_model}, "
+                    f"but RAG_EMBED_MODEL is {settings.RAG_EMBED_MODEL}; re-run ingest_docs.py"
+                )
+        return self._index
+    
+    async def retrieve(self, query: str, k: Optional[int] = None) -> Tuple[List[RetrievedChunk], float]:
+        """
+        Find the chunks most relevant to a query
+        
+        Args:
+            query: User message
+            k: Chunks to return (default: top_k)
+        
+        Returns:
+            (chunks, seconds taken)
+        """
+        start = time.perf_counter()
+        index = self._open() if np is not None else None
+        if index is None:
+            return [], 0.0
+        
+        query_vector = None
+        if index.dim and self.embedder is not None:
+            try:
+                vector = np.asarray(await self.embedder(query), dtype=np.float32)
+                norm = float(np.linalg.norm(vector))
+                query_vector = vector / norm if norm else None
+            except Exception as e:
+                logger.warning(f"Query embedding failed, using keyword search only: {e}")
+        
+        # SQLite and the memory-mapped vectors block, so search off the event loop
+        chunks = await asyncio.to_thread(
+            index.search, query, query_vector, k or self.top_k, self.dense_weight, self.min_score
+        )
+        elapsed = time.perf_counter() - start
+        retrieval_latency.observe(elapsed)
+        return chunks, elapsed
+    
+    def fit_budget(self, chunks: List[RetrievedChunk]) -> List[RetrievedChunk]:
+        """
+        The best chunks that fit in max_context_tokens (at least one)
+        """
+        kept: List[RetrievedChunk] = []
+        used = 0
+        for chunk in chunks:
+            cost = count_tokens(chunk.text)
+            if kept and used + cost > self.max_context_tokens:
+                break
+            kept.append(chunk)
+            used += cost
+        return kept
+    
+    @staticmethod
+    def context_message(chunks: List[RetrievedChunk]) -> Dict[str, str]:
+        """
+        System message quoting the chunks, numbered best first
+        """
+        excerpts = "\n\n".join(
+            f"[{number}] ({os.path.basename(chunk.source)}) {chunk.text}"
+            for number, chunk in enumerate(chunks, start=1)
+        )
+        return {
+            "role": "system",
+            "content": (
+                "Answer using the following excerpts from our documentation when they are "
+                "relevant. If they do not cover the question, say so.\n\n" + excerpts
+            )
+        }
+
+def _ollama_embedder(text: str) -> Awaitable[List[float]]:
+    return ollama_service.embed(text, settings.RAG_EMBED_MODEL)
+
+# Create a singleton instance
+retriever = Retriever(embedder=_ollama_embedder)
@@ -0,0 +1,464 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Callable, Awaitable, AsyncIterator, Deque, TypeVar
+import asyncio
+import logging
+import math
+import time
+
+from app.core.config import settings
+from app.services.backend_pool import canonical_name
+from app.services.metrics import registry, Gauge, CallbackCounter
+
+logger = logging.getLogger(__name__)
+
+DisconnectCheck = Callable[[], Awaitable[bool]]
+
+T = TypeVar("T")
+
+# Priority classes, highest first
+PRIORITIES = ("interactive", "standard", "bulk")
+
+class QueueFullError(Exception):
+    """
+    Raised when a model's wait queue is full
+    """
+    
+    def __init__(self, model: str, retry_after: int):
+        super().__init__(f"Too many pending requests for model '{model}'")
+        self.model = model
+        self.retry_after = retry_after
+
+class ClientDisconnectedError(Exception):
+    """
+    Raised when a request's client went away while queued or generating
+    """
+
+async def cancel_on_disconnect(
+    awaitable: Awaitable[T],
+    is_disconnected: DisconnectCheck,
+    poll_interval: Optional[float] = None
+) -> T:
+    """
+    Await a generation, cancelling it as soon as its client goes away
+    
+    Cancelling an httpx request closes its connection, which makes Ollama
+    stop generating instead of finishing a reply nobody will read.
+    
+    Args:
+        awaitable: The upstream call
+        is_disconnected: Polled every poll_interval seconds while it runs
+        poll_interval: Seconds between polls (default: SCHEDULER_DISCONNECT_POLL_INTERVAL)
+    
+    Returns:
+        The call's result
+    
+    Raises:
+        ClientDisconnectedError: The client disconnected and the call was cancelled
+    """
+    interval = settings.SCHEDULER_DISCONNECT_POLL_INTERVAL if poll_interval is None else poll_interval
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=interval)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                raise ClientDisconnectedError("Client disconnected during generation")
+    finally:
+        if not task.done():
+            task.cancel()
+            # Wait until the upstream connection is closed
+            await asyncio.wait({task})
+
+def resolve_priority(
+    requested: Optional[str],
+    api_key: Optional[str] = None,
+    default: Optional[str] = None
+) -> str:
+    """
+    Lane a request waits in
+    
+    The lane asked for (or the default) is used, except that an API key
+    listed in SCHEDULER_API_KEY_PRIORITIES cannot go above its lane.
+    
+    Args:
+        requested: Lane named by the request, if any
+        api_key: Caller's API key, if any
+        default: Lane when none is named (default: SCHEDULER_DEFAULT_PRIORITY)
+    
+    Returns:
+        One of PRIORITIES
+    """
+    assigned = settings.SCHEDULER_API_KEY_PRIORITIES.get(api_key) if api_key else None
+    priority = requested or assigned or default or settings.SCHEDULER_DEFAULT_PRIORITY
+    if priority not in PRIORITIES:
+        logger.warning(f"Unknown priority '{priority}'; using 'standard'")
+        priority = "standard"
+    if assigned in PRIORITIES and PRIORITIES.index(priority) < PRIORITIES.index(assigned):
+        priority = assigned
+    return priority
+
+class _Lane:
+    """
+    FIFO wait queue and counters for one priority class of a model
+    """
+    
+    def __init__(self):
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.passed_over = 0  # consecutive hand-offs to other lanes while waiting
+        self.served = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.promoted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def prune(self) -> bool:
+        """
+        Drop abandoned waiters from the head; True if a live one remains
+        """
+        while self.waiters and self.waiters[0].done():
+            self.waiters.popleft()
+        return bool(self.waiters)
+
+class _ModelQueue:
+    """
+    Concurrency slots and prioritized wait queues for a single model
+    
+    Each priority class has its own FIFO lane. A freed slot goes to the
+    highest-priority waiting lane, unless a lower lane has been passed over
+    starvation_limit times in a row, in which case it goes there.
+    """
+    
+    def __init__(self, slots: int, max_queue: int, starvation_limit: int = settings.SCHEDULER_STARVATION_LIMIT):
+        self.slots = slots
+        self.max_queue = max_queue
+        self.starvation_limit = starvation_limit
+        self.active = 0
+        self.lanes: Dict[str, _Lane] = {priority: _Lane() for priority in PRIORITIES}
+        self.served = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.seconds_avoided = 0.0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.avg_service_time = 0.0  # exponentially weighted
+    
+    def queued(self, priority: Optional[str] = None) -> int:
+        """
+        Waiting requests, in one lane or (without a priority) in all
+        """
+        if priority is not None:
+            return len(self.lanes[priority].waiters)
+        return sum(len(lane.waiters) for lane in self.lanes.values())
+    
+    def retry_after(self, priority: str = "standard") -> int:
+        """
+        Seconds until a slot is likely to free up for a new request of a priority
+        
+        Only requests in the same or higher lanes are ahead of it.
+        """
+        service_time = self.avg_service_time or 1.0
+        ahead = sum(self.queued(p) for p in PRIORITIES[:PRIORITIES.index(priority) + 1])
+        return max(1, math.ceil(service_time * (ahead + 1) / self.slots))
+    
+    def release(self, service_time: float, cancelled: bool = False) -> None:
+        """
+        Record a finished request and pass its slot on
+        
+        A cancelled generation does not update the average service time;
+        the rest of an average generation counts as time saved instead.
+        """
+        self.served += 1
+        if cancelled:
+            self.cancelled += 1
+            self.seconds_avoided += max(0.0, self.avg_service_time - service_time)
+        else:
+            self.avg_service_time = (
+                service_time if self.avg_service_time == 0.0
+                else 0.8 * self.avg_service_time + 0.2 * service_time
+            )
+        self.hand_off()
+    
+    def hand_off(self) -> None:
+        """
+        Pass a held slot to the next live waiter, or free it
+        """
+        waiting = [priority for priority, lane in self.lanes.items() if lane.prune()]
+        if not waiting:
+            self.active -= 1
+            return
+        starving = [p for p in waiting if self.lanes[p].passed_over >= self.starvation_limit]
+        chosen = starving[0] if starving else waiting[0]
+        if chosen != waiting[0]:
+            self.lanes[chosen].promoted += 1
+        for priority in waiting:
+            self.lanes[priority].passed_over = 0 if priority == chosen else self.lanes[priority].passed_over + 1
+        self.lanes[chosen].waiters.popleft().set_result(None)
+
+class RequestScheduler:
+    """
+    Admission control in front of Ollama
+    
+    Each model gets a number of concurrency slots and a bounded FIFO queue
+    per priority class (interactive, standard, bulk); interactive requests
+    are dispatched first, with starvation protection for the lower lanes.
+    Requests beyond their lane's bound are rejected immediately with a
+    Retry-After estimate instead of piling up until they time out. Queued
+    requests whose client disconnects are dropped without using a slot;
+    generations cancelled while holding one are counted, with an estimate
+    of the generation time saved.
+    """
+    
+    def __init__(
+        self,
+        concurrency: int = settings.SCHEDULER_CONCURRENCY,
+        max_queue: int = settings.SCHEDULER_MAX_QUEUE,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        poll_interval: float = settings.SCHEDULER_DISCONNECT_POLL_INTERVAL,
+        starvation_limit: int = settings.SCHEDULER_STARVATION_LIMIT
+    ):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.starvation_limit = starvation_limit
+        self.model_concurrency = {
+            canonical_name(name): slots
+            for name, slots in (
+                settings.SCHEDULER_MODEL_CONCURRENCY if model_concurrency is None else model_concurrency
+            ).items()
+        }
+        self.poll_interval = poll_interval
+        # Keyed by canonical "name:tag", so "llama3.2" and "llama3.2:latest" share a queue
+        self._queues: Dict[str, _ModelQueue] = {}
+    
+    def _queue(self, model: str) -> _ModelQueue:
+        model = canonical_name(model)
+        queue = self._queues.get(model)
+        if queue is None:
+            slots = self.model_concurrency.get(model, self.concurrency)
+            queue = self._queues[model] = _ModelQueue(max(1, slots), self.max_queue, self.starvation_limit)
+        return queue
+    
+    def is_busy(self, model: str) -> bool:
+        """
+        Whether the model has requests running or waiting
+        """
+        queue = self._queues.get(canonical_name(model))
+        return queue is not None and (queue.active > 0 or queue.queued() > 0)
+    
+    def check_admission(self, model: str, priority: str = "standard") -> None:
+        """
+        Fail fast if a new request for the model would be rejected
+        
+        Args:
+            model: Model the request will run on
+            priority: Lane the request would wait in
+        
+        Raises:
+            QueueFullError: All slots are busy and the lane is full
+        """
+        queue = self._queue(model)
+        if queue.active >= queue.slots and queue.queued(priority) >= queue.max_queue:
+            queue.rejected += 1
+            queue.lanes[priority].rejected += 1
+            raise QueueFullError(model, queue.retry_after(priority))
+    
+    async def acquire(
+        self,
+        model: str,
+        is_disconnected: Optional[DisconnectCheck] = None,
+        priority: str = "standard"
+    ) -> float:
+        """
+        Wait for a concurrency slot
+        
+        Args:
+            model: Model the request will run on
+            is_disconnected: Polled while queued; a True result drops the request
+            priority: Lane to wait in (see PRIORITIES)
+        
+        Returns:
+            Seconds spent waiting in the queue
+        
+        Raises:
+            QueueFullError: The model's lane is full
+            ClientDisconnectedError: The client went away while queued
+        """
+        queue = self._queue(model)
+        lane = queue.lanes[priority]
+        if queue.active < queue.slots and not queue.queued():
+            queue.active += 1
+            lane.served += 1
+            return 0.0
+        
+        self.check_admission(model, priority)
+        
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        start = time.monotonic()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), timeout=self.poll_interval)
+                    break
+                except asyncio.TimeoutError:
+                    if is_disconnected is not None and await is_disconnected():
+                        raise ClientDisconnectedError(f"Client disconnected while queued for '{model}'")
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                queue.hand_off()
+            else:
+                waiter.cancel()
+                try:
+                    lane.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            queue.dropped += 1
+            lane.dropped += 1
+            raise
+        
+        wait = time.monotonic() - start
+        queue.total_wait += wait
+        queue.max_wait = max(queue.max_wait, wait)
+        lane.served += 1
+        lane.total_wait += wait
+        lane.max_wait = max(lane.max_wait, wait)
+        return wait
+    
+    def release(self, model: str, service_time: float, cancelled: bool = False) -> None:
+        """
+        Return a slot obtained with acquire()
+        
+        Args:
+            model: Model the request ran on
+            service_time: Seconds the slot was held
+            cancelled: The generation was abandoned before it finished
+        """
+        self._queue(model).release(service_time, cancelled)
+    
+    @asynccontextmanager
+    async def slot(
+        self,
+        model: str,
+        is_disconnected: Optional[DisconnectCheck] = None,
+        priority: str = "standard"
+    ) -> AsyncIterator[float]:
+        """
+        Hold a concurrency slot for the duration of the block
+        
+        Leaving the block through cancellation, generator close or
+        ClientDisconnectedError counts as a cancelled generation.
+        
+        Yields:
+            Seconds spent waiting in the queue
+        """
+        wait = await self.acquire(model, is_disconnected, priority)
+        start = time.monotonic()
+        cancelled = False
+        try:
+            yield wait
+        except (asyncio.CancelledError, GeneratorExit, ClientDisconnectedError):
+            cancelled = True
+            raise
+        finally:
+            self.release(model, time.monotonic() - start, cancelled)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Per-model queue depth, slot usage and wait-time metrics, with a
+        breakdown per priority lane
+        """
+        models = {}
+        for model, queue in self._queues.items():
+            waited = queue.served + queue.queued()
+            models[model] = {
+                "slots": queue.slots,
+                "active": queue.active,
+                "queued": queue.queued(),
+                "max_queue": queue.max_queue,
+                "served": queue.served,
+                "rejected": queue.rejected,
+                "dropped": queue.dropped,
+                "cancelled": queue.cancelled,
+                "seconds_avoided": round(queue.seconds_avoided, 2),
+                "avg_wait": round(queue.total_wait / waited, 4) if waited else 0.0,
+                "max_wait": round(queue.max_wait, 4),
+                "avg_service_time": round(queue.avg_service_time, 4),
+                "lanes": {priority: _lane_stats(lane) for priority, lane in queue.lanes.items()}
+            }
+        return {"models": models}
+
+def _lane_stats(lane: _Lane) -> Dict[str, Any]:
+    waited = lane.served + len(lane.waiters)
+    return {
+        "queued": len(lane.waiters),
+        "served": lane.served,
+        "rejected": lane.rejected,
+        "dropped": lane.dropped,
+        "promoted": lane.promoted,
+        "avg_wait": round(lane.total_wait / waited, 4) if waited else 0.0,
+        "max_wait": round(lane.max_wait, 4)
+    }
+
+# Create a singleton instance; every Ollama backend runs its own generations
+request_scheduler = RequestScheduler(
+    concurrency=settings.SCHEDULER_CONCURRENCY * max(1, len(settings.OLLAMA_BACKENDS))
+)
+
+registry.register(Gauge(
+    "chatbot_queue_depth",
+    "Requests waiting for a generation slot",
+    ["model"],
+    lambda: {(model,): queue.queued() for model, queue in request_scheduler._queues.items()}
+))
+registry.register(Gauge(
+    "chatbot_lane_queue_depth",
+    "Requests waiting for a generation slot, by priority lane",
+    ["model", "priority"],
+    lambda: {
+        (model, priority): len(lane.waiters)
+        for model, queue in request_scheduler._queues.items()
+        for priority, lane in queue.lanes.items()
+    }
+))
+registry.register(CallbackCounter(
+    "chatbot_lane_dispatched_total",
+    "Requests given a generation slot, by priority lane",
+    ["model", "priority"],
+    lambda: {
+        (model, priority): lane.served
+        for model, queue in request_scheduler._queues.items()
+        for priority, lane in queue.lanes.items()
+    }
+))
+registry.register(CallbackCounter(
+    "chatbot_lane_promotions_total",
+    "Slots given to a lower-priority lane ahead of a higher one by starvation protection",
+    ["model", "priority"],
+    lambda: {
+        (model, priority): lane.promoted
+        for model, queue in request_scheduler._queues.items()
+        for priority, lane in queue.lanes.items()
+    }
+))
+registry.register(Gauge(
+    "chatbot_active_generations",
+    "Generation slots in use",
+    ["model"],
+    lambda: {(model,): queue.active for model, queue in request_scheduler._queues.items()}
+))
+registry.register(CallbackCounter(
+    "chatbot_cancelled_generations_total",
+    "Generations cancelled because every client waiting on them disconnected",
+    ["model"],
+    lambda: {(model,): queue.cancelled for model, queue in request_scheduler._queues.items()}
+))
+registry.register(CallbackCounter(
+    "chatbot_generation_seconds_avoided_total",
+    "Estimated generation seconds saved by cancelling abandoned generations",
+    ["model"],
+    lambda: {(model,): queue.seconds_avoided for model, queue in request_scheduler._queues.items()}
+))
@@ -0,0 +1,354 @@
+"""
+Semantic response cache: answers a prompt from a stored reply to a prompt
+that means the same thing, e.g. "how do I reset my password?" and "what are
+the steps to reset a password".
+
+Prompts are embedded (by default with Ollama's embeddings API) and kept in a
+NumPy matrix of unit vectors, so a lookup is one matrix-vector product. The
+matrix can be backed by a memory-mapped file so the cache survives restarts.
+NumPy is optional; without it the semantic cache stays disabled.
+"""
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+import json
+import logging
+import os
+import time
+
+from app.core.config import settings
+from app.core.lazy_import import optional_module
+from app.services.metrics import registry, CallbackCounter, Histogram
+from app.services.ollama_service import ollama_service
+from app.services.response_cache import normalize_text
+from app.services.single_flight import flight_key
+from app.services.stats import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+# numpy is only imported once the cache is enabled
+np = optional_module("numpy")
+
+Embedder = Callable[[str], Awaitable[List[float]]]
+
+# Distinct prompts whose embedding is kept, so storing a reply reuses the
+# embedding computed for its lookup
+EMBEDDING_MEMO_SIZE = 256
+
+lookup_latency = registry.register(Histogram(
+    "chatbot_semantic_cache_lookup_seconds",
+    "Semantic cache lookup time, embedding included",
+    (),
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+))
+
+class VectorIndex:
+    """
+    Fixed-capacity matrix of unit vectors with a payload per row
+    
+    Each row belongs to a scope (model and options); a search only considers
+    rows of the query's scope. When full, the least recently used row is
+    overwritten. With a path, vectors live in `<path>/vectors.npy` (memory
+    mapped) and the rest in `<path>/index.json`, written by flush().
+    """
+    
+    def __init__(self, capacity: int, path: Optional[str] = None):
+        self.capacity = capacity
+        self.path = path
+        self.dim: Optional[int] = None
+        self.evictions = 0
+        self._vectors = None
+        self._scopes = np.full(capacity, -1, dtype=np.int64)  # -1 marks a free row
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._stored_at = np.zeros(capacity, dtype=np.float64)
+        self._payloads: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._scope_ids: Dict[str, int] = {}
+        if path:
+            self._load()
+    
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._scopes >= 0))
+    
+    def search(self, vector, scope: str) -> Tuple[Optional[int], float]:
+        """
+        Find the most similar row in a scope
+        
+        Args:
+            vector: Unit query vector
+            scope: Scope key
+        
+        Returns:
+            (row, cosine similarity), or (None, 0.0) if the scope is empty
+        """
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None or self._vectors is None or len(vector) != self.dim:
+            return None, 0.0
+        rows = np.flatnonzero(self._scopes == scope_id)
+        if rows.size == 0:
+            return None, 0.0
+        scores = self._vectors[rows] @ vector
+        best = int(np.argmax(scores))
+        return int(rows[best]), float(scores[best])
+    
+    def add(self, vector, scope: str, payload: Dict[str, Any]) -> int:
+        """
+        Store a unit vector and its payload, evicting the least recently used row if full
+        
+        Returns:
+            The row written
+        """
+        if self.dim != len(vector):
+            # First vector, or the embedding model changed: start over
+            self._allocate(len(vector))
+        free = np.flatnonzero(self._scopes < 0)
+        if free.size:
+            row = int(free[0])
+        else:
+            row = int(np.argmin(self._last_used))
+            self.evictions += 1
+        scope_id = self._scope_ids.setdefault(scope, len(self._scope_ids))
+        now = time.time()
+        self._vectors[row] = vector
+        self._scopes[row] = scope_id
+        self._last_used[row] = now
+        self._stored_at[row] = now
+        self._payloads[row] = payload
+        return row
+    
+    def touch(self, row: int) -> None:
+        self._last_used[row] = time.time()
+    
+    def payload(self, row: int) -> Optional[Dict[str, Any]]:
+        return self._payloads[row]
+    
+    def stored_at(self, row: int) -> float:
+        return float(self._stored_at[row])
+    
+    def remove(self, row: int) -> None:
+        self._scopes[row] = -1
+        self._payloads[row] = None
+    
+    def clear(self) -> None:
+        self._scopes[:] = -1
+        self._payloads = [None] * self.capacity
+        self._scope_ids.clear()
+    
+    def _allocate(self, dim: int) -> None:
+        self.clear()
+        self.dim = dim
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            self._vectors = np.lib.format.open_memmap(
+                os.path.join(self.path, "vectors.npy"), mode="w+", dtype=np.float32, shape=(self.capacity, dim)
+            )
+        else:
+            self._vectors = np.zeros((self.capacity, dim), dtype=np.float32)
+    
+    def _load(self) -> None:
+        vectors_path = os.path.join(self.path, "vectors.npy")
+        index_path = os.path.join(self.path, "index.json")
+        if not (os.path.exists(vectors_path) and os.path.exists(index_path)):
+            return
+        try:
+            vectors = np.load(vectors_path, mmap_mode="r+")
+            with open(index_path) as f:
+                meta = json.load(f)
+            if vectors.shape[0] != self.capacity or vectors.shape[1] != meta["dim"]:
+                logger.info("Semantic cache capacity changed; starting empty")
+                return
+            self.dim = meta["dim"]
+            self._vectors = vectors
+            self._scopes[:] = meta["scopes"]
+            self._last_used[:] = meta["last_used"]
+            self._stored_at[:] = meta["stored_at"]
+            self._payloads = meta["payloads"]
+            self._scope_ids = meta["scope_ids"]
+            logger.info(f"Loaded {len(self)} semantic cache entries from {self.path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load semantic cache from {self.path}: {e}")
+            self.clear()
+    
+    def flush(self) -> None:
+        """
+        Persist the index (no-op without a path or before the first vector)
+        """
+        if not self.path or self._vectors is None:
+            return
+        self._vectors.flush()
+        meta = {
+            "dim": self.dim,
+            "scopes": self._scopes.tolist(),
+            "last_used": self._last_used.tolist(),
+            "stored_at": self._stored_at.tolist(),
+            "payloads": self._payloads,
+            "scope_ids": self._scope_ids
+        }
+        index_path = os.path.join(self.path, "index.json")
+        with open(index_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(index_path + ".tmp", index_path)
+
+class SemanticCache:
+    """
+    Cache of chat replies looked up by prompt meaning
+    
+    A prompt hits when a stored prompt of the same scope (model and
+    generation options) has a cosine similarity of at least `threshold`.
+    Only stateless chats are cached: with history, the same words can ask
+    something else. Embedding failures count as misses.
+    """
+    
+    # Puts between index flushes to disk
+    FLUSH_EVERY = 32
+    
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        capacity: int = settings.SEMANTIC_CACHE_CAPACITY,
+        threshold: float = settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl: float = settings.SEMANTIC_CACHE_TTL,
+        path: Optional[str] = settings.SEMANTIC_CACHE_PATH or None,
+        enabled: bool = settings.SEMANTIC_CACHE_ENABLED
+    ):
+        if enabled and np is None:
+            logger.warning("SEMANTIC_CACHE_ENABLED is set but numpy is not installed; semantic cache disabled")
+        self.enabled = enabled and np is not None
+        self.embedder = embedder
+        self.threshold = threshold
+        self.ttl = ttl
+        self.index = VectorIndex(capacity, path) if self.enabled else None
+        self._memo: "OrderedDict[str, Any]" = OrderedDict()
+        self._latency = RingBuffer(settings.STATS_WINDOW_SIZE)
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+    
+    @staticmethod
+    def scope(model: str, options: Dict[str, Any]) -> str:
+        """
+        Scope key: replies are only shared between identical model and options
+        """
+        return flight_key(model, options)
+    
+    async def get(self, message: str, scope: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a reply to a prompt with the same meaning
+        
+        Args:
+            message: User message
+            scope: Key from scope()
+        
+        Returns:
+            A copy of the stored result plus "semantic_similarity", or None on a miss
+        """
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        try:
+            vector = await self._embed(message)
+            row, similarity = (None, 0.0) if vector is None else self.index.search(vector, scope)
+            if row is not None and similarity >= self.threshold:
+                if time.time() - self.index.stored_at(row) > self.ttl:
+                    self.index.remove(row)
+                else:
+                    self.index.touch(row)
+                    self.hits += 1
+                    return {**self.index.payload(row), "semantic_similarity": round(similarity, 4)}
+            self.misses += 1
+            return None
+        finally:
+            elapsed = time.perf_counter() - start
+            self._latency.append(elapsed)
+            lookup_latency.observe(elapsed)
+    
+    async def put(self, message: str, scope: str, result: Dict[str, Any]) -> None:
+        """
+        Store a reply under the prompt's embedding
+        
+        Args:
+            message: User message
+            scope: Key from scope()
+            result: Result dict; must contain "response"
+        """
+        if not self.enabled:
+            return
+        vector = await self._embed(message)
+        if vector is None:
+            return
+        payload = {k: v for k, v in result.items() if k != "context"}
+        self.index.add(vector, scope, payload)
+        self._puts += 1
+        if self._puts % self.FLUSH_EVERY == 0:
+            self.flush()
+    
+    async def _embed(self, message: str):
+        """
+        Unit embedding of a message, memoized by its normalized text; None on failure
+        """
+        text = normalize_text(message)
+        vector = self._memo.get(text)
+        if vector is not None:
+            self._memo.move_to_end(text)
+            return vector
+        try:
+            raw = np.asarray(await self.embedder(text), dtype=np.float32)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+        norm = float(np.linalg.norm(raw))
+        if raw.ndim != 1 or norm == 0.0:
+            self.errors += 1
+            return None
+        vector = raw / norm
+        self._memo[text] = vector
+        if len(self._memo) > EMBEDDING_MEMO_SIZE:
+            self._memo.popitem(last=False)
+        return vector
+    
+    def clear(self) -> None:
+        """
+        Drop all entries (counters are kept)
+        """
+        if self.index is not None:
+            self.index.clear()
+            self.index.flush()
+        self._memo.clear()
+    
+    def flush(self) -> None:
+        """
+        Write the index to disk, if persistence is configured
+        """
+        if self.index is not None:
+            self.index.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Entries, hit rate and lookup latency percentiles (seconds)
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.index) if self.index is not None else 0,
+            "capacity": self.index.capacity if self.index is not None else 0,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "evictions": self.index.evictions if self.index is not None else 0,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "lookup_latency": self._latency.percentiles()
+        }
+
+def _ollama_embedder(text: str) -> Awaitable[List[float]]:
+    return ollama_service.embed(text, settings.SEMANTIC_CACHE_EMBED_MODEL)
+
+# Create a singleton instance
+semantic_cache = SemanticCache(embedder=_ollama_embedder)
+
+registry.register(CallbackCounter(
+    "chatbot_semantic_cache_lookups_total",
+    "Semantic cache lookups by result (hit, miss)",
+    ["result"],
+    lambda: {("hit",): semantic_cache.hits, ("miss",): semantic_cache.misses}
+))
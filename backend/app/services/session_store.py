@@ -0,0 +1,359 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message bookkeeping overhead (dict, keys, list slot) in bytes
+MESSAGE_OVERHEAD_BYTES = 200
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for English text)
+    """
+    return max(1, len(text) // 4)
+
+def message_size(message: Dict[str, str]) -> int:
+    """
+    Approximate memory footprint of a stored message in bytes
+    """
+    return len(message["content"].encode("utf-8")) + MESSAGE_OVERHEAD_BYTES
+
+class SessionStore(ABC):
+    """
+    Base class for conversation history storage
+    
+    Sessions are bounded per session (message and token caps) and globally
+    (session count and memory budget), and expire after a period of inactivity.
+    """
+    
+    def __init__(
+        self,
+        ttl: float = settings.SESSION_TTL,
+        max_sessions: int = settings.SESSION_MAX_SESSIONS,
+        max_messages: int = settings.SESSION_MAX_MESSAGES,
+        max_tokens: int = settings.SESSION_MAX_TOKENS,
+        memory_budget: int = settings.SESSION_MEMORY_BUDGET
+    ):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.memory_budget = memory_budget
+        self.evictions = 0
+    
+    @abstractmethod
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        """
+        Get the conversation history of a session
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            List of {"role", "content"} messages, oldest first (empty if unknown).
+            Callers must treat the list as read-only.
+        """
+    
+    @abstractmethod
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        """
+        Append messages to a session, creating it if needed
+        
+        Args:
+            session_id: Session identifier
+            messages: Messages to append, oldest first
+        """
+    
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """
+        Delete a session
+        
+        Returns:
+            bool: True if the session existed
+        """
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """
+        Store usage for monitoring
+        """
+
+class _Session:
+    __slots__ = ("messages", "tokens", "bytes", "last_access")
+    
+    def __init__(self):
+        self.messages: List[Dict[str, str]] = []
+        self.tokens = 0
+        self.bytes = 0
+        self.last_access = time.monotonic()
+
+class InMemorySessionStore(SessionStore):
+    """
+    In-process session store with LRU + TTL eviction
+    
+    Each session keeps its messages in a single list that is handed to the
+    Ollama client as-is, so a turn never copies the stored history.
+    """
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+    
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        session = self._touch(session_id)
+        return session.messages if session else []
+    
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        session = self._touch(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session()
+        
+        for message in messages:
+            message = {"role": message["role"], "content": message["content"]}
+            size = message_size(message)
+            session.messages.append(message)
+            session.tokens += estimate_tokens(message["content"])
+            session.bytes += size
+            self._bytes += size
+        
+        self._trim_session(session)
+        self._enforce_limits(keep=session_id)
+    
+    def delete(self, session_id: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._bytes -= session.bytes
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "memory_budget": self.memory_budget,
+            "evictions": self.evictions
+        }
+    
+    def _touch(self, session_id: str) -> Optional[_Session]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now - session.last_access > self.ttl:
+            self.delete(session_id)
+            self.evictions += 1
+            return None
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+    
+    def _trim_session(self, session: _Session) -> None:
+        """
+        Drop the oldest messages until the session fits its caps
+        """
+        drop = 0
+        count = len(session.messages)
+        while drop < count - 1 and (
+            count - drop > self.max_messages or session.tokens > self.max_tokens
+        ):
+            message = session.messages[drop]
+            size = message_size(message)
+            session.tokens -= estimate_tokens(message["content"])
+            session.bytes -= size
+            self._bytes -= size
+            drop += 1
+        if drop:
+            # One slice deletion instead of repeated pop(0)
+            del session.messages[:drop]
+    
+    def _enforce_limits(self, keep: str) -> None:
+        """
+        Evict expired, then least recently used sessions to respect global limits
+        """
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            over_limit = (
+                len(self._sessions) > self.max_sessions or self._bytes > self.memory_budget
+            )
+            expired = now - session.last_access > self.ttl
+            if session_id == keep or not (over_limit or expired):
+                break
+            self.delete(session_id)
+            self.evictions += 1
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store backed by a local SQLite file
+    
+    Survives restarts and can be shared by several worker processes.
+    """
+    
+    def __init__(self, path: str = settings.SESSION_SQLITE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL,
+                tokens INTEGER NOT NULL DEFAULT 0,
+                bytes INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+            CREATE INDEX IF NOT EXISTS idx_sessions_access ON sessions (last_access);
+        """)
+    
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            if not self._touch(session_id):
+                return []
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,)
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+    
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        rows = [
+            (session_id, m["role"], m["content"], estimate_tokens(m["content"]), message_size(m))
+            for m in messages
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, last_access) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET last_access = excluded.last_access",
+                (session_id, time.time())
+            )
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, role, content, tokens, bytes) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                "UPDATE sessions SET tokens = tokens + ?, bytes = bytes + ? WHERE session_id = ?",
+                (sum(r[3] for r in rows), sum(r[4] for r in rows), session_id)
+            )
+            self._trim_session(session_id)
+            self._enforce_limits(keep=session_id)
+    
+    def delete(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            return self._delete(session_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM sessions"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "sessions": sessions,
+            "bytes": total_bytes,
+            "memory_budget": self.memory_budget,
+            "evictions": self.evictions
+        }
+    
+    def _delete(self, session_id: str) -> bool:
+        self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        return self._conn.execute(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+        ).rowcount > 0
+    
+    def _touch(self, session_id: str) -> bool:
+        row = self._conn.execute(
+            "SELECT last_access FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        now = time.time()
+        if now - row[0] > self.ttl:
+            with self._conn:
+                self._delete(session_id)
+            self.evictions += 1
+            return False
+        self._conn.execute(
+            "UPDATE sessions SET last_access = ? WHERE session_id = ?", (now, session_id)
+        )
+        return True
+    
+    def _trim_session(self, session_id: str) -> None:
+        rows: List[Tuple[int, int, int]] = self._conn.execute(
+            "SELECT id, tokens, bytes FROM messages WHERE session_id = ? ORDER BY id",
+            (session_id,)
+        ).fetchall()
+        total_tokens = sum(r[1] for r in rows)
+        drop = 0
+        dropped_tokens = dropped_bytes = 0
+        while drop < len(rows) - 1 and (
+            len(rows) - drop > self.max_messages or total_tokens - dropped_tokens > self.max_tokens
+        ):
+            dropped_tokens += rows[drop][1]
+            dropped_bytes += rows[drop][2]
+            drop += 1
+        if drop:
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND id <= ?",
+                (session_id, rows[drop - 1][0])
+            )
+            self._conn.execute(
+                "UPDATE sessions SET tokens = tokens - ?, bytes = bytes - ? WHERE session_id = ?",
+                (dropped_tokens, dropped_bytes, session_id)
+            )
+    
+    def _enforce_limits(self, keep: str) -> None:
+        expired = self._conn.execute(
+            "SELECT session_id FROM sessions WHERE last_access < ? AND session_id != ?",
+            (time.time() - self.ttl, keep)
+        ).fetchall()
+        for (session_id,) in expired:
+            self._delete(session_id)
+            self.evictions += 1
+        
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM sessions"
+        ).fetchone()
+        if count <= self.max_sessions and total_bytes <= self.memory_budget:
+            return
+        for session_id, size in self._conn.execute(
+            "SELECT session_id, bytes FROM sessions WHERE session_id != ? ORDER BY last_access",
+            (keep,)
+        ).fetchall():
+            if count <= self.max_sessions and total_bytes <= self.memory_budget:
+                break
+            self._delete(session_id)
+            self.evictions += 1
+            count -= 1
+            total_bytes -= size
+
+def create_session_store() -> SessionStore:
+    """
+    Build the session store selected by settings.SESSION_BACKEND
+    """
+    if settings.SESSION_BACKEND == "sqlite":
+        logger.info(f"Using SQLite session store at {settings.SESSION_SQLITE_PATH}")
+        return SQLiteSessionStore()
+    return InMemorySessionStore()
+
+# Create a singleton instance
+session_store = create_session_store()
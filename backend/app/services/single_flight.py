@@ -0,0 +1,223 @@
+from typing import Optional, Dict, Any, List, Callable, Awaitable, AsyncIterator, TypeVar
+import asyncio
+import hashlib
+import json
+import logging
+
+from app.services.scheduler import DisconnectCheck
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_END = object()
+
+def flight_key(*parts: Any) -> str:
+    """
+    Hash request parts (path, payload, ...) into a coalescing key
+    """
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+class _Call:
+    """
+    One shared upstream call and the callers waiting on it
+    """
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.checks: List[Optional[DisconnectCheck]] = []
+    
+    async def abandoned(self) -> bool:
+        """
+        Whether every waiter's client has gone (waiters without a check never go)
+        """
+        checks = list(self.checks)
+        if not checks:
+            return False
+        for check in checks:
+            if check is None or not await check():
+                return False
+        return True
+
+class _Stream:
+    """
+    One shared upstream stream, replayed and fanned out to its subscribers
+    """
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.chunks: List[Any] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.error: Optional[BaseException] = None
+        self.finished = False
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one upstream call
+    
+    The first caller for a key starts the call in its own task; callers that
+    arrive while it runs wait for the same result. A caller that is
+    cancelled only stops waiting: the shared call keeps running for the
+    others, and is cancelled only once no caller is left. Streams are fanned
+    out chunk by chunk, and a late subscriber first gets the chunks it missed.
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Stream] = {}
+        self.leaders: Dict[str, int] = {}
+        self.followers: Dict[str, int] = {}
+        self.cancelled = 0
+    
+    def _count(self, counts: Dict[str, int], kind: str) -> None:
+        counts[kind] = counts.get(kind, 0) + 1
+    
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[DisconnectCheck], Awaitable[T]],
+        is_disconnected: Optional[DisconnectCheck] = None,
+        kind: str = "call"
+    ) -> T:
+        """
+        Run fn once for all concurrent callers with the same key
+        
+        Args:
+            key: Coalescing key (see flight_key)
+            fn: Upstream call; receives a check that turns True once every
+                waiter's client has disconnected
+            is_disconnected: This caller's disconnect check, if any
+            kind: Label for the coalescing counters
+        
+        Returns:
+            The shared result (callers must not mutate it)
+        """
+        if not self.enabled:
+            return await fn(is_disconnected or _never)
+        
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call()
+            call.task = asyncio.ensure_future(fn(call.abandoned))
+            call.task.add_done_callback(lambda task: self._finish_call(key, call, task))
+            self._calls[key] = call
+            self._count(self.leaders, kind)
+        else:
+            self._count(self.followers, kind)
+        
+        call.waiters += 1
+        call.checks.append(is_disconnected)
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            call.checks.remove(is_disconnected)
+            if call.waiters == 0 and not call.task.done():
+                logger.info(f"All callers of a shared {kind} left; cancelling it")
+                self.cancelled += 1
+                call.task.cancel()
+    
+    def _finish_call(self, key: str, call: _Call, task: asyncio.Task) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter left
+            task.exception()
+    
+    async def stream(
+        self,
+        key: str,
+        factory: Callable[[], AsyncIterator[T]],
+        kind: str = "stream"
+    ) -> AsyncIterator[T]:
+        """
+        Iterate a stream shared by all concurrent subscribers with the same key
+        
+        Args:
+            key: Coalescing key (see flight_key)
+            factory: Creates the upstream async iterator (called once per flight)
+            kind: Label for the coalescing counters
+        
+        Yields:
+            The upstream items (shared objects; subscribers must not mutate them)
+        """
+        if not self.enabled:
+            async for item in factory():
+                yield item
+            return
+        
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = _Stream()
+            self._streams[key] = flight
+            flight.task = asyncio.ensure_future(self._pump(key, flight, factory()))
+            self._count(self.leaders, kind)
+        else:
+            self._count(self.followers, kind)
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in flight.chunks:
+            queue.put_nowait(item)
+        if flight.finished:
+            queue.put_nowait(_END)
+        flight.subscribers.append(queue)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                yield item
+        finally:
+            flight.subscribers.remove(queue)
+            if not flight.subscribers and not flight.task.done():
+                logger.info(f"All subscribers of a shared {kind} left; cancelling it")
+                self.cancelled += 1
+                flight.task.cancel()
+                # Wait for the upstream to be closed before returning
+                await asyncio.wait({flight.task})
+    
+    async def _pump(self, key: str, flight: _Stream, upstream: AsyncIterator[Any]) -> None:
+        try:
+            async for item in upstream:
+                flight.chunks.append(item)
+                for queue in flight.subscribers:
+                    queue.put_nowait(item)
+                # Let subscribers run even when the upstream never blocks
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.finished = True
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            for queue in flight.subscribers:
+                queue.put_nowait(_END)
+            aclose = getattr(upstream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing counters
+        
+        Returns:
+            Dict with in-flight calls and streams, leaders, followers and cancellations
+        """
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._calls) + len(self._streams),
+            "leaders": dict(self.leaders),
+            "followers": dict(self.followers),
+            "cancelled": self.cancelled
+        }
+
+async def _never() -> bool:
+    return False
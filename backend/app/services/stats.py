@@ -0,0 +1,133 @@
+from typing import Optional, Dict, Any, List
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NS_PER_SECOND = 1e9
+
+def _rate(count: Optional[int], duration_ns: Optional[int]) -> Optional[float]:
+    if not count or not duration_ns:
+        return None
+    return round(count / (duration_ns / NS_PER_SECOND), 2)
+
+def _seconds(duration_ns: Optional[int]) -> Optional[float]:
+    if duration_ns is None:
+        return None
+    return round(duration_ns / NS_PER_SECOND, 3)
+
+def compute_chat_stats(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Derive per-request throughput stats from Ollama's response fields
+    
+    Args:
+        result: Result dict from OllamaService.chat (durations in nanoseconds)
+        
+    Returns:
+        Dict with token counts, tokens/sec, load time (seconds) and cold_start
+    """
+    load_time = _seconds(result.get("load_duration"))
+    return {
+        "prompt_eval_count": result.get("prompt_eval_count"),
+        "eval_count": result.get("eval_count"),
+        "prompt_tokens_per_second": _rate(result.get("prompt_eval_count"), result.get("prompt_eval_duration")),
+        "eval_tokens_per_second": _rate(result.get("eval_count"), result.get("eval_duration")),
+        "load_time": load_time,
+        "total_duration": _seconds(result.get("total_duration")),
+        "cold_start": load_time is not None and load_time >= settings.COLD_LOAD_THRESHOLD
+    }
+
+class RingBuffer:
+    """
+    Fixed-size buffer of the most recent float samples
+    
+    Storage is allocated once; adding a sample overwrites the oldest one.
+    """
+    
+    __slots__ = ("_data", "_index", "_size")
+    
+    def __init__(self, capacity: int):
+        self._data: List[float] = [0.0] * capacity
+        self._index = 0
+        self._size = 0
+    
+    def append(self, value: float) -> None:
+        self._data[self._index] = value
+        self._index = (self._index + 1) % len(self._data)
+        if self._size < len(self._data):
+            self._size += 1
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)) -> Dict[str, float]:
+        """
+        Nearest-rank percentiles over the buffered samples
+        """
+        if not self._size:
+            return {}
+        ordered = sorted(self._data[:self._size])
+        return {
+            f"p{int(q * 100)}": round(ordered[min(self._size - 1, int(q * self._size))], 3)
+            for q in quantiles
+        }
+
+class _ModelStats:
+    __slots__ = ("requests", "cold_starts", "series")
+    
+    FIELDS = ("latency", "eval_tokens_per_second", "prompt_tokens_per_second", "load_time")
+    
+    def __init__(self, capacity: int):
+        self.requests = 0
+        self.cold_starts = 0
+        self.series = {field: RingBuffer(capacity) for field in self.FIELDS}
+
+class StatsCollector:
+    """
+    Rolling per-model percentiles over a fixed window of recent requests
+    """
+    
+    def __init__(self, window: int = settings.STATS_WINDOW_SIZE):
+        self.window = window
+        self._models: Dict[str, _ModelStats] = {}
+    
+    def record(self, model: str, latency: float, stats: Dict[str, Any]) -> None:
+        """
+        Add a finished generation to the model's window
+        
+        Args:
+            model: Model name
+            latency: End-to-end request time in seconds
+            stats: Output of compute_chat_stats()
+        """
+        entry = self._models.get(model)
+        if entry is None:
+            entry = self._models[model] = _ModelStats(self.window)
+        entry.requests += 1
+        if stats.get("cold_start"):
+            entry.cold_starts += 1
+        entry.series["latency"].append(latency)
+        for field in ("eval_tokens_per_second", "prompt_tokens_per_second", "load_time"):
+            value = stats.get(field)
+            if value is not None:
+                entry.series[field].append(value)
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        Percentiles per model and metric
+        """
+        return {
+            "window": self.window,
+            "models": {
+                model: {
+                    "requests": entry.requests,
+                    "cold_starts": entry.cold_starts,
+                    **{field: entry.series[field].percentiles() for field in _ModelStats.FIELDS}
+                }
+                for model, entry in self._models.items()
+            }
+        }
+
+# Create a singleton instance
+stats_collector = StatsCollector()
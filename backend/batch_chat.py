@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Run a JSONL file of prompts through the chatbot and write JSONL results
+
+Each input line is a JSON object. The id is taken from the first present
+field of --id-field (default: id, request_id), the prompt from --message-field
+(default: message, prompt, body); "model", "options" and "bypass_cache" are
+passed through. Results are written in completion order, one line per item.
+A line that is not a JSON object is reported as a failed item (its id is the
+line number) and the remaining lines are still processed.
+
+By default prompts are processed in-process through OllamaService (Ollama must
+be reachable); with --server they are sent to a running server's
+/api/chat/batch endpoint instead.
+
+Usage:
+    python batch_chat.py requests.jsonl -o results.jsonl --concurrency 2
+    python batch_chat.py requests.jsonl --server http://raspberrypi:8000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, Any, Iterator, List, Optional, TextIO
+
+import httpx
+
+def read_items(
+    source: TextIO,
+    id_fields: List[str],
+    message_fields: List[str],
+    rejected: Optional[List[Dict[str, Any]]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Parse JSONL lines into batch items, skipping blank lines
+    
+    Args:
+        source: JSONL input
+        id_fields: Fields tried in order for the item id
+        message_fields: Fields tried in order for the prompt
+        rejected: Receives an error result for each malformed line
+    """
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("not a JSON object")
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError
+            print(f"Line {line_number}: invalid JSON ({e}), skipping", file=sys.stderr)
+            if rejected is not None:
+                rejected.append({
+                    "id": str(line_number),
+                    "status": "error",
+                    "line": line_number,
+                    "error": f"Invalid JSON on line {line_number}: {e}"
+                })
+            continue
+        item_id = next((str(record[f]) for f in id_fields if record.get(f) is not None), str(line_number))
+        message = next((record[f] for f in message_fields if record.get(f)), None)
+        if message is None:
+            print(f"Line {line_number}: no message field found, skipping", file=sys.stderr)
+            continue
+        item = {"id": item_id, "message": message}
+        for passthrough in ("model", "options", "bypass_cache"):
+            if passthrough in record:
+                item[passthrough] = record[passthrough]
+        yield item
+
+async def run_local(items: Iterator[Dict[str, Any]], concurrency: int, output: TextIO) -> Dict[str, int]:
+    """
+    Process items in-process with the server's batch runner
+    """
+    from app.services.batch import run_batch
+    from app.services.ollama_service import ollama_service
+    
+    counts = {"succeeded": 0, "failed": 0}
+    await ollama_service.start()
+    try:
+        async for result in run_batch(items, concurrency):
+            counts["succeeded" if result["status"] == "ok" else "failed"] += 1
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        await ollama_service.close()
+    return counts
+
+async def run_remote(
+    items: Iterator[Dict[str, Any]],
+    concurrency: int,
+    output: TextIO,
+    server: str
+) -> Dict[str, int]:
+    """
+    Send items to a running server's /api/chat/batch and relay its results
+    """
+    counts = {"succeeded": 0, "failed": 0}
+    payload = {"items": list(items), "concurrency": concurrency}
+    async with httpx.AsyncClient(timeout=None) as client:
+        async with client.stream("POST", f"{server.rstrip('/')}/api/chat/batch", json=payload) as response:
+            if response.is_error:
+                await response.aread()
+                raise SystemExit(f"Server error {response.status_code}: {response.text}")
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                result = json.loads(line)
+                if result.get("done"):
+                    continue
+                counts["succeeded" if result["status"] == "ok" else "failed"] += 1
+                output.write(line + "\n")
+                output.flush()
+    return counts
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Input JSONL file ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Items processed at once")
+    parser.add_argument("--server", help="Base URL of a running server; omit to run in-process")
+    parser.add_argument("--id-field", action="append", help="Field(s) holding the item id")
+    parser.add_argument("--message-field", action="append", help="Field(s) holding the prompt")
+    args = parser.parse_args(argv)
+    
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    rejected: List[Dict[str, Any]] = []
+    items = read_items(
+        source,
+        args.id_field or ["id", "request_id"],
+        args.message_field or ["message", "prompt", "body"],
+        rejected
+    )
+    
+    start = time.time()
+    try:
+        if args.server:
+            counts = asyncio.run(run_remote(items, args.concurrency, output, args.server))
+        else:
+            counts = asyncio.run(run_local(items, args.concurrency, output))
+        for result in rejected:
+            counts["failed"] += 1
+            output.write(json.dumps(result) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    
+    print(
+        f"Processed {counts['succeeded'] + counts['failed']} items in {time.time() - start:.1f}s "
+        f"({counts['succeeded']} ok, {counts['failed']} failed)",
+        file=sys.stderr
+    )
+    return 0 if counts["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time from process start to the first successful chat
+
+Each run starts a fresh server process (uvicorn, as the systemd unit does)
+against a mock Ollama whose models are all unloaded, like after a power
+cycle, and times from launch until /api/live answers, /api/ready turns
+ready and the first /api/chat reply arrives. Three strategies are compared:
+
+* no warm-up: the first chat is sent as soon as the server is live and
+  pays the cold model load itself
+* warm-up, chat when live: WARMUP_MODELS preloads the model, but the chat
+  does not wait for it
+* warm-up, chat when ready: the client waits for /api/ready, as the
+  frontend does, so the chat itself runs on a warm model
+
+Usage:
+    python -m benchmarks.bench_cold_start --runs 3 --load-time 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.mock_ollama import MockConfig, running_mock, free_port
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+MODEL = "llama3.2"
+
+def wait_for(url: str, deadline: float, process: subprocess.Popen) -> None:
+    """
+    Poll a URL until it answers 200
+    """
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f"{url} not ready in time")
+
+def run_once(ollama_url: str, warm_up: bool, wait_ready: bool, timeout: float) -> Dict[str, Optional[float]]:
+    """
+    Start a server, send one chat and time each milestone from launch
+    
+    Returns:
+        Seconds from launch to live, ready (if waited for) and the first
+        chat reply, plus the chat's own latency
+    """
+    port = free_port()
+    base = f"http://127.0.0.1:{port}/api"
+    env = {
+        **os.environ,
+        "OLLAMA_BASE_URL": ollama_url,
+        "WARMUP_MODELS": json.dumps([MODEL] if warm_up else []),
+        "WARMUP_RETRY_INTERVAL": "0.5"
+    }
+    start = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        wait_for(f"{base}/live", deadline, process)
+        live = time.monotonic() - start
+        ready = None
+        if wait_ready:
+            wait_for(f"{base}/ready", deadline, process)
+            ready = time.monotonic() - start
+        sent = time.monotonic()
+        response = httpx.post(f"{base}/chat", json={"message": "Hello", "model": MODEL}, timeout=timeout)
+        response.raise_for_status()
+        done = time.monotonic()
+        stages = httpx.get(f"{base}/ready", timeout=5).json()["startup"]
+        return {
+            "live": live,
+            "ready": ready,
+            "first_chat": done - start,
+            "chat_latency": done - sent,
+            "imports": stages.get("imports")
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def median(values: List[Optional[float]]) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Server launches per strategy (median reported)")
+    parser.add_argument("--load-time", type=float, default=3.0, help="Mock seconds to load a cold model")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock seconds before the first token")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds allowed per run")
+    args = parser.parse_args()
+    
+    strategies = [
+        ("no warm-up", False, False),
+        ("warm-up, chat when live", True, False),
+        ("warm-up, chat when ready", True, True)
+    ]
+    config = MockConfig(load_time=args.load_time, latency=args.latency, models=[f"{MODEL}:latest"])
+    print(f"{'strategy':<26} {'imports s':>9} {'live s':>7} {'ready s':>8} {'first chat s':>13} {'chat s':>7}")
+    with running_mock(config) as mock:
+        for name, warm_up, wait_ready in strategies:
+            runs = []
+            for _ in range(args.runs):
+                mock.loaded.clear()  # every launch starts after a "power cycle"
+                runs.append(run_once(mock.base_url, warm_up, wait_ready, args.timeout))
+            result = {key: median([run[key] for run in runs]) for key in runs[0]}
+            ready = f"{result['ready']:>8.2f}" if result["ready"] is not None else f"{'-':>8}"
+            print(
+                f"{name:<26} {result['imports']:>9.2f} {result['live']:>7.2f} {ready} "
+                f"{result['first_chat']:>13.2f} {result['chat_latency']:>7.2f}"
+            )
+
+if __name__ == "__main__":
+    main()
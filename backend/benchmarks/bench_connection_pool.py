@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call httpx clients vs. the shared pooled client in OllamaService
+
+Starts a minimal Ollama stand-in on a local port and fires the same number of
+chat requests through both connection strategies, reporting requests/sec.
+
+Usage:
+    python -m benchmarks.bench_connection_pool --requests 2000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from app.services.ollama_service import OllamaService
+
+CHAT_REPLY = json.dumps({
+    "model": "llama3.2",
+    "message": {"role": "assistant", "content": "pong"},
+    "done": True,
+    "total_duration": 1000,
+    "load_duration": 10,
+    "prompt_eval_count": 1,
+    "eval_count": 1
+}).encode()
+
+async def mock_ollama(scope, receive, send):
+    """
+    Minimal ASGI app answering /api/chat instantly
+    """
+    if scope["type"] != "http":
+        return
+    more_body = True
+    while more_body:
+        message = await receive()
+        more_body = message.get("more_body", False)
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json")]
+    })
+    await send({"type": "http.response.body", "body": CHAT_REPLY})
+
+def start_mock_server() -> str:
+    """
+    Run the mock server in a background thread
+
+    Returns:
+        Base URL of the running server
+    """
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    config = uvicorn.Config(mock_ollama, host="127.0.0.1", port=port, log_level="error")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+async def per_call_client(base_url: str) -> None:
+    """
+    Previous behaviour: a fresh client (and TCP connection) per chat call
+    """
+    async with httpx.AsyncClient(timeout=120) as client:
+        response = await client.post(
+            f"{base_url}/api/chat",
+            json={"model": "llama3.2", "messages": [{"role": "user", "content": "ping"}]}
+        )
+        response.raise_for_status()
+
+async def run(label: str, call, total: int, concurrency: int) -> float:
+    """
+    Execute `total` calls with at most `concurrency` in flight
+
+    Returns:
+        Requests per second
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    rps = total / elapsed
+    print(f"{label:<22} {total} requests in {elapsed:.2f}s -> {rps:,.0f} req/s")
+    return rps
+
+async def main(total: int, concurrency: int) -> None:
+    base_url = start_mock_server()
+    print(f"Mock Ollama at {base_url} | requests={total} concurrency={concurrency}\n")
+
+    before = await run("per-call client", lambda: per_call_client(base_url), total, concurrency)
+
+    service = OllamaService()
+    service.base_url = base_url
+    await service.start()
+    try:
+        after = await run("shared pooled client", lambda: service.chat("ping"), total, concurrency)
+    finally:
+        await service.close()
+
+    print(f"\nSpeedup: {after / before:.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Total chat calls per strategy")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight calls")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
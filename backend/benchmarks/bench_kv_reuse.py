@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-history /api/chat turns vs. session-pinned /api/generate turns
+
+Runs the same multi-turn conversation both ways through OllamaService and
+reports prompt_eval_count and prompt_eval_duration per turn. In pinned mode
+the previous turn's context tokens are sent back, so Ollama only evaluates
+the new message.
+
+Usage:
+    python -m benchmarks.bench_kv_reuse --turns 8
+    python -m benchmarks.bench_kv_reuse --ollama-url http://localhost:11434 --model llama3.2
+"""
+
+import argparse
+import asyncio
+from contextlib import nullcontext
+from typing import Dict, Any, List
+
+from app.services.ollama_service import OllamaService
+from benchmarks.mock_ollama import MockConfig, running_mock
+
+QUESTIONS = [
+    "What is a Raspberry Pi and what is it commonly used for?",
+    "How much memory does the Raspberry Pi 5 have?",
+    "Can it run a small language model locally?",
+    "What limits the speed of prompt evaluation on it?",
+    "How does quantization help with that?",
+    "Which model sizes are practical on 8GB of RAM?",
+    "How should I cool the board under sustained load?",
+    "Summarize what we discussed in one sentence."
+]
+
+async def run_chat(service: OllamaService, model: str, turns: int) -> List[Dict[str, Any]]:
+    """
+    Resend the whole history every turn (the default chat path)
+    """
+    history: List[Dict[str, str]] = []
+    results = []
+    for i in range(turns):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        result = await service.chat(question, model=model, conversation_history=history)
+        history = [*history, {"role": "user", "content": question},
+                   {"role": "assistant", "content": result["response"]}]
+        results.append(result)
+    return results
+
+async def run_pinned(service: OllamaService, model: str, turns: int) -> List[Dict[str, Any]]:
+    """
+    Carry Ollama's context tokens from turn to turn
+    """
+    context = None
+    results = []
+    for i in range(turns):
+        result = await service.generate(QUESTIONS[i % len(QUESTIONS)], model=model, context=context)
+        context = result["context"]
+        results.append(result)
+    return results
+
+def report(name: str, results: List[Dict[str, Any]]) -> Dict[str, float]:
+    print(f"\n{name}")
+    print(f"{'turn':>4} {'prompt tokens':>14} {'prompt eval ms':>15}")
+    for i, r in enumerate(results, 1):
+        print(f"{i:>4} {r['prompt_eval_count'] or 0:>14} {(r['prompt_eval_duration'] or 0) / 1e6:>15.1f}")
+    tokens = sum(r["prompt_eval_count"] or 0 for r in results)
+    duration = sum(r["prompt_eval_duration"] or 0 for r in results) / 1e9
+    print(f"{'sum':>4} {tokens:>14} {duration * 1000:>15.1f}")
+    return {"tokens": tokens, "seconds": duration}
+
+async def main_async(args, base_url: str) -> None:
+    service = OllamaService()
+    service.base_url = base_url
+    try:
+        chat = report("Full history (/api/chat)", await run_chat(service, args.model, args.turns))
+        pinned = report("Session-pinned context (/api/generate)", await run_pinned(service, args.model, args.turns))
+    finally:
+        await service.close()
+    
+    print(f"\nPrompt tokens evaluated: {chat['tokens']} -> {pinned['tokens']} "
+          f"({pinned['tokens'] / max(chat['tokens'], 1):.0%})")
+    print(f"Prompt eval time: {chat['seconds']:.2f}s -> {pinned['seconds']:.2f}s")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--model", default="llama3.2")
+    parser.add_argument("--ollama-url", help="Use a real Ollama instead of the mock")
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=200.0,
+                        help="Mock prompt evaluation speed")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="Mock reply length")
+    args = parser.parse_args()
+    
+    config = MockConfig(prompt_tokens_per_second=args.prompt_tokens_per_second, reply_tokens=args.reply_tokens)
+    with nullcontext(None) if args.ollama_url else running_mock(config) as mock:
+        asyncio.run(main_async(args, args.ollama_url or mock.base_url))
+
+if __name__ == "__main__":
+    main()
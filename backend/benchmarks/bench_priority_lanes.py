@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: interactive chat latency while a bulk load saturates the model
+
+One generation slot is shared by an interactive user (one chat at a time,
+with think time between them) and a number of bulk workers that keep the
+queue full. The same interactive workload runs three times:
+
+* idle: no bulk load
+* arrival order: bulk load, everyone in the same lane (the old FIFO queue)
+* priority lanes: bulk load in the bulk lane, the user in the interactive lane
+
+With lanes, the interactive p95 should stay close to idle (at most one bulk
+generation ahead of it); in arrival order it grows with the queue length.
+
+Usage:
+    python -m benchmarks.bench_priority_lanes --interactive-requests 30 --bulk-workers 6
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+
+from app.services.ollama_service import OllamaService
+from app.services.scheduler import RequestScheduler
+from app.services.stats import RingBuffer
+from benchmarks.mock_ollama import MockConfig, running_mock
+
+MODEL = "llama3.2"
+
+async def run_phase(
+    base_url: str,
+    args: argparse.Namespace,
+    bulk_priority: Optional[str],
+    interactive_priority: str
+) -> Dict[str, float]:
+    """
+    Run the interactive workload, optionally next to a bulk load
+    
+    Args:
+        base_url: Mock Ollama URL
+        args: Command line arguments
+        bulk_priority: Lane of the bulk workers, or None for no bulk load
+        interactive_priority: Lane of the interactive user
+    
+    Returns:
+        Interactive latency percentiles plus the number of bulk replies
+    """
+    service = OllamaService()
+    service.base_url = base_url
+    scheduler = RequestScheduler(
+        concurrency=1, max_queue=args.bulk_workers + 1, model_concurrency={},
+        starvation_limit=args.starvation_limit
+    )
+    latencies = RingBuffer(args.interactive_requests)
+    bulk_done = 0
+    stop = asyncio.Event()
+    rng = random.Random(1)
+    
+    async def ask(message: str, priority: str) -> None:
+        await service.chat(
+            message, model=MODEL, slot=lambda check: scheduler.slot(MODEL, check, priority)
+        )
+    
+    async def bulk_worker(worker: int) -> None:
+        nonlocal bulk_done
+        n = 0
+        while not stop.is_set():
+            # Distinct prompts, so identical requests are not coalesced
+            await ask(f"bulk {worker}-{n}: summarize this document", bulk_priority)
+            bulk_done += 1
+            n += 1
+    
+    async def interactive_user() -> None:
+        for i in range(args.interactive_requests):
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_time)
+            start = time.perf_counter()
+            await ask(f"interactive {i}: what time is it?", interactive_priority)
+            latencies.append(time.perf_counter() - start)
+    
+    workers = []
+    if bulk_priority is not None:
+        workers = [asyncio.create_task(bulk_worker(w)) for w in range(args.bulk_workers)]
+    try:
+        await interactive_user()
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await service.close()
+    return {**latencies.percentiles(), "bulk": bulk_done}
+
+async def main_async(args: argparse.Namespace, base_url: str) -> None:
+    phases = [
+        ("idle", None, "interactive"),
+        ("arrival order", "standard", "standard"),
+        ("priority lanes", "bulk", "interactive")
+    ]
+    print(f"{'phase':<16} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'bulk done':>10}")
+    for name, bulk_priority, interactive_priority in phases:
+        result = await run_phase(base_url, args, bulk_priority, interactive_priority)
+        print(f"{name:<16} {result['p50']:>7.3f} {result['p95']:>7.3f} {result['p99']:>7.3f} {result['bulk']:>10}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interactive-requests", type=int, default=30)
+    parser.add_argument("--bulk-workers", type=int, default=6, help="Concurrent bulk requests kept queued")
+    parser.add_argument("--think-time", type=float, default=0.4, help="Mean seconds between interactive chats")
+    parser.add_argument("--starvation-limit", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="Mock generation speed")
+    parser.add_argument("--reply-tokens", type=int, default=16, help="Mock reply length")
+    args = parser.parse_args()
+    
+    config = MockConfig(latency=args.latency, tokens_per_second=args.tokens_per_second, reply_tokens=args.reply_tokens)
+    with running_mock(config) as mock:
+        asyncio.run(main_async(args, mock.base_url))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: server CPU microseconds per request, default vs. FAST_JSON_ENABLED
+
+Drives the app in-process over ASGI with an in-memory Ollama stand-in that
+answers from pre-built bytes, so the CPU time measured is the server's own
+work per request (routing, validation, serialization, middleware) plus a
+small constant for the in-process client. Each mode runs in a fresh
+interpreter, since the setting is read when the app is built; the modes
+alternate for --rounds rounds and the fastest round of each is reported,
+which keeps scheduler noise on a shared machine out of the comparison.
+
+Usage:
+    python -m benchmarks.bench_serialization --requests 2000 --rounds 3
+    python -m benchmarks.bench_serialization --mode fast --json  # one mode, machine readable
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict
+
+import httpx
+
+CHAT_REPLY = json.dumps({
+    "model": "llama3.2",
+    "message": {"role": "assistant", "content": "Rayleigh scattering makes the sky look blue. " * 8},
+    "done": True,
+    "total_duration": 2_000_000_000,
+    "load_duration": 10_000_000,
+    "prompt_eval_count": 26,
+    "prompt_eval_duration": 500_000_000,
+    "eval_count": 112,
+    "eval_duration": 1_400_000_000
+}).encode()
+STREAM_REPLY = b"".join(
+    json.dumps({"model": "llama3.2", "message": {"role": "assistant", "content": f" tok{i}"}, "done": False}).encode()
+    + b"\n"
+    for i in range(32)
+) + CHAT_REPLY + b"\n"
+TAGS_REPLY = json.dumps({
+    "models": [
+        {"name": f"model-{i}:latest", "size": 2_000_000_000 + i, "modified_at": "2025-11-10T12:00:00Z"}
+        for i in range(8)
+    ]
+}).encode()
+
+def ollama_handler(request: httpx.Request) -> httpx.Response:
+    headers = {"content-type": "application/json"}
+    if request.url.path == "/api/chat":
+        body = json.loads(request.content)
+        return httpx.Response(200, content=STREAM_REPLY if body.get("stream") else CHAT_REPLY, headers=headers)
+    return httpx.Response(200, content=TAGS_REPLY, headers=headers)
+
+async def measure(requests: int) -> Dict[str, float]:
+    """
+    CPU microseconds per request for each endpoint in this process's mode
+    """
+    from app.main import app
+    from app.services.ollama_service import ollama_service
+    
+    ollama_service._client = httpx.AsyncClient(transport=httpx.MockTransport(ollama_handler))
+    chat = {"message": "Why is the sky blue?", "bypass_cache": True}
+    cases = {
+        "GET /": ("GET", "/", None),
+        "GET /api/health": ("GET", "/api/health", None),
+        "GET /api/models": ("GET", "/api/models", None),
+        "GET /api/stats": ("GET", "/api/stats", None),
+        "POST /api/chat": ("POST", "/api/chat", chat),
+        "POST /api/chat (cached)": ("POST", "/api/chat", {"message": "Why is the sky blue?", "options": {"temperature": 0}}),
+        "POST /api/chat (stream)": ("POST", "/api/chat", {**chat, "stream": True})
+    }
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, (method, path, body) in cases.items():
+            for _ in range(max(20, requests // 20)):
+                await client.request(method, path, json=body)
+            start = time.process_time()
+            for _ in range(requests):
+                response = await client.request(method, path, json=body)
+            elapsed = time.process_time() - start
+            assert response.status_code == 200, f"{name}: {response.status_code}"
+            results[name] = elapsed / requests * 1e6
+    await ollama_service._client.aclose()
+    return results
+
+def run_mode(mode: str, requests: int) -> Dict[str, float]:
+    """
+    Measure one mode in a fresh interpreter
+    """
+    env = {**os.environ, "FAST_JSON_ENABLED": "True" if mode == "fast" else "False"}
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_serialization", "--mode", mode, "--json",
+         "--requests", str(requests)],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint")
+    parser.add_argument("--rounds", type=int, default=3, help="Alternating runs per mode (best is kept)")
+    parser.add_argument("--mode", choices=["default", "fast"], help="Measure one mode in this process")
+    parser.add_argument("--json", action="store_true", help="Print the results as one JSON line")
+    args = parser.parse_args()
+    
+    if args.mode:
+        import logging
+        logging.disable(logging.INFO)
+        results = asyncio.run(measure(args.requests))
+        if args.json:
+            print(json.dumps(results))
+        else:
+            for name, micros in results.items():
+                print(f"{name:<26} {micros:>9.1f} us")
+        return
+    
+    default: Dict[str, float] = {}
+    fast: Dict[str, float] = {}
+    for _ in range(args.rounds):
+        for best, mode in ((default, "default"), (fast, "fast")):
+            for name, micros in run_mode(mode, args.requests).items():
+                best[name] = min(micros, best.get(name, micros))
+    print(f"{'endpoint':<26} {'default us':>11} {'fast us':>9} {'saved':>7}")
+    for name in default:
+        saved = 1 - fast[name] / default[name]
+        print(f"{name:<26} {default[name]:>11.1f} {fast[name]:>9.1f} {saved:>7.0%}")
+
+if __name__ == "__main__":
+    main()
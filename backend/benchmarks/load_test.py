@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Load test the chatbot server against a local mock Ollama
+
+Starts a mock Ollama (benchmarks/mock_ollama.py) and the server in a
+subprocess, then drives /api/chat, /api/health and /api/models at each
+concurrency level. Reports p50/p95/p99 latency, throughput, errors and the
+server's CPU and RSS, and writes the results as JSON so runs can be compared
+across commits.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1 4 16 --requests 200
+    python -m benchmarks.load_test --compare benchmarks/results/old.json
+    python -m benchmarks.load_test --server-url http://raspberrypi:8000  # existing server
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+
+import httpx
+
+from benchmarks.mock_ollama import MockConfig, running_mock, free_port
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+ENDPOINTS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "chat": lambda i: {
+        "method": "POST",
+        "url": "/api/chat",
+        "json": {"message": f"Benchmark prompt {i}", "bypass_cache": True}
+    },
+    "health": lambda i: {"method": "GET", "url": "/api/health"},
+    "models": lambda i: {"method": "GET", "url": "/api/models"}
+}
+
+def percentile(ordered: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list
+    """
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class ProcessSampler:
+    """
+    Samples a process's CPU time and RSS from /proc while a scenario runs
+    """
+    
+    def __init__(self, pid: Optional[int], interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.max_rss = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cpu_start = self._wall_start = 0.0
+        self.cpu_percent = 0.0
+    
+    def _cpu_seconds(self) -> float:
+        fields = Path(f"/proc/{self.pid}/stat").read_text().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    
+    def _rss_bytes(self) -> int:
+        for line in Path(f"/proc/{self.pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+        return 0
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.max_rss = max(self.max_rss, self._rss_bytes())
+            self._stop.wait(self.interval)
+    
+    def __enter__(self) -> "ProcessSampler":
+        if self.pid and Path(f"/proc/{self.pid}").exists():
+            self._cpu_start = self._cpu_seconds()
+            self._wall_start = time.monotonic()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        wall = time.monotonic() - self._wall_start
+        self.cpu_percent = 100.0 * (self._cpu_seconds() - self._cpu_start) / wall if wall else 0.0
+
+async def run_scenario(
+    base_url: str,
+    endpoint: str,
+    concurrency: int,
+    total: int,
+    pid: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Fire `total` requests at one endpoint with `concurrency` in flight
+    
+    Returns:
+        Latency percentiles (ms), throughput, error count, server CPU% and RSS
+    """
+    build = ENDPOINTS[endpoint]
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(**build(i))
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+        
+        with ProcessSampler(pid) as sampler:
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+    
+    ordered = sorted(latencies)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "elapsed": round(elapsed, 3),
+        "throughput": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        "server_cpu_percent": round(sampler.cpu_percent, 1),
+        "server_max_rss_mb": round(sampler.max_rss / 1024 ** 2, 1)
+    }
+
+def start_server(
+    ollama_url: str,
+    port: int,
+    extra_env: Dict[str, str],
+    verbose: bool = False
+) -> subprocess.Popen:
+    """
+    Start the chatbot server with uvicorn and wait until it answers
+    """
+    env = {
+        **os.environ,
+        "OLLAMA_BASE_URL": ollama_url,
+        "WARMUP_MODELS": "[]",
+        "SCHEDULER_MAX_QUEUE": "1000",
+        **extra_env
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=None if verbose else subprocess.DEVNULL,
+        stderr=None if verbose else subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not start within 30s")
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = f"{'endpoint':<8} {'conc':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>5} {'cpu%':>6} {'rss MB':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['endpoint']:<8} {r['concurrency']:>4} {r['throughput']:>9.1f} {r['p50_ms']:>9.1f} "
+            f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errors']:>5} {r['server_cpu_percent']:>6.1f} "
+            f"{r['server_max_rss_mb']:>7.1f}"
+        )
+
+def compare(current: List[Dict[str, Any]], baseline_path: str) -> None:
+    """
+    Print throughput and p95 changes against a previous results file
+    """
+    baseline = json.loads(Path(baseline_path).read_text())
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for r in current:
+        old = previous.get((r["endpoint"], r["concurrency"]))
+        if not old:
+            continue
+        throughput = (r["throughput"] / old["throughput"] - 1) * 100 if old["throughput"] else 0.0
+        p95 = (r["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0.0
+        print(f"  {r['endpoint']:<8} c={r['concurrency']:<3} req/s {throughput:+6.1f}%   p95 {p95:+6.1f}%")
+
+async def run_all(args, base_url: str, pid: Optional[int]) -> List[Dict[str, Any]]:
+    results = []
+    for endpoint in args.endpoints:
+        for concurrency in args.concurrency:
+            results.append(await run_scenario(base_url, endpoint, concurrency, args.requests, pid))
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and level")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock: seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Mock: generation speed")
+    parser.add_argument("--reply-tokens", type=int, default=16, help="Mock: tokens per reply")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock: fraction of failed chats")
+    parser.add_argument("--slots", type=int, default=4, help="Server SCHEDULER_CONCURRENCY")
+    parser.add_argument("--verbose", action="store_true", help="Show the server's log output")
+    parser.add_argument("--server-url", help="Benchmark an already running server instead")
+    parser.add_argument("--server-pid", type=int, help="PID of --server-url for CPU/RSS sampling")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+    
+    config = MockConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        seed=1
+    )
+    
+    if args.server_url:
+        results = asyncio.run(run_all(args, args.server_url, args.server_pid))
+    else:
+        with running_mock(config) as mock:
+            port = free_port()
+            server = start_server(mock.base_url, port, {"SCHEDULER_CONCURRENCY": str(args.slots)}, args.verbose)
+            try:
+                results = asyncio.run(run_all(args, f"http://127.0.0.1:{port}", server.pid))
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+    
+    print_table(results)
+    
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "mock": vars(config) if not args.server_url else None,
+            "slots": args.slots,
+            "requests": args.requests,
+            "server_url": args.server_url
+        },
+        "results": results
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+    
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Ollama HTTP API for tests and benchmarks
+
+Implements the endpoints the server uses (/api/tags, /api/ps, /api/chat,
+/api/generate) with configurable latency, generation speed, streaming chunk
+size and error injection, so runs are reproducible without a real model.
+
+Usage:
+    python -m benchmarks.mock_ollama --port 11435 --latency 0.05 --tokens-per-second 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Iterator, Optional, Callable
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+@dataclass
+class MockConfig:
+    """
+    Behaviour of the mock server
+    """
+    latency: float = 0.0  # seconds before the first token (prompt evaluation)
+    prompt_tokens_per_second: float = 0.0  # extra prompt evaluation time per token; 0 = free
+    tokens_per_second: float = 0.0  # generation speed; 0 = instant
+    reply_tokens: int = 16  # tokens per reply
+    chunk_tokens: int = 1  # tokens per streamed chunk
+    load_time: float = 0.0  # extra delay the first time a model is used
+    error_rate: float = 0.0  # fraction of chat requests answered with error_status
+    error_status: int = 500
+    models: List[str] = field(default_factory=lambda: ["llama3.2:latest"])
+    model_size: int = 2 * 1024 ** 3
+    seed: Optional[int] = None
+
+@dataclass
+class MockStats:
+    """
+    Counters the tests and benchmarks can inspect
+    """
+    requests: Dict[str, int] = field(default_factory=dict)
+    chats: int = 0
+    active: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    errors: int = 0
+
+class MockOllama:
+    """
+    The mock server state and ASGI application
+    """
+    
+    def __init__(self, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        self.loaded: Dict[str, float] = {}  # model -> load timestamp
+        self._random = random.Random(self.config.seed)
+        self.app = Starlette(routes=[
+            Route("/api/tags", self.tags, methods=["GET"]),
+            Route("/api/ps", self.ps, methods=["GET"]),
+            Route("/api/chat", self.chat, methods=["POST"]),
+            Route("/api/generate", self.generate, methods=["POST"])
+        ])
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            path = scope["path"]
+            self.stats.requests[path] = self.stats.requests.get(path, 0) + 1
+        await self.app(scope, receive, send)
+    
+    @staticmethod
+    def _canonical(model: str) -> str:
+        return model if ":" in model else f"{model}:latest"
+    
+    async def tags(self, request: Request) -> JSONResponse:
+        return JSONResponse({"models": [
+            {"name": name, "size": self.config.model_size, "modified_at": "2025-11-05T10:30:00Z"}
+            for name in self.config.models
+        ]})
+    
+    async def ps(self, request: Request) -> JSONResponse:
+        return JSONResponse({"models": [
+            {"name": name, "size": self.config.model_size, "size_vram": 0, "expires_at": None}
+            for name in self.loaded
+        ]})
+    
+    async def _load(self, model: str) -> int:
+        """
+        Simulate a cold load; returns load_duration in nanoseconds
+        """
+        name = self._canonical(model)
+        if name in self.loaded:
+            return 1_000_000
+        await asyncio.sleep(self.config.load_time)
+        self.loaded[name] = time.time()
+        return int(self.config.load_time * 1e9) + 1_000_000
+    
+    async def generate(self, request: Request):
+        body = await request.json()
+        name = self._canonical(body["model"])
+        if not body.get("prompt"):
+            if body.get("keep_alive") in (0, "0"):
+                self.loaded.pop(name, None)
+                return JSONResponse({"model": body["model"], "response": "", "done": True, "done_reason": "unload"})
+            load_duration = await self._load(body["model"])
+            return JSONResponse({
+                "model": body["model"],
+                "response": "",
+                "done": True,
+                "done_reason": "load",
+                "load_duration": load_duration
+            })
+        
+        # Tokens in `context` are already in the KV cache; only the new
+        # system/prompt text is evaluated
+        prompt_tokens = self._text_tokens(body.get("system") or "") + self._text_tokens(body["prompt"])
+        context = list(body.get("context") or [])
+        context.extend(range(len(context), len(context) + prompt_tokens + self.config.reply_tokens))
+        return await self._respond(
+            body,
+            prompt_tokens,
+            lambda text: {"response": text},
+            {"response": "", "context": context}
+        )
+    
+    @staticmethod
+    def _text_tokens(text: str) -> int:
+        return max(1, len(text) // 4) if text else 0
+    
+    def _prompt_tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(self._text_tokens(m.get("content", "")) or 1 for m in messages)
+    
+    async def chat(self, request: Request):
+        body = await request.json()
+        return await self._respond(
+            body,
+            self._prompt_tokens(body.get("messages", [])),
+            lambda text: {"message": {"role": "assistant", "content": text}},
+            {"message": {"role": "assistant", "content": ""}}
+        )
+    
+    async def _respond(
+        self,
+        body: Dict[str, Any],
+        prompt_tokens: int,
+        wrap: Callable[[str], Dict[str, Any]],
+        final_extra: Dict[str, Any]
+    ):
+        """
+        Answer a chat or generate request, streamed or not
+        
+        Args:
+            body: Request body
+            prompt_tokens: Tokens that need prompt evaluation
+            wrap: Builds the endpoint-specific part of a chunk from its text
+            final_extra: Endpoint-specific fields of the final chunk
+        """
+        self.stats.chats += 1
+        if self.config.error_rate and self._random.random() < self.config.error_rate:
+            self.stats.errors += 1
+            return JSONResponse({"error": "injected failure"}, status_code=self.config.error_status)
+        
+        model = body["model"]
+        if body.get("stream", True):
+            return StreamingResponse(
+                self._stream(model, prompt_tokens, wrap, final_extra),
+                media_type="application/x-ndjson"
+            )
+        
+        self.stats.active += 1
+        try:
+            start = time.monotonic()
+            load_duration = await self._load(model)
+            await self._evaluate_prompt(prompt_tokens)
+            prompt_eval_end = time.monotonic()
+            if self.config.tokens_per_second:
+                await asyncio.sleep(self.config.reply_tokens / self.config.tokens_per_second)
+            self.stats.completed += 1
+        except asyncio.CancelledError:
+            self.stats.cancelled += 1
+            raise
+        finally:
+            self.stats.active -= 1
+        
+        reply = " ".join(f"tok{i}" for i in range(self.config.reply_tokens))
+        return JSONResponse(self._final(
+            model, start, load_duration, prompt_tokens, prompt_eval_end, {**final_extra, **wrap(reply)}
+        ))
+    
+    async def _evaluate_prompt(self, prompt_tokens: int) -> None:
+        delay = self.config.latency
+        if self.config.prompt_tokens_per_second:
+            delay += prompt_tokens / self.config.prompt_tokens_per_second
+        await asyncio.sleep(delay)
+    
+    async def _stream(
+        self,
+        model: str,
+        prompt_tokens: int,
+        wrap: Callable[[str], Dict[str, Any]],
+        final_extra: Dict[str, Any]
+    ):
+        self.stats.active += 1
+        try:
+            start = time.monotonic()
+            load_duration = await self._load(model)
+            await self._evaluate_prompt(prompt_tokens)
+            prompt_eval_end = time.monotonic()
+            per_chunk = (
+                self.config.chunk_tokens / self.config.tokens_per_second
+                if self.config.tokens_per_second else 0.0
+            )
+            for i in range(0, self.config.reply_tokens, self.config.chunk_tokens):
+                if per_chunk:
+                    await asyncio.sleep(per_chunk)
+                count = min(self.config.chunk_tokens, self.config.reply_tokens - i)
+                text = "".join(f"tok{i + j} " for j in range(count))
+                yield json.dumps({"model": model, **wrap(text), "done": False}) + "\n"
+            self.stats.completed += 1
+            yield json.dumps(self._final(
+                model, start, load_duration, prompt_tokens, prompt_eval_end, final_extra
+            )) + "\n"
+        except (asyncio.CancelledError, GeneratorExit):
+            self.stats.cancelled += 1
+            raise
+        finally:
+            self.stats.active -= 1
+    
+    def _final(
+        self,
+        model: str,
+        start: float,
+        load_duration: int,
+        prompt_tokens: int,
+        prompt_eval_end: float,
+        extra: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        end = time.monotonic()
+        return {
+            "model": model,
+            "done": True,
+            "total_duration": int((end - start) * 1e9),
+            "load_duration": load_duration,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": max(1, int((prompt_eval_end - start) * 1e9) - load_duration),
+            "eval_count": self.config.reply_tokens,
+            "eval_duration": max(1, int((end - prompt_eval_end) * 1e9)),
+            **extra
+        }
+
+def free_port() -> int:
+    """
+    Pick an unused local TCP port
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextmanager
+def running_mock(config: Optional[MockConfig] = None, port: Optional[int] = None) -> Iterator[MockOllama]:
+    """
+    Run a mock Ollama in a background thread for the duration of the block
+    
+    Yields:
+        The MockOllama instance; its base URL is available as .base_url
+    """
+    mock = MockOllama(config)
+    port = port or free_port()
+    server = uvicorn.Server(uvicorn.Config(mock, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.02)
+    mock.base_url = f"http://127.0.0.1:{port}"
+    try:
+        yield mock
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=0.0, help="Prompt evaluation speed (0 = free)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Generation speed (0 = instant)")
+    parser.add_argument("--reply-tokens", type=int, default=16)
+    parser.add_argument("--chunk-tokens", type=int, default=1, help="Tokens per streamed chunk")
+    parser.add_argument("--load-time", type=float, default=0.0, help="Cold model load delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of chats that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--model", action="append", help="Model names to advertise")
+    args = parser.parse_args()
+    
+    config = MockConfig(
+        latency=args.latency,
+        prompt_tokens_per_second=args.prompt_tokens_per_second,
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        chunk_tokens=args.chunk_tokens,
+        load_time=args.load_time,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        models=args.model or ["llama3.2:latest"]
+    )
+    uvicorn.run(MockOllama(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
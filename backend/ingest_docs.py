@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Build the document index used to ground chat replies in local docs
+
+Text and markdown files (.md, .markdown, .txt, .rst) under the given paths
+are split into overlapping chunks, embedded with Ollama (RAG_EMBED_MODEL,
+which must be pulled first) and written to RAG_INDEX_PATH as float16
+memory-mapped vectors plus an SQLite BM25 index. Re-running replaces the
+index; a running server picks up the new one on its next query.
+
+With --no-embed only the keyword (BM25) index is built, which needs no
+Ollama and suits slow machines; retrieval then uses keywords alone.
+
+Usage:
+    python ingest_docs.py docs/ README.md
+    python ingest_docs.py docs/ -o /var/lib/chatbot/docs_index --chunk-words 120
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+
+async def ingest(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Index the documents, embedding in-process through OllamaService
+    """
+    from app.services.retrieval import build_index
+    from app.services.ollama_service import ollama_service
+    
+    if args.no_embed:
+        return await build_index(args.paths, args.output, None, args.chunk_words, args.overlap)
+    
+    await ollama_service.start()
+    try:
+        return await build_index(
+            args.paths,
+            args.output,
+            lambda text: ollama_service.embed(text, args.embed_model),
+            args.chunk_words,
+            args.overlap,
+            embed_model=args.embed_model,
+            concurrency=args.concurrency
+        )
+    finally:
+        await ollama_service.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Files or directories to index")
+    parser.add_argument("-o", "--output", default=settings.RAG_INDEX_PATH, help="Index directory")
+    parser.add_argument("--chunk-words", type=int, default=settings.RAG_CHUNK_WORDS, help="Words per chunk")
+    parser.add_argument("--overlap", type=int, default=settings.RAG_CHUNK_OVERLAP, help="Words shared by consecutive chunks")
+    parser.add_argument("--embed-model", default=settings.RAG_EMBED_MODEL, help="Ollama embedding model")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding requests in flight")
+    parser.add_argument("--no-embed", action="store_true", help="Build a keyword-only index")
+    args = parser.parse_args(argv)
+    
+    if not 0 <= args.overlap < args.chunk_words:
+        parser.error("--overlap must be smaller than --chunk-words")
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        parser.error(f"no such file or directory: {', '.join(missing)}")
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        parser.error("numpy is required (pip install -r requirements.txt)")
+    
+    start = time.time()
+    summary = asyncio.run(ingest(args))
+    print(
+        f"Indexed {summary['chunks']} chunks ({summary['terms']} terms) from {summary['documents']} "
+        f"documents into {args.output} in {time.time() - start:.1f}s",
+        file=sys.stderr
+    )
+    return 0 if summary["chunks"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Profile server start-up: where the import and init time goes
+
+Part 1 imports the app in a fresh interpreter with `python -X importtime`
+and lists the slowest modules, both by their own import time and by
+package. The startup timeline comes from running the app's startup handlers
+in this process against the configured Ollama, up to the moment the
+WARMUP_MODELS are loaded (the same stages /api/ready reports).
+
+Run it on the Pi itself; a desktop is often ten times faster.
+
+Usage:
+    python profile_startup.py
+    python profile_startup.py --top 30 --no-init
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+def import_times() -> List[Tuple[str, int, int]]:
+    """
+    Import app.main in a fresh interpreter with -X importtime
+    
+    Returns:
+        (module, self microseconds, cumulative microseconds) per module
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+def print_imports(modules: List[Tuple[str, int, int]], top: int) -> None:
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+    total = sum(by_package.values())
+    
+    print(f"Imports: {total / 1e6:.3f}s for {len(modules)} modules\n")
+    print(f"{'package':<32} {'seconds':>8} {'share':>6}")
+    for package, micros in sorted(by_package.items(), key=lambda p: -p[1])[:top]:
+        print(f"{package:<32} {micros / 1e6:>8.3f} {micros / total:>6.0%}")
+    print(f"\n{'module (own time)':<48} {'seconds':>8}")
+    for name, self_us, _ in sorted(modules, key=lambda m: -m[1])[:top]:
+        print(f"{name:<48} {self_us / 1e6:>8.3f}")
+
+async def profile_init(timeout: float) -> Dict[str, float]:
+    """
+    Run the startup handlers and wait for the warm-up to finish
+    
+    Returns:
+        The startup timeline (seconds since process start per stage)
+    """
+    from app.main import app
+    from app.core.startup import startup_timeline
+    from app.services.residency import residency_manager
+    
+    await app.router.startup()
+    try:
+        deadline = time.monotonic() + timeout
+        while not residency_manager.ready and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if residency_manager.ready:
+            startup_timeline.mark("models_warm")
+        else:
+            print(f"Warm-up did not finish within {timeout:.0f}s: {residency_manager.readiness()}", file=sys.stderr)
+        return startup_timeline.stages()
+    finally:
+        await app.router.shutdown()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--no-init", action="store_true", help="Only profile imports (no Ollama needed)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for the warm-up")
+    args = parser.parse_args(argv)
+    
+    # Init first, so the timeline is not skewed by the import subprocess
+    stages = None if args.no_init else asyncio.run(profile_init(args.timeout))
+    print_imports(import_times(), args.top)
+    if stages is None:
+        return 0
+    
+    print(f"\n{'startup stage':<16} {'at s':>8} {'took s':>8}")
+    previous = 0.0
+    for stage, at in stages.items():
+        print(f"{stage:<16} {at:>8.3f} {at - previous:>8.3f}")
+        previous = at
+    return 0 if "models_warm" in stages else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import httpx
+import pytest
+
+from app.services.ollama_service import ollama_service
+from app.services.health_monitor import health_monitor
+from app.services.response_cache import response_cache
+from app.services.model_catalog import model_catalog
+
+@pytest.fixture
+def mock_ollama():
+    """
+    Route the shared Ollama client through a mock transport
+    
+    Usage: mock_ollama(handler) where handler(httpx.Request) -> httpx.Response
+    """
+    original = ollama_service._client
+    
+    def install(handler):
+        ollama_service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        health_monitor.healthy = None
+        response_cache.clear()
+        model_catalog._entry = None
+        ollama_service.pool.reset()
+    
+    yield install
+    ollama_service._client = original
+    health_monitor.healthy = None
+    response_cache.clear()
+    model_catalog._entry = None
+    ollama_service.pool.reset()
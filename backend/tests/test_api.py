@@ -1,3 +1,6 @@
+import json
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -60,6 +63,53 @@ class TestChatEndpoint:
         # Should accept request even without model specified
         assert response.status_code in [200, 503]
 
+def streaming_ollama(request: httpx.Request) -> httpx.Response:
+    """Mock Ollama that streams two tokens then a final stats chunk"""
+    if request.url.path == "/api/tags":
+        return httpx.Response(200, json={"models": []})
+    lines = [
+        {"message": {"role": "assistant", "content": "Hel"}, "done": False},
+        {"message": {"role": "assistant", "content": "lo"}, "done": False},
+        {"message": {"role": "assistant", "content": ""}, "done": True,
+         "total_duration": 2000, "load_duration": 10, "prompt_eval_count": 3, "eval_count": 2}
+    ]
+    body = "".join(json.dumps(line) + "\n" for line in lines)
+    return httpx.Response(200, content=body.encode())
+
+class TestChatStreaming:
+    """Test cases for streaming chat responses"""
+    
+    def test_stream_sse(self, mock_ollama):
+        """Test stream=true returns SSE frames ending with stats"""
+        mock_ollama(streaming_ollama)
+        response = client.post("/api/chat", json={"message": "Hi", "stream": True})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        
+        frames = [
+            json.loads(line[len("data: "):])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert "".join(f.get("content", "") for f in frames) == "Hello"
+        assert frames[-1]["done"] is True
+        assert frames[-1]["eval_count"] == 2
+        assert "processing_time" in frames[-1]
+    
+    def test_stream_ndjson(self, mock_ollama):
+        """Test NDJSON is used when the client asks for it"""
+        mock_ollama(streaming_ollama)
+        response = client.post(
+            "/api/chat",
+            json={"message": "Hi", "stream": True},
+            headers={"Accept": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        frames = [json.loads(line) for line in response.text.splitlines()]
+        assert frames[-1]["done"] is True
+        assert frames[-1]["prompt_eval_count"] == 3
+
 class TestModelsEndpoint:
     """Test cases for models endpoint"""
     
@@ -74,6 +124,59 @@ class TestModelsEndpoint:
             assert "models" in data
             assert "count" in data
 
+class TestModelCatalog:
+    """Test cases for the cached model list"""
+    
+    @staticmethod
+    def tags_handler(calls):
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": [
+                    {"name": "llama3.2:latest", "size": 2019393189, "modified_at": "2025-11-05"}
+                ]})
+            return httpx.Response(200, json={"done": True})
+        return handler
+    
+    def test_list_is_cached(self, mock_ollama):
+        """Test repeated polls reuse one /api/tags call and one ETag"""
+        calls = []
+        mock_ollama(self.tags_handler(calls))
+        
+        first = client.get("/api/models")
+        second = client.get("/api/models")
+        
+        assert first.status_code == second.status_code == 200
+        assert first.json()["models"][0]["size"] == "1.9GB"
+        assert first.headers["etag"] == second.headers["etag"]
+        assert "last-modified" in first.headers
+        assert calls.count("/api/tags") == 1
+    
+    def test_conditional_requests(self, mock_ollama):
+        """Test matching validators get a bodiless 304"""
+        mock_ollama(self.tags_handler([]))
+        first = client.get("/api/models")
+        
+        by_etag = client.get("/api/models", headers={"If-None-Match": first.headers["etag"]})
+        by_date = client.get("/api/models", headers={"If-Modified-Since": first.headers["last-modified"]})
+        stale = client.get("/api/models", headers={"If-None-Match": '"other"'})
+        
+        assert by_etag.status_code == 304 and by_etag.content == b""
+        assert by_date.status_code == 304
+        assert stale.status_code == 200
+    
+    def test_load_invalidates(self, mock_ollama):
+        """Test loading a model forces the next poll to refetch"""
+        calls = []
+        mock_ollama(self.tags_handler(calls))
+        
+        etag = client.get("/api/models").headers["etag"]
+        client.post("/api/models/load", json={"model": "llama3.2"})
+        refreshed = client.get("/api/models", headers={"If-None-Match": etag})
+        
+        assert calls.count("/api/tags") == 2
+        assert refreshed.status_code == 304
+
 class TestModelManagement:
     """Test cases for model load/unload endpoints"""
     
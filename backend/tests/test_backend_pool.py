@@ -0,0 +1,153 @@
+import asyncio
+from typing import Dict
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.backend_pool import BackendPool
+from app.services.ollama_service import OllamaService
+from benchmarks.mock_ollama import MockConfig, MockOllama
+
+class NodeTransport(httpx.AsyncBaseTransport):
+    """Serve several mock Ollama nodes in-process, keyed by host name"""
+    
+    def __init__(self, nodes: Dict[str, MockOllama]):
+        self.transports = {host: httpx.ASGITransport(app=mock) for host, mock in nodes.items()}
+        self.down = set()
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host in self.down:
+            raise httpx.ConnectError("connection refused", request=request)
+        return await self.transports[request.url.host].handle_async_request(request)
+
+def make_cluster(count=3, config=None):
+    """Build a service load-balancing across `count` mock nodes"""
+    nodes = {f"node{i}": MockOllama(config or MockConfig(reply_tokens=2)) for i in range(count)}
+    transport = NodeTransport(nodes)
+    service = OllamaService()
+    service.pool = BackendPool([f"http://{host}" for host in nodes])
+    service._client = httpx.AsyncClient(transport=transport)
+    return service, nodes, transport
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "OLLAMA_RETRY_BASE_DELAY", 0.0)
+
+class TestBackendSelection:
+    """Test cases for BackendPool.select"""
+    
+    def test_least_outstanding(self):
+        """Test the node with the fewest in-flight requests wins"""
+        pool = BackendPool(["http://a", "http://b"])
+        a, b = pool.backends
+        a.outstanding = 2
+        
+        assert pool.select("llama3.2") is b
+    
+    def test_resident_preferred_within_slack(self):
+        """Test a node with the model loaded wins unless it is much busier"""
+        pool = BackendPool(["http://a", "http://b"], resident_slack=1)
+        a, b = pool.backends
+        pool.mark_resident(b, "llama3.2", True)
+        b.outstanding = 1
+        
+        assert pool.select("llama3.2") is b
+        b.outstanding = 2
+        assert pool.select("llama3.2") is a
+    
+    def test_session_affinity(self):
+        """Test a session sticks to its node while the node is available"""
+        pool = BackendPool(["http://a", "http://b"])
+        first = pool.select("llama3.2", session_id="s1")
+        first.outstanding = 5
+        
+        assert pool.select("llama3.2", session_id="s1") is first
+        pool.mark_health(first, False)
+        assert pool.select("llama3.2", session_id="s1") is not first
+    
+    def test_all_ejected_falls_back(self):
+        """Test ejected nodes are still tried when no node is healthy"""
+        pool = BackendPool(["http://a", "http://b"])
+        for backend in pool.backends:
+            pool.mark_health(backend, False)
+        
+        assert pool.select("llama3.2") is not None
+
+class TestMultiBackend:
+    """Test cases for routing chats across several mock nodes"""
+    
+    def test_concurrent_chats_spread(self):
+        """Test simultaneous chats are spread across every node"""
+        service, nodes, _ = make_cluster(3, MockConfig(reply_tokens=2, latency=0.05))
+        
+        async def scenario():
+            await asyncio.gather(*(service.chat(f"Hi {i}", model="llama3.2") for i in range(6)))
+        
+        asyncio.run(scenario())
+        
+        assert [mock.stats.completed for mock in nodes.values()] == [2, 2, 2]
+    
+    def test_failover_ejects_dead_node(self):
+        """Test a refused connection fails over and takes the node out of rotation"""
+        service, nodes, transport = make_cluster(2)
+        transport.down.add("node0")
+        
+        async def scenario():
+            return [await service.chat("Hi", model="llama3.2") for _ in range(3)]
+        
+        results = asyncio.run(scenario())
+        
+        assert all(result["response"] for result in results)
+        assert nodes["node1"].stats.completed == 3
+        assert service.pool.backends[0].healthy is False
+        assert service.pool.backends[0].requests == 1
+    
+    def test_session_stays_on_node(self):
+        """Test a session's turns go to the same node"""
+        service, nodes, _ = make_cluster(3)
+        
+        async def scenario():
+            for _ in range(4):
+                await service.chat("Hi", model="llama3.2", session_id="kiosk")
+        
+        asyncio.run(scenario())
+        
+        assert sorted(mock.stats.completed for mock in nodes.values()) == [0, 0, 4]
+    
+    def test_health_reinstates_node(self):
+        """Test a health probe re-admits a node that came back"""
+        service, _, transport = make_cluster(2)
+        transport.down.add("node0")
+        
+        assert asyncio.run(service.check_health()) is True
+        assert service.pool.backends[0].healthy is False
+        transport.down.clear()
+        service.pool.backends[0].breaker.reset()
+        asyncio.run(service.check_health())
+        assert service.pool.backends[0].healthy is True
+    
+    def test_list_models_merges_nodes(self):
+        """Test the model list is the union of every node's models"""
+        service, nodes, _ = make_cluster(2)
+        nodes["node1"].config.models = ["llama3.2:latest", "phi3:latest"]
+        
+        models = asyncio.run(service.list_models())
+        
+        assert sorted(m["name"] for m in models) == ["llama3.2:latest", "phi3:latest"]
+
+class TestBackendsRoute:
+    """Test cases for the /api/backends endpoint"""
+    
+    def test_backends_snapshot(self, mock_ollama):
+        """Test the endpoint reports each backend"""
+        from fastapi.testclient import TestClient
+        from app.main import app
+        
+        mock_ollama(lambda request: httpx.Response(200, json={"models": []}))
+        response = TestClient(app).get("/api/backends")
+        
+        assert response.status_code == 200
+        backend = response.json()["backends"][0]
+        assert backend["url"] == settings.OLLAMA_BASE_URL.rstrip("/")
+        assert backend["circuit"] == "closed"
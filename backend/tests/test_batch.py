@@ -0,0 +1,74 @@
+import io
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from batch_chat import read_items
+
+client = TestClient(app)
+
+class TestBatchEndpoint:
+    """Test cases for POST /api/chat/batch"""
+    
+    def test_results_tagged_with_ids_and_partial_failure(self, mock_ollama):
+        """Test every item gets a result line and failures stay per item"""
+        def handler(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            prompt = json.loads(request.content)["messages"][-1]["content"]
+            if prompt == "fail":
+                return httpx.Response(500, text="model exploded")
+            return httpx.Response(200, json={"message": {"content": prompt.upper()}, "done": True})
+        
+        mock_ollama(handler)
+        response = client.post("/api/chat/batch", json={
+            "items": [
+                {"id": "a", "message": "alpha"},
+                {"id": "b", "message": "fail"},
+                {"id": "c", "message": "gamma"}
+            ],
+            "concurrency": 2
+        })
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        results = {line["id"]: line for line in lines if "id" in line}
+        assert results["a"]["status"] == "ok" and results["a"]["response"] == "ALPHA"
+        assert results["c"]["response"] == "GAMMA"
+        assert results["b"]["status"] == "error"
+        assert lines[-1] == {**lines[-1], "done": True, "total": 3, "succeeded": 2, "failed": 1}
+
+class TestBatchCli:
+    """Test cases for the JSONL reader of batch_chat.py"""
+    
+    def test_read_items_field_fallbacks(self):
+        """Test ids and prompts are found under alternative field names"""
+        source = io.StringIO(
+            '{"request_id": "user-001", "title": "t", "body": "Do the thing"}\n'
+            '\n'
+            '{"id": 7, "message": "hi", "model": "gemma2"}\n'
+            '{"id": "x"}\n'
+        )
+        items = list(read_items(source, ["id", "request_id"], ["message", "prompt", "body"]))
+        assert items == [
+            {"id": "user-001", "message": "Do the thing"},
+            {"id": "7", "message": "hi", "model": "gemma2"}
+        ]
+    
+    def test_malformed_line_reported_and_skipped(self):
+        """Test a bad JSON line becomes an error result and later lines still run"""
+        source = io.StringIO(
+            '{"id": "a", "message": "one"}\n'
+            '{"id": "b", "message": \n'
+            '["not", "an", "object"]\n'
+            '{"id": "c", "message": "three"}\n'
+        )
+        rejected = []
+        items = list(read_items(source, ["id"], ["message"], rejected))
+        
+        assert [item["id"] for item in items] == ["a", "c"]
+        assert [(r["id"], r["status"], r["line"]) for r in rejected] == [("2", "error", 2), ("3", "error", 3)]
+        assert "line 2" in rejected[0]["error"]
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.main import app
+from app.services.ollama_service import OllamaService
+from app.services.scheduler import (
+    RequestScheduler,
+    ClientDisconnectedError,
+    cancel_on_disconnect,
+    request_scheduler
+)
+from tests.test_mock_ollama import make_service
+from tests.test_websocket import EndlessStream
+from benchmarks.mock_ollama import MockConfig, MockOllama
+
+def disconnect_after(seconds: float):
+    """Disconnect check that turns True after a delay"""
+    deadline = time.monotonic() + seconds
+    
+    async def check():
+        return time.monotonic() >= deadline
+    
+    return check
+
+def slow_scheduler() -> RequestScheduler:
+    """Scheduler whose model has a 5 s average generation"""
+    scheduler = RequestScheduler(concurrency=1, max_queue=5, model_concurrency={}, poll_interval=0.01)
+    scheduler._queue("llama3.2").avg_service_time = 5.0
+    return scheduler
+
+class TestCancelOnDisconnect:
+    """Test cases for cancelling generations whose client went away"""
+    
+    def test_cancels_when_client_leaves(self):
+        """Test the awaited call is cancelled once the check turns True"""
+        cancelled = []
+        
+        async def generation():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+        
+        async def scenario():
+            with pytest.raises(ClientDisconnectedError):
+                await cancel_on_disconnect(generation(), disconnect_after(0.05), poll_interval=0.01)
+        
+        asyncio.run(scenario())
+        assert cancelled == [1]
+    
+    def test_cancelled_slot_counts_time_avoided(self):
+        """Test a cancelled slot is counted and leaves the average service time alone"""
+        scheduler = slow_scheduler()
+        
+        async def scenario():
+            with pytest.raises(ClientDisconnectedError):
+                async with scheduler.slot("llama3.2"):
+                    raise ClientDisconnectedError("gone")
+        
+        asyncio.run(scenario())
+        stats = scheduler.stats()["models"]["llama3.2:latest"]
+        assert stats["cancelled"] == 1
+        assert 4.9 < stats["seconds_avoided"] <= 5.0
+        assert stats["avg_service_time"] == 5.0
+        assert stats["active"] == 0
+
+class TestUpstreamCancellation:
+    """Test cases proving a slow upstream generation is stopped"""
+    
+    def test_non_streaming_chat_stops_upstream(self, monkeypatch):
+        """Test a disconnect during a non-streaming chat cancels the Ollama request"""
+        monkeypatch.setattr(settings, "SCHEDULER_DISCONNECT_POLL_INTERVAL", 0.02)
+        mock = MockOllama(MockConfig(latency=5.0))
+        service = make_service(mock)
+        scheduler = slow_scheduler()
+        
+        async def scenario():
+            start = time.monotonic()
+            with pytest.raises(ClientDisconnectedError):
+                await service.chat(
+                    "Write an essay",
+                    model="llama3.2",
+                    slot=lambda check: scheduler.slot("llama3.2", check),
+                    is_disconnected=disconnect_after(0.1)
+                )
+            return time.monotonic() - start
+        
+        elapsed = asyncio.run(scenario())
+        
+        assert elapsed < 1.0
+        assert (mock.stats.cancelled, mock.stats.completed, mock.stats.active) == (1, 0, 0)
+        assert scheduler.stats()["models"]["llama3.2:latest"]["seconds_avoided"] > 4.0
+    
+    def test_closed_stream_stops_upstream(self):
+        """Test closing a stream mid-reply closes the Ollama response"""
+        stream = EndlessStream()
+        service = OllamaService()
+        service._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=stream))
+        )
+        scheduler = slow_scheduler()
+        
+        async def scenario():
+            chunks = service.chat_stream(
+                "Write an essay", model="llama3.2", slot=lambda check: scheduler.slot("llama3.2", check)
+            )
+            async for _ in chunks:
+                break
+            await chunks.aclose()
+        
+        asyncio.run(scenario())
+        assert stream.closed
+        assert scheduler.stats()["models"]["llama3.2:latest"]["cancelled"] == 1
+    
+    def test_chat_route_disconnect_stops_upstream(self, mock_ollama, monkeypatch):
+        """Test closing the HTTP connection during /api/chat aborts the Ollama request"""
+        monkeypatch.setattr(settings, "SCHEDULER_DISCONNECT_POLL_INTERVAL", 0.02)
+        upstream = []
+        
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path != "/api/chat":
+                return httpx.Response(200, json={"models": []})
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                upstream.append("cancelled")
+                raise
+            return httpx.Response(200, json={"message": {"content": "late"}, "done": True})
+        
+        mock_ollama(handler)
+        body = json.dumps({"message": "Write an essay", "bypass_cache": True}).encode()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "POST", "scheme": "http", "path": "/api/chat", "raw_path": b"/api/chat",
+            "root_path": "", "query_string": b"", "server": ("test", 80), "client": ("10.0.0.9", 1234),
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        }
+        sent = []
+        
+        async def scenario():
+            queue = request_scheduler._queue("llama3.2")
+            cancelled = queue.cancelled
+            deadline = time.monotonic() + 0.1
+            body_sent = False
+            
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+                # The browser tab closes 0.1 s into the request
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.01)
+                return {"type": "http.disconnect"}
+            
+            async def send(message):
+                sent.append(message)
+            
+            start = time.monotonic()
+            await app(scope, receive, send)
+            return time.monotonic() - start, queue.cancelled - cancelled
+        
+        elapsed, cancelled = asyncio.run(scenario())
+        
+        assert upstream == ["cancelled"]
+        assert elapsed < 2.0
+        assert cancelled == 1
+        assert sent[0]["status"] == 499
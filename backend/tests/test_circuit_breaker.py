@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.circuit_breaker import CircuitBreaker, backoff_delay, CLOSED, OPEN, HALF_OPEN
+from app.services.ollama_service import OllamaService, OllamaUnavailableError
+
+def failing_service(calls, threshold=3):
+    """Build a service whose Ollama refuses every connection"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        raise httpx.ConnectError("connection refused")
+    
+    service = OllamaService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service.breaker = CircuitBreaker("test", failure_threshold=threshold, recovery_timeout=60)
+    return service
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "OLLAMA_RETRY_BASE_DELAY", 0.0)
+
+class TestCircuitBreaker:
+    """Test cases for breaker state transitions"""
+    
+    def test_opens_after_threshold(self):
+        """Test consecutive failures open the circuit and calls are refused"""
+        breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=60)
+        
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        
+        assert breaker.state == OPEN
+        assert breaker.is_open
+        assert not breaker.allow()
+        assert breaker.rejected == 1
+        assert 1 <= breaker.retry_after() <= 60
+    
+    def test_half_open_trial(self):
+        """Test one trial call is let through after the recovery timeout"""
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        breaker.record_success()
+        
+        assert breaker.state == CLOSED
+        assert breaker.transitions == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+    
+    def test_failed_trial_reopens(self):
+        """Test a failing trial call re-opens the circuit"""
+        breaker = CircuitBreaker("test", failure_threshold=5, recovery_timeout=0)
+        for _ in range(5):
+            breaker.record_failure()
+        
+        assert breaker.allow()
+        breaker.record_failure()
+        
+        assert breaker.state == OPEN
+    
+    def test_backoff_is_capped(self):
+        """Test jittered delays stay within the exponential cap"""
+        delays = [backoff_delay(attempt, 0.25, 1.0) for attempt in range(10)]
+        
+        assert all(0 <= d <= 1.0 for d in delays)
+        assert backoff_delay(0, 0.25, 1.0) <= 0.25
+
+class TestServiceBreaker:
+    """Test cases for the breaker inside OllamaService"""
+    
+    def test_idempotent_calls_retry(self):
+        """Test list_models is retried but chat is not"""
+        calls = []
+        service = failing_service(calls, threshold=100)
+        
+        async def scenario():
+            with pytest.raises(Exception):
+                await service.list_models()
+            retried = len(calls)
+            with pytest.raises(Exception):
+                await service.chat("Hello", model="llama3.2")
+            return retried
+        
+        retried = asyncio.run(scenario())
+        
+        assert retried == settings.OLLAMA_RETRY_ATTEMPTS
+        assert len(calls) == retried + 1
+    
+    def test_open_circuit_fails_fast(self):
+        """Test calls stop reaching Ollama once the circuit opens"""
+        calls = []
+        service = failing_service(calls, threshold=2)
+        
+        async def scenario():
+            for _ in range(2):
+                with pytest.raises(Exception):
+                    await service.chat("Hello", model="llama3.2")
+            with pytest.raises(OllamaUnavailableError):
+                await service.chat("Hello", model="llama3.2")
+            return await service.check_health()
+        
+        assert asyncio.run(scenario()) is False
+        assert len(calls) == 2
+        assert service.breaker.state == OPEN
+    
+    def test_chat_route_returns_503(self, mock_ollama, monkeypatch):
+        """Test an open circuit maps to 503 with Retry-After, even after a failed health probe"""
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.services.health_monitor import health_monitor
+        from app.services.ollama_service import ollama_service
+        
+        mock_ollama(lambda request: httpx.Response(200, json={"models": []}))
+        monkeypatch.setattr(health_monitor, "healthy", None)
+        monkeypatch.setattr(health_monitor, "_checked_at", 0.0)
+        for _ in range(ollama_service.breaker.failure_threshold):
+            ollama_service.breaker.record_failure()
+        # The monitor probes through the open circuit and records Ollama as down
+        assert asyncio.run(health_monitor.refresh()) is False
+        client = TestClient(app)
+        
+        for body in ({"message": "Hi", "stream": True}, {"message": "Hi", "bypass_cache": True}):
+            response = client.post("/api/chat", json=body)
+            
+            assert response.status_code == 503
+            assert int(response.headers["retry-after"]) >= 1
@@ -0,0 +1,137 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.context_window import ContextWindow, count_tokens, message_tokens, SUMMARY_HEADER
+from app.services.session_store import session_store
+
+client = TestClient(app)
+
+def conversation(turns: int, words: int = 20):
+    """Build a history of `turns` user/assistant exchanges"""
+    history = [{"role": "system", "content": "You are a helpful assistant."}]
+    for i in range(turns):
+        history.append({"role": "user", "content": f"Question {i}. " + "word " * words})
+        history.append({"role": "assistant", "content": f"Answer {i}. " + "word " * words})
+    return history
+
+class TestTokenCount:
+    """Test cases for the token estimate"""
+    
+    def test_estimates(self):
+        """Test words, digits and non-ASCII text are counted sensibly"""
+        assert count_tokens("Hello, world!") == 4
+        assert count_tokens("123456") == 2
+        assert count_tokens("こんにちは") == 5
+        assert count_tokens("") == 0
+    
+    def test_counts_are_cached(self):
+        """Test repeated messages hit the token-count cache"""
+        text = "a message that is resent every turn " * 3
+        count_tokens(text)
+        hits = count_tokens.cache_info().hits
+        count_tokens(text)
+        assert count_tokens.cache_info().hits == hits + 1
+
+class TestContextWindow:
+    """Test cases for fitting history into the budget"""
+    
+    def test_short_history_untouched(self):
+        """Test history within budget is passed through as-is"""
+        history = conversation(2)
+        fitted, report = ContextWindow(default_budget=2048).fit("Hi", "llama3.2", history)
+        
+        assert fitted is history
+        assert report["prompt_tokens_before"] == report["prompt_tokens_after"]
+        assert report["dropped_messages"] == 0
+    
+    def test_trim_keeps_system_and_recent(self):
+        """Test the oldest turns are dropped and the system prompt kept"""
+        history = conversation(20)
+        window = ContextWindow(default_budget=400, response_reserve=100, strategy="trim")
+        
+        fitted, report = window.fit("Latest question", "llama3.2", history)
+        
+        assert fitted[0] == history[0]
+        assert fitted[-1] == history[-1]
+        assert fitted[1]["role"] == "user"
+        assert report["prompt_tokens_after"] <= report["budget"] == 300
+        assert report["prompt_tokens_before"] > report["prompt_tokens_after"]
+        assert report["dropped_messages"] == len(history) - len(fitted)
+        assert sum(map(message_tokens, fitted)) + message_tokens({"content": "Latest question"}) == report["prompt_tokens_after"]
+    
+    def test_summarize_dropped_turns(self):
+        """Test dropped turns are replaced by a bounded summary"""
+        history = conversation(20)
+        window = ContextWindow(default_budget=400, response_reserve=100, summary_tokens=60)
+        
+        fitted, report = window.fit("Latest question", "llama3.2", history)
+        
+        summary = fitted[1]
+        assert summary["role"] == "system"
+        assert summary["content"].startswith(SUMMARY_HEADER)
+        assert message_tokens(summary) <= 60
+        assert report["summarized"] is True
+        assert report["prompt_tokens_after"] <= report["budget"]
+    
+    def test_trim_in_blocks_keeps_prefix_stable(self):
+        """Test consecutive turns share the same trimmed prefix"""
+        window = ContextWindow(default_budget=400, response_reserve=100, strategy="trim", trim_block=8)
+        history = conversation(20)
+        
+        first, _ = window.fit("next", "llama3.2", history[:-2])
+        second, _ = window.fit("next", "llama3.2", history)
+        
+        assert second[:len(first)] == first
+    
+    def test_trailing_messages_kept_last_and_reserved(self):
+        """Test per-turn trailing messages follow the kept turns and leave the prefix stable"""
+        window = ContextWindow(default_budget=400, response_reserve=100, strategy="trim", trim_block=8)
+        history = conversation(20)
+        excerpt = {"role": "system", "content": "Excerpts: " + "doc " * 40}
+        
+        first, _ = window.fit("next", "llama3.2", history[:-2], trailing=[excerpt])
+        second, report = window.fit("next", "llama3.2", history, trailing=[{**excerpt, "content": "Other"}])
+        
+        assert first[-1] == excerpt and first[-2]["role"] == "assistant"
+        assert second[:len(first) - 1] == first[:-1]
+        assert report["prompt_tokens_after"] <= report["budget"]
+    
+    def test_per_model_and_request_budgets(self):
+        """Test per-model budgets and num_ctx/num_predict overrides"""
+        window = ContextWindow(default_budget=2048, model_budgets={"phi3": 4096}, response_reserve=256)
+        
+        assert window.budget_for("llama3.2") == 1792
+        assert window.budget_for("phi3:latest") == 3840
+        assert window.budget_for("llama3.2", {"num_ctx": 1024, "num_predict": 100}) == 924
+
+class TestChatContext:
+    """Test cases for context fitting in the chat endpoint"""
+    
+    def test_long_session_is_trimmed(self, mock_ollama, monkeypatch):
+        """Test a long session sends a trimmed prompt and reports both sizes"""
+        from app.services.context_window import context_window
+        sent = []
+        
+        def handler(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            sent.append(json.loads(request.content)["messages"])
+            return httpx.Response(200, json={"message": {"content": "ok"}, "done": True})
+        
+        mock_ollama(handler)
+        monkeypatch.setattr(context_window, "default_budget", 300)
+        session_store.delete("context-session")
+        session_store.append("context-session", conversation(10)[1:])
+        
+        response = client.post("/api/chat", json={"message": "next", "session_id": "context-session"})
+        
+        context = response.json()["context"]
+        assert response.status_code == 200
+        assert context["prompt_tokens_before"] > context["prompt_tokens_after"]
+        assert context["dropped_messages"] > 0
+        assert len(sent[0]) < 21
+        assert sent[0][-1]["content"] == "next"
+        session_store.delete("context-session")
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+pytest.importorskip("orjson")
+
+from app.api import routes
+from app.main import app, ROOT_BODY
+from app.core import fast_json
+from app.core.config import settings
+from app.services.ollama_service import _iter_json_lines
+from app.services.rate_limiter import InMemoryRateLimiter
+
+def chat_handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/api/chat":
+        return httpx.Response(200, json={
+            "model": "llama3.2",
+            "message": {"content": "Café ☕ is open"},
+            "done": True,
+            "eval_count": 12,
+            "eval_duration": 600_000_000
+        })
+    return httpx.Response(200, json={"models": []})
+
+def without_timing(body):
+    """Drop the fields that differ between two otherwise identical replies"""
+    return {k: v for k, v in body.items() if k not in ("timestamp", "processing_time")}
+
+class TestFastJSONRoutes:
+    """Test cases for the FAST_JSON_ENABLED response path"""
+    
+    def test_chat_reply_matches_default_path(self, mock_ollama, monkeypatch):
+        """Test the pre-serialized reply has the same fields and headers"""
+        mock_ollama(chat_handler)
+        monkeypatch.setattr(routes, "rate_limiter", InMemoryRateLimiter(requests_per_minute=10, enabled=True))
+        client = TestClient(app)
+        chat = {"message": "Is the cafe open?", "bypass_cache": True}
+        
+        default = client.post("/api/chat", json=chat)
+        monkeypatch.setattr(settings, "FAST_JSON_ENABLED", True)
+        fast = client.post("/api/chat", json=chat)
+        
+        assert fast.status_code == 200
+        assert fast.headers["content-type"] == "application/json"
+        assert without_timing(fast.json()) == without_timing(default.json())
+        assert fast.headers["X-RateLimit-Limit-Requests"] == "10"
+        assert fast.headers["X-RateLimit-Remaining-Requests"] == "8"
+    
+    def test_root_served_from_pre_encoded_bytes(self, monkeypatch):
+        """Test the root payload is the body encoded at import"""
+        monkeypatch.setattr(settings, "FAST_JSON_ENABLED", True)
+        
+        response = TestClient(app).get("/")
+        
+        assert response.content == ROOT_BODY
+        assert response.json()["docs"] == "/docs"
+    
+    @pytest.mark.parametrize("path", ["/api/stats", "/api/queue", "/api/cache/stats", "/api/health"])
+    def test_stats_endpoints_encode(self, path, mock_ollama, monkeypatch):
+        """Test the monitoring payloads encode without jsonable_encoder"""
+        mock_ollama(chat_handler)
+        client = TestClient(app)
+        client.post("/api/chat", json={"message": "warm up", "bypass_cache": True})
+        monkeypatch.setattr(settings, "FAST_JSON_ENABLED", True)
+        
+        response = client.get(path)
+        
+        assert response.status_code == 200
+        assert isinstance(response.json(), dict)
+    
+    def test_default_response_class_follows_setting(self, monkeypatch):
+        """Test the app keeps the stock JSONResponse unless the fast path is on"""
+        assert app.router.default_response_class is fast_json.response_class()
+        
+        monkeypatch.setattr(settings, "FAST_JSON_ENABLED", False)
+        assert fast_json.response_class() is JSONResponse
+        monkeypatch.setattr(settings, "FAST_JSON_ENABLED", True)
+        assert fast_json.response_class() is fast_json.FastJSONResponse
+
+class TestJSONLines:
+    """Test cases for parsing streamed Ollama replies from bytes"""
+    
+    @pytest.mark.parametrize("enabled", [False, True])
+    def test_lines_split_across_chunks(self, enabled, monkeypatch):
+        """Test objects split over network reads are reassembled"""
+        monkeypatch.setattr(settings, "FAST_JSON_ENABLED", enabled)
+        raw = b'{"message":{"content":"h\xc3\xa9"}}\n\n{"done":true}\n'
+        
+        class Chunked:
+            async def aiter_bytes(self):
+                for i in range(0, len(raw), 5):
+                    yield raw[i:i + 5]
+        
+        async def collect():
+            return [line async for line in _iter_json_lines(Chunked())]
+        
+        assert asyncio.run(collect()) == [{"message": {"content": "hé"}}, {"done": True}]
+    
+    def test_stdlib_fallback_matches_orjson(self, monkeypatch):
+        """Test both encoders produce the same compact bytes"""
+        payload = {"text": "Café", "n": [1, 2.5, None, True]}
+        
+        standard = fast_json.dumps(payload)
+        monkeypatch.setattr(settings, "FAST_JSON_ENABLED", True)
+        
+        assert fast_json.dumps(payload) == standard
@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.health_monitor import HealthMonitor
+from app.services.ollama_service import OllamaService
+
+client = TestClient(app)
+
+def make_monitor(handler) -> HealthMonitor:
+    """Build a monitor whose service talks to a mock transport"""
+    service = OllamaService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return HealthMonitor(service)
+
+class TestHealthMonitor:
+    """Test cases for the cached health state"""
+    
+    def test_counts_consecutive_failures(self):
+        """Test failed probes are counted and reset on success"""
+        responses = [500, 500, 200]
+        monitor = make_monitor(lambda request: httpx.Response(responses.pop(0)))
+        
+        async def scenario():
+            await monitor.refresh()
+            await monitor.refresh()
+            assert monitor.healthy is False
+            assert monitor.consecutive_failures == 2
+            await monitor.refresh()
+        
+        asyncio.run(scenario())
+        assert monitor.healthy is True
+        assert monitor.consecutive_failures == 0
+        assert monitor.last_checked is not None
+    
+    def test_cached_state_avoids_probing(self):
+        """Test reads come from the cache while the monitor runs"""
+        probes = []
+        
+        def handler(request):
+            probes.append(request.url.path)
+            return httpx.Response(200, json={"models": []})
+        
+        monitor = make_monitor(handler)
+        
+        async def scenario():
+            await monitor.start()
+            for _ in range(5):
+                assert await monitor.is_healthy()
+            await monitor.stop()
+        
+        asyncio.run(scenario())
+        assert len(probes) == 1
+    
+    def test_request_refresh_probes_immediately(self):
+        """Test a refresh request wakes the polling task"""
+        probes = []
+        
+        def handler(request):
+            probes.append(request.url.path)
+            return httpx.Response(200, json={"models": []})
+        
+        monitor = make_monitor(handler)
+        
+        async def scenario():
+            await monitor.start()
+            monitor.request_refresh()
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+        
+        asyncio.run(scenario())
+        assert len(probes) == 2
+
+class TestChatConnectionError:
+    """Test cases for chat failures caused by an unreachable Ollama"""
+    
+    def test_connection_error_returns_503(self, mock_ollama):
+        """Test a connection error mid-chat is reported as unavailable"""
+        def handler(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            raise httpx.ConnectError("connection refused")
+        
+        mock_ollama(handler)
+        response = client.post("/api/chat", json={"message": "Hello"})
+        assert response.status_code == 503
@@ -0,0 +1,65 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.metrics import Counter, Histogram, MetricsRegistry
+
+client = TestClient(app)
+
+class TestMetricTypes:
+    """Test cases for the metric primitives"""
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test rendered buckets accumulate and sum/count are tracked"""
+        registry = MetricsRegistry()
+        histogram = registry.register(Histogram("latency", "Latency", ["model"], buckets=(1.0, 5.0)))
+        for value in (0.5, 2.0, 3.0, 10.0):
+            histogram.observe(value, "llama3.2")
+        
+        text = registry.render()
+        assert 'latency_bucket{model="llama3.2",le="1"} 1' in text
+        assert 'latency_bucket{model="llama3.2",le="5"} 3' in text
+        assert 'latency_bucket{model="llama3.2",le="+Inf"} 4' in text
+        assert 'latency_sum{model="llama3.2"} 15.5' in text
+        assert 'latency_count{model="llama3.2"} 4' in text
+        assert "# TYPE latency histogram" in text
+    
+    def test_counter_labels(self):
+        """Test counters keep one value per label set"""
+        counter = Counter("errors_total", "Errors", ["kind"])
+        counter.inc("connection")
+        counter.inc("connection")
+        counter.inc("error")
+        assert counter.value("connection") == 2
+        assert 'errors_total{kind="error"} 1' in list(counter.samples())
+
+class TestMetricsEndpoint:
+    """Test cases for GET /metrics"""
+    
+    def test_chat_is_instrumented(self, mock_ollama):
+        """Test a chat records latency and Ollama timing"""
+        def handler(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            return httpx.Response(200, json={
+                "message": {"content": "hi"},
+                "done": True,
+                "load_duration": 2_000_000_000,
+                "prompt_eval_count": 10,
+                "prompt_eval_duration": 1_000_000_000,
+                "eval_count": 20,
+                "eval_duration": 4_000_000_000
+            })
+        
+        mock_ollama(handler)
+        client.post("/api/chat", json={"message": "metrics please", "model": "metrics-test"})
+        
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'chatbot_request_duration_seconds_count{model="metrics-test"} 1' in text
+        assert 'chatbot_model_load_seconds_sum{model="metrics-test"} 2' in text
+        assert 'chatbot_eval_tokens_per_second_sum{model="metrics-test"} 5' in text
+        assert 'chatbot_chat_requests_total{model="metrics-test",outcome="ok"} 1' in text
+        assert "chatbot_queue_depth" in text
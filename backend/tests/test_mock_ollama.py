@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+
+from app.services.ollama_service import OllamaService
+from benchmarks.mock_ollama import MockConfig, MockOllama
+
+def make_service(mock: MockOllama) -> OllamaService:
+    """Build a service that talks to the benchmark mock in-process"""
+    service = OllamaService()
+    service._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=mock), base_url="http://mock"
+    )
+    service.base_url = "http://mock"
+    return service
+
+class TestMockOllama:
+    """Test the benchmark mock speaks the Ollama API the service expects"""
+    
+    def test_chat_reports_timings(self):
+        """Test non-streaming chat returns a reply and timing fields"""
+        mock = MockOllama(MockConfig(reply_tokens=4))
+        
+        result = asyncio.run(make_service(mock).chat("Hello", model="llama3.2"))
+        
+        assert result["response"].startswith("tok0")
+        assert result["eval_count"] == 4
+        assert result["prompt_eval_duration"] > 0
+        assert mock.stats.completed == 1
+    
+    def test_stream_chunks(self):
+        """Test streamed replies arrive in chunk_tokens-sized pieces"""
+        mock = MockOllama(MockConfig(reply_tokens=6, chunk_tokens=2))
+        
+        async def scenario():
+            return [chunk async for chunk in make_service(mock).chat_stream("Hi", model="llama3.2")]
+        
+        chunks = asyncio.run(scenario())
+        
+        assert len(chunks) == 4
+        assert chunks[-1]["done"] is True
+    
+    def test_error_injection(self):
+        """Test error_rate=1 fails every chat"""
+        mock = MockOllama(MockConfig(error_rate=1.0, seed=1))
+        
+        async def scenario():
+            try:
+                await make_service(mock).chat("Hello", model="llama3.2")
+            except Exception as e:
+                return e
+        
+        assert asyncio.run(scenario()) is not None
+        assert mock.stats.errors == 1
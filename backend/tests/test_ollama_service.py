@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+
+from app.services.ollama_service import OllamaService
+
+def make_service(handler) -> OllamaService:
+    """Build a service whose shared client talks to a mock transport"""
+    service = OllamaService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+class TestConnectionPool:
+    """Test cases for the shared Ollama client"""
+    
+    def test_client_is_reused_across_calls(self):
+        """Test every call goes through the same client instance"""
+        service = OllamaService()
+        first = service.client
+        assert service.client is first
+    
+    def test_start_and_close(self):
+        """Test lifecycle hooks open and close the client"""
+        async def scenario():
+            service = OllamaService()
+            await service.start()
+            client = service._client
+            assert client is not None and not client.is_closed
+            await service.close()
+            assert client.is_closed
+            assert service._client is None
+        
+        asyncio.run(scenario())
+    
+    def test_chat_uses_shared_client(self):
+        """Test chat calls are served by the pooled client"""
+        calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"message": {"content": "hi"}, "done": True})
+        
+        async def scenario():
+            service = make_service(handler)
+            first = await service.chat("Hello")
+            second = await service.chat("Hello again")
+            await service.close()
+            return first, second
+        
+        first, second = asyncio.run(scenario())
+        assert first["response"] == "hi"
+        assert second["response"] == "hi"
+        assert calls == ["/api/chat", "/api/chat"]
+
+class ClosingStream(httpx.AsyncByteStream):
+    """Endless upstream body that records when it is closed"""
+    
+    def __init__(self):
+        self.closed = False
+    
+    async def __aiter__(self):
+        while True:
+            yield b'{"message": {"content": "tok"}, "done": false}\n'
+    
+    async def aclose(self):
+        self.closed = True
+
+class TestChatStream:
+    """Test cases for streaming chat"""
+    
+    def test_closing_generator_closes_upstream(self):
+        """Test abandoning the stream closes the upstream response"""
+        stream = ClosingStream()
+        service = make_service(lambda request: httpx.Response(200, stream=stream))
+        
+        async def scenario():
+            chunks = service.chat_stream("Hello")
+            first = await chunks.__anext__()
+            await chunks.aclose()
+            await service.close()
+            return first
+        
+        first = asyncio.run(scenario())
+        assert first["message"]["content"] == "tok"
+        assert stream.closed
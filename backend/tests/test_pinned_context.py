@@ -0,0 +1,110 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import chat_pipeline
+from app.services.ollama_service import ollama_service
+from app.services.pinned_context import PinnedContextStore, pinned_contexts
+from app.services.session_store import session_store
+from benchmarks.mock_ollama import MockConfig, MockOllama
+
+client = TestClient(app)
+
+@pytest.fixture
+def mock_server(mock_ollama):
+    """Serve the shared Ollama client from the benchmark mock"""
+    mock_ollama(lambda request: httpx.Response(200, json={"models": []}))
+    mock = MockOllama(MockConfig(reply_tokens=8))
+    ollama_service._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=mock))
+    for session_id in ("pinned", "plain"):
+        session_store.delete(session_id)
+        pinned_contexts.discard(session_id)
+    return mock
+
+def chat(session_id: str, message: str, **extra):
+    response = client.post("/api/chat", json={
+        "message": message, "session_id": session_id, "bypass_cache": True, **extra
+    })
+    assert response.status_code == 200
+    return response
+
+class TestPinnedContextStore:
+    """Test cases for the per-session context token store"""
+    
+    def test_bound_to_model(self):
+        """Test context is only returned for the model that produced it"""
+        store = PinnedContextStore(max_sessions=2)
+        store.put("s1", "llama3.2", [1, 2, 3])
+        
+        assert store.get("s1", "llama3.2:latest") == [1, 2, 3]
+        assert store.get("s1", "phi3") is None
+    
+    def test_lru_bound(self):
+        """Test the least recently used session is dropped"""
+        store = PinnedContextStore(max_sessions=2)
+        store.put("s1", "llama3.2", [1])
+        store.put("s2", "llama3.2", [2])
+        store.get("s1", "llama3.2")
+        store.put("s3", "llama3.2", [3])
+        
+        assert store.get("s2", "llama3.2") is None
+        assert store.stats()["sessions"] == 2
+
+class TestPinnedPrompt:
+    """Test cases for building pinned generate requests"""
+    
+    def test_reseed_from_history(self):
+        """Test a session without context is replayed as a transcript"""
+        pinned_contexts.discard("reseed")
+        history = [
+            {"role": "system", "content": "Be brief."},
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello!"}
+        ]
+        
+        kwargs = chat_pipeline.pinned_prompt("reseed", "How are you?", "llama3.2", history)
+        
+        assert kwargs["context"] is None
+        assert kwargs["system"] == "Be brief."
+        assert kwargs["prompt"].endswith("User: Hi\nAssistant: Hello!\n\nHow are you?")
+    
+    def test_continue_with_context(self):
+        """Test stored context is sent with only the new message"""
+        pinned_contexts.put("cont", "llama3.2", [5, 6, 7])
+        
+        kwargs = chat_pipeline.pinned_prompt("cont", "Next", "llama3.2", [{"role": "user", "content": "x"}])
+        
+        assert kwargs["prompt"] == "Next"
+        assert kwargs["context"] == [5, 6, 7]
+        pinned_contexts.discard("cont")
+
+class TestPinnedChat:
+    """Test cases for session-pinned chat through the API"""
+    
+    def test_prompt_eval_stays_flat(self, mock_server):
+        """Test pinned turns evaluate only the new message"""
+        question = "Tell me something interesting about the Raspberry Pi please."
+        plain = [chat("plain", question).json()["stats"]["prompt_eval_count"] for _ in range(3)]
+        pinned = [chat("pinned", question, pin_context=True).json()["stats"]["prompt_eval_count"] for _ in range(3)]
+        
+        assert plain[2] > plain[0]
+        assert pinned[2] == pinned[1] <= pinned[0]
+        assert pinned[2] < plain[2]
+        assert mock_server.stats.requests["/api/generate"] == 3
+        assert len(session_store.get_history("pinned")) == 6
+    
+    def test_streamed_turn_pins_context(self, mock_server):
+        """Test the final stream chunk's context is stored"""
+        response = client.post(
+            "/api/chat",
+            json={"message": "Hi", "session_id": "pinned", "stream": True, "pin_context": True},
+            headers={"Accept": "application/x-ndjson"}
+        )
+        frames = [json.loads(line) for line in response.text.splitlines() if line]
+        
+        assert "".join(f.get("content", "") for f in frames).startswith("tok0")
+        assert frames[-1]["done"] is True
+        assert pinned_contexts.get("pinned", "llama3.2")
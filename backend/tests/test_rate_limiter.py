@@ -0,0 +1,140 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.services.rate_limiter import RateLimiter, InMemoryRateLimiter, SQLiteRateLimiter, client_key
+
+client = TestClient(app)
+
+class FakeClock:
+    """Manually advanced clock"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class TestRateLimiter:
+    """Test cases for the token bucket limiter"""
+    
+    def test_request_bucket_refills(self):
+        """Test requests are refused once the bucket is empty and admitted after refill"""
+        clock = FakeClock()
+        limiter = InMemoryRateLimiter(clock=clock, requests_per_minute=3, tokens_per_hour=0, enabled=True)
+        
+        assert [limiter.check("a").allowed for _ in range(4)] == [True, True, True, False]
+        refused = limiter.check("a")
+        assert refused.reason == "requests"
+        assert refused.retry_after == 20
+        assert refused.headers()["Retry-After"] == "20"
+        assert limiter.check("b").allowed
+        
+        clock.now += 20
+        assert limiter.check("a").allowed
+        assert limiter.rejected["requests"] == 2
+    
+    def test_token_quota(self):
+        """Test generated tokens exhaust the quota until it refills"""
+        clock = FakeClock()
+        limiter = InMemoryRateLimiter(clock=clock, requests_per_minute=0, tokens_per_hour=3600, enabled=True)
+        
+        assert limiter.check("a").allowed
+        limiter.charge("a", 3700)
+        refused = limiter.check("a")
+        assert (refused.allowed, refused.reason, refused.retry_after) == (False, "tokens", 101)
+        
+        clock.now += 101
+        decision = limiter.check("a")
+        assert decision.allowed
+        assert decision.headers()["X-RateLimit-Remaining-Tokens"] == "1"
+        assert "X-RateLimit-Limit-Requests" not in decision.headers()
+    
+    def test_idle_clients_evicted(self):
+        """Test idle clients are dropped and the key count is capped"""
+        clock = FakeClock()
+        limiter = InMemoryRateLimiter(clock=clock, idle_ttl=60, max_keys=2, enabled=True)
+        
+        limiter.check("a")
+        limiter.check("b")
+        limiter.check("c")
+        assert list(limiter._buckets) == ["b", "c"]
+        
+        clock.now += 61
+        limiter.check("d")
+        assert list(limiter._buckets) == ["d"]
+        assert limiter.stats()["evictions"] == 3
+    
+    def test_sqlite_shared_between_limiters(self, tmp_path):
+        """Test two limiters on one SQLite file enforce one quota"""
+        path = str(tmp_path / "ratelimit.db")
+        clock = FakeClock()
+        first = SQLiteRateLimiter(path, clock=clock, requests_per_minute=2, enabled=True)
+        second = SQLiteRateLimiter(path, clock=clock, requests_per_minute=2, enabled=True)
+        
+        assert first.check("a").allowed
+        assert second.check("a").allowed
+        assert not first.check("a").allowed
+        assert second.stats()["clients"] == 1
+        
+        clock.now += 7200
+        first._evict(clock.now)
+        assert second.stats()["clients"] == 0
+    
+    def test_client_key(self):
+        """Test API keys are hashed and win over the address"""
+        by_key = client_key({"x-api-key": "secret"}, "10.0.0.1")
+        by_bearer = client_key({"authorization": "Bearer secret"}, "10.0.0.2")
+        
+        assert by_key == by_bearer
+        assert by_key.startswith("key:") and "secret" not in by_key
+        assert client_key({"x-forwarded-for": "1.2.3.4"}, "10.0.0.1") == "ip:10.0.0.1"
+    
+    def test_backend_must_implement_interface(self):
+        """Test the base limiter cannot be instantiated"""
+        with pytest.raises(TypeError):
+            RateLimiter()
+
+class TestRateLimitedRoutes:
+    """Test cases for rate limiting on the chat endpoints"""
+    
+    def test_chat_returns_429(self, mock_ollama, monkeypatch):
+        """Test /chat answers 429 with rate limit headers once the quota is spent"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/chat":
+                return httpx.Response(200, json={"message": {"content": "Hi"}, "done": True, "eval_count": 50})
+            return httpx.Response(200, json={"models": []})
+        
+        mock_ollama(handler)
+        limiter = InMemoryRateLimiter(requests_per_minute=10, tokens_per_hour=60, enabled=True)
+        monkeypatch.setattr(routes, "rate_limiter", limiter)
+        
+        first = client.post("/api/chat", json={"message": "Hello", "bypass_cache": True})
+        second = client.post("/api/chat", json={"message": "Hello", "bypass_cache": True})
+        refused = client.post("/api/chat", json={"message": "Hello", "bypass_cache": True})
+        other = client.post("/api/chat", json={"message": "Hello"}, headers={"X-API-Key": "other"})
+        
+        assert first.status_code == 200
+        assert first.headers["X-RateLimit-Remaining-Requests"] == "9"
+        assert first.headers["X-RateLimit-Remaining-Tokens"] == "60"
+        assert second.status_code == 200
+        assert second.headers["X-RateLimit-Remaining-Tokens"] == "10"
+        assert refused.status_code == 429
+        assert "token quota" in refused.json()["detail"]
+        assert int(refused.headers["Retry-After"]) > 0
+        assert other.status_code == 200
+    
+    def test_websocket_rate_limited(self, monkeypatch):
+        """Test a WebSocket chat over the limit gets a 429 error frame"""
+        limiter = InMemoryRateLimiter(requests_per_minute=1, tokens_per_hour=0, enabled=True)
+        monkeypatch.setattr(routes, "rate_limiter", limiter)
+        limiter.check(client_key({}, "testclient"))
+        
+        with client.websocket_connect("/api/ws/chat") as websocket:
+            websocket.send_json({"type": "chat", "id": "a", "message": "Hi"})
+            error = websocket.receive_json()
+        
+        assert (error["type"], error["id"], error["status"]) == ("error", "a", 429)
+        assert error["retry_after"] == 60
@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+import httpx
+
+from app.services.ollama_service import OllamaService
+from app.services.residency import ModelResidencyManager
+from app.services.scheduler import RequestScheduler
+
+GB = 1024 ** 3
+
+class FakeOllama:
+    """Mock Ollama tracking loaded models for /api/ps and /api/generate"""
+    
+    def __init__(self, loaded):
+        self.loaded = dict(loaded)
+        self.unloaded = []
+    
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [
+                {"name": name, "size": size, "size_vram": 0, "expires_at": "2025-11-10T12:05:00Z"}
+                for name, size in self.loaded.items()
+            ]})
+        body = json.loads(request.content)
+        if body.get("keep_alive") == 0:
+            self.unloaded.append(body["model"])
+            self.loaded.pop(body["model"], None)
+        else:
+            self.loaded[f"{body['model']}:latest"] = 2 * GB
+        return httpx.Response(200, json={"done": True})
+
+def make_manager(fake, **kwargs) -> ModelResidencyManager:
+    service = OllamaService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    scheduler = RequestScheduler(model_concurrency={})
+    return ModelResidencyManager(service, scheduler, **kwargs)
+
+class TestResidencyManager:
+    """Test cases for model warm-up and LRU eviction"""
+    
+    def test_warm_up_loads_configured_models(self):
+        """Test configured models are loaded and reported resident"""
+        fake = FakeOllama({})
+        manager = make_manager(fake, warmup_models=["llama3.2"])
+        
+        async def scenario():
+            await manager.warm_up()
+            await manager.refresh()
+        
+        asyncio.run(scenario())
+        snapshot = manager.snapshot()
+        assert manager.warmed_up
+        assert [m["name"] for m in snapshot["models"]] == ["llama3.2:latest"]
+        assert snapshot["models"][0]["last_used"] is not None
+    
+    def test_failed_warm_up_retried_until_ready(self):
+        """Test a warm-up that fails while Ollama boots is retried and then reported ready"""
+        fake = FakeOllama({})
+        booting = [True]
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if booting[0] and request.url.path == "/api/generate":
+                return httpx.Response(404, json={"error": "model not found"})
+            return fake(request)
+        
+        manager = make_manager(handler, warmup_models=["llama3.2"], retry_interval=0.01)
+        
+        async def scenario():
+            await manager.start()
+            await asyncio.sleep(0.05)
+            states = [manager.readiness()]
+            booting[0] = False
+            for _ in range(100):
+                if manager.ready:
+                    break
+                await asyncio.sleep(0.01)
+            await manager.stop()
+            return states
+        
+        states = asyncio.run(scenario())
+        assert states == [{"llama3.2": "failed"}]
+        assert manager.ready
+        assert manager.readiness() == {"llama3.2": "warm"}
+        
+        manager.mark_unloaded("llama3.2")
+        assert manager.ready  # a later eviction does not make the server unready
+    
+    def test_lru_eviction_over_budget(self):
+        """Test the least recently used idle model is unloaded first"""
+        fake = FakeOllama({"a:latest": 2 * GB, "b:latest": 2 * GB, "c:latest": 2 * GB})
+        manager = make_manager(fake, warmup_models=[], memory_budget=5 * GB)
+        
+        async def scenario():
+            manager._lock = asyncio.Lock()
+            await manager.refresh()
+            for model in ("b", "a", "c"):
+                manager.mark_used(model)
+                await asyncio.sleep(0.001)
+            return await manager.enforce_budget()
+        
+        evicted = asyncio.run(scenario())
+        assert evicted == ["b:latest"]
+        assert fake.unloaded == ["b:latest"]
+        assert manager.snapshot()["count"] == 2
+    
+    def test_busy_model_is_not_evicted(self):
+        """Test a model with in-flight requests is skipped"""
+        fake = FakeOllama({"a:latest": 4 * GB, "b:latest": 4 * GB})
+        manager = make_manager(fake, warmup_models=[], memory_budget=5 * GB)
+        
+        async def scenario():
+            manager._lock = asyncio.Lock()
+            await manager.refresh()
+            manager.mark_used("a")
+            manager.mark_used("b")
+            await manager.scheduler.acquire("a")
+            return await manager.enforce_budget()
+        
+        evicted = asyncio.run(scenario())
+        assert evicted == ["b:latest"]
+    
+    def test_busy_model_with_explicit_tag_is_not_evicted(self):
+        """Test requests under any alias of a model mark it busy"""
+        fake = FakeOllama({"a:q4": 4 * GB, "b:latest": 4 * GB})
+        manager = make_manager(fake, warmup_models=[], memory_budget=5 * GB)
+        
+        async def scenario():
+            manager._lock = asyncio.Lock()
+            await manager.refresh()
+            await manager.scheduler.acquire("a:q4")
+            await manager.scheduler.acquire("b")
+            return await manager.enforce_budget()
+        
+        assert asyncio.run(scenario()) == []
+        assert fake.unloaded == []
+    
+    def test_mark_used_keeps_one_budget_task(self):
+        """Test newly loaded models share one referenced budget check, cancelled on stop"""
+        fake = FakeOllama({})
+        manager = make_manager(fake, warmup_models=[], memory_budget=5 * GB)
+        
+        async def scenario():
+            manager._lock = asyncio.Lock()
+            await manager._lock.acquire()  # hold the check mid-run
+            manager.mark_used("a")
+            task = manager._budget_task
+            manager.mark_used("b")
+            assert manager._budget_task is task
+            await asyncio.sleep(0)
+            await manager.stop()
+            return task
+        
+        task = asyncio.run(scenario())
+        assert task.cancelled()
+        assert manager._budget_task is None
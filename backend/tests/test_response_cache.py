@@ -0,0 +1,111 @@
+import json
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.response_cache import ResponseCache
+
+client = TestClient(app)
+
+def messages(text: str):
+    return [{"role": "user", "content": text}]
+
+class TestResponseCache:
+    """Test cases for the response cache"""
+    
+    def test_key_is_normalized(self):
+        """Test case and whitespace differences share a key"""
+        options = {"temperature": 0.7}
+        assert ResponseCache.make_key("llama3.2", messages("What can you do?"), options) == \
+            ResponseCache.make_key("llama3.2", messages("  what can   YOU do?"), options)
+        assert ResponseCache.make_key("llama3.2", messages("hi"), options) != \
+            ResponseCache.make_key("gemma2", messages("hi"), options)
+        assert ResponseCache.make_key("llama3.2", messages("hi"), options) != \
+            ResponseCache.make_key("llama3.2", messages("hi"), {"temperature": 0})
+    
+    def test_lru_eviction(self):
+        """Test least recently used entries go first"""
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", {"response": "A"})
+        cache.put("b", {"response": "B"})
+        cache.get("a")
+        cache.put("c", {"response": "C"})
+        assert cache.get("b") is None
+        assert cache.get("a")["response"] == "A"
+        assert cache.stats()["evictions"] == 1
+    
+    def test_ttl_and_byte_budget(self):
+        """Test entries expire and the byte budget is respected"""
+        cache = ResponseCache(ttl=0.01, max_bytes=1000)
+        cache.put("a", {"response": "x" * 600})
+        cache.put("b", {"response": "y" * 600})
+        assert cache.stats()["bytes"] <= 1000
+        assert cache.get("a") is None
+        time.sleep(0.02)
+        assert cache.get("b") is None
+
+class TestChatCache:
+    """Test cases for cached chat replies"""
+    
+    def test_repeat_is_served_from_cache(self, mock_ollama):
+        """Test a repeated prompt does not reach Ollama and streams from cache"""
+        calls = []
+        
+        def handler(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"message": {"content": "I can chat."}, "done": True})
+        
+        mock_ollama(handler)
+        greedy = {"temperature": 0}
+        first = client.post("/api/chat", json={"message": "What can you do?", "options": greedy})
+        second = client.post("/api/chat", json={"message": "what can you do?", "options": greedy})
+        streamed = client.post(
+            "/api/chat",
+            json={"message": "What can you do?", "stream": True, "options": greedy},
+            headers={"Accept": "application/x-ndjson"}
+        )
+        bypassed = client.post(
+            "/api/chat", json={"message": "What can you do?", "bypass_cache": True, "options": greedy}
+        )
+        
+        assert first.json()["cached"] is False
+        assert second.json()["cached"] is True
+        assert second.json()["response"] == "I can chat."
+        frames = [json.loads(line) for line in streamed.text.splitlines()]
+        assert frames[0]["content"] == "I can chat."
+        assert frames[-1]["cached"] is True
+        assert bypassed.json()["cached"] is False
+        assert len(calls) == 2
+        
+        stats = client.get("/api/cache/stats").json()
+        assert stats["hits"] >= 2
+    
+    def test_sampled_replies_are_not_cached(self, mock_ollama, monkeypatch):
+        """Test only deterministic chats are cached unless deterministic_only is off"""
+        from app.services.response_cache import response_cache
+        calls = []
+        
+        def handler(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"message": {"content": f"Draw {len(calls)}"}, "done": True})
+        
+        mock_ollama(handler)
+        sampled = [client.post("/api/chat", json={"message": "Tell me a story"}).json() for _ in range(2)]
+        seeded = [
+            client.post("/api/chat", json={"message": "Tell me a story", "options": {"seed": 7}}).json()
+            for _ in range(2)
+        ]
+        monkeypatch.setattr(response_cache, "deterministic_only", False)
+        opted_in = [client.post("/api/chat", json={"message": "Tell me a joke"}).json() for _ in range(2)]
+        
+        assert [r["cached"] for r in sampled] == [False, False]
+        assert sampled[0]["response"] != sampled[1]["response"]
+        assert [r["cached"] for r in seeded] == [False, True]
+        assert [r["cached"] for r in opted_in] == [False, True]
+        assert len(calls) == 4
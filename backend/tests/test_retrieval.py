@@ -0,0 +1,234 @@
+import asyncio
+import json
+import os
+import threading
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+np = pytest.importorskip("numpy")
+
+from app.main import app
+from app.services import chat_pipeline
+from app.services.context_window import context_window
+from app.services.retrieval import Retriever, DocumentIndex, build_index, chunk_text
+from app.services.session_store import session_store
+from tests.test_context_window import conversation
+from tests.test_semantic_cache import bag_of_words
+
+DOCS = {
+    "install.md": (
+        "# Installing\n\nRun the installer, then pull a model with ollama pull llama3.2.\n\n"
+        "The default port is 11434."
+    ),
+    "errors.md": (
+        "# Troubleshooting\n\nError E1042 means the model ran out of memory. "
+        "Use a smaller model or lower num_ctx."
+    ),
+    "notes.txt": "Backups run nightly at 02:00 and are kept for seven days."
+}
+
+def write_docs(tmp_path, docs=DOCS):
+    """Write the sample docs and return their directory"""
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir(parents=True, exist_ok=True)
+    for name, text in docs.items():
+        (docs_dir / name).write_text(text)
+    return str(docs_dir)
+
+def make_index(tmp_path, embed=bag_of_words, docs=DOCS) -> str:
+    """Build an index of the sample docs and return its path"""
+    path = str(tmp_path / "docs_index")
+    asyncio.run(build_index([write_docs(tmp_path, docs)], path, embed, chunk_words=40, overlap=8))
+    return path
+
+class TestChunking:
+    """Test cases for splitting documents"""
+    
+    def test_long_text_split_with_overlap(self):
+        """Test chunks respect the size and share the overlap words"""
+        words = [f"w{i}" for i in range(100)]
+        chunks = chunk_text(" ".join(words), chunk_words=40, overlap=10)
+        
+        assert [len(c.split()) for c in chunks] == [40, 40, 40]
+        assert chunks[1].split()[:10] == chunks[0].split()[-10:]
+        assert chunks[-1].split()[-1] == "w99"
+    
+    def test_short_paragraphs_kept_together(self):
+        """Test paragraphs that fit are grouped into one chunk"""
+        assert chunk_text("One two.\n\nThree four.", chunk_words=40, overlap=8) == ["One two. Three four."]
+
+class TestDocumentIndex:
+    """Test cases for building and searching the on-disk index"""
+    
+    def test_vectors_are_memory_mapped_float16(self, tmp_path):
+        """Test embeddings are stored as float16 and opened memory mapped"""
+        index = DocumentIndex(make_index(tmp_path))
+        
+        assert isinstance(index.vectors, np.memmap)
+        assert index.vectors.dtype == np.float16
+        assert index.vectors.shape == (3, 64)
+        assert not os.path.exists(str(tmp_path / "docs_index.tmp"))
+    
+    def test_hybrid_search_ranks_relevant_chunk_first(self, tmp_path):
+        """Test a question finds the chunk that answers it"""
+        retriever = Retriever(path=make_index(tmp_path), embedder=bag_of_words, min_score=0.1)
+        
+        chunks, seconds = asyncio.run(retriever.retrieve("What does error E1042 mean?"))
+        
+        assert chunks[0].source.endswith("errors.md")
+        assert "out of memory" in chunks[0].text
+        assert 0.0 < chunks[0].score <= 1.0
+        assert seconds < 1.0
+    
+    def test_keyword_only_index(self, tmp_path):
+        """Test an index built without embeddings is searched with BM25"""
+        retriever = Retriever(path=make_index(tmp_path, embed=None), embedder=bag_of_words, min_score=0.1)
+        
+        chunks, _ = asyncio.run(retriever.retrieve("when do backups run"))
+        
+        assert retriever._index.vectors is None
+        assert chunks[0].source.endswith("notes.txt")
+    
+    def test_embedding_failure_falls_back_to_keywords(self, tmp_path):
+        """Test a failing query embedding still returns keyword matches"""
+        async def broken(text):
+            raise RuntimeError("embedding model not pulled")
+        
+        retriever = Retriever(path=make_index(tmp_path), embedder=broken, min_score=0.1)
+        
+        chunks, _ = asyncio.run(retriever.retrieve("default port"))
+        
+        assert chunks[0].source.endswith("install.md")
+    
+    def test_rebuilt_index_is_reopened(self, tmp_path):
+        """Test a running retriever picks up a replaced index"""
+        path = make_index(tmp_path)
+        retriever = Retriever(path=path, embedder=bag_of_words, min_score=0.1)
+        asyncio.run(retriever.retrieve("backups"))
+        
+        new_docs = write_docs(tmp_path / "v2", {"new.md": "Backups now run hourly."})
+        asyncio.run(build_index([new_docs], path, bag_of_words, chunk_words=40, overlap=8))
+        chunks, _ = asyncio.run(retriever.retrieve("backups"))
+        
+        assert [c.source.endswith("new.md") for c in chunks] == [True]
+    
+    def test_only_keyword_candidates_scored_by_embedding(self, tmp_path, monkeypatch):
+        """Test a keyword match skips the full vector scan and the search runs off the event loop"""
+        retriever = Retriever(path=make_index(tmp_path), embedder=bag_of_words, min_score=0.1)
+        threads = []
+        search = DocumentIndex.search
+        
+        def tracked(index, *args):
+            threads.append(threading.get_ident())
+            return search(index, *args)
+        
+        def full_scan(index, query_vector, n):
+            raise AssertionError("scanned every vector")
+        
+        monkeypatch.setattr(DocumentIndex, "search", tracked)
+        monkeypatch.setattr(DocumentIndex, "dense_nearest", full_scan)
+        chunks, _ = asyncio.run(retriever.retrieve("error E1042"))
+        
+        assert chunks[0].source.endswith("errors.md")
+        assert threads and threads[0] != threading.get_ident()
+    
+    def test_no_keyword_match_falls_back_to_vector_scan(self, tmp_path):
+        """Test a query sharing no word with the docs is still answered by embedding"""
+        index = DocumentIndex(make_index(tmp_path))
+        query = np.asarray(asyncio.run(bag_of_words("nightly backups")), dtype=np.float32)
+        
+        chunks = index.search("zzz", query / np.linalg.norm(query), 1, 1.0, 0.1)
+        
+        assert [c.source.endswith("notes.txt") for c in chunks] == [True]
+    
+    def test_failed_swap_keeps_old_index(self, tmp_path, monkeypatch):
+        """Test the old index is restored if the new one cannot be moved into place"""
+        path = make_index(tmp_path)
+        replace = os.replace
+        
+        def failing(src, dst):
+            if src.endswith(".tmp"):
+                raise OSError("disk full")
+            replace(src, dst)
+        
+        monkeypatch.setattr(os, "replace", failing)
+        with pytest.raises(OSError):
+            asyncio.run(build_index([write_docs(tmp_path / "v2", {"new.md": "New."})], path, None))
+        
+        assert DocumentIndex(path).chunks == 3
+        assert not os.path.exists(path + ".old")
+    
+    def test_context_budget_keeps_best_chunks(self, tmp_path):
+        """Test excerpts beyond max_context_tokens are left out"""
+        retriever = Retriever(path=make_index(tmp_path), embedder=bag_of_words, max_context_tokens=1)
+        chunks, _ = asyncio.run(retriever.retrieve("model memory port", k=3))
+        
+        kept = retriever.fit_budget(chunks)
+        message = retriever.context_message(kept)
+        
+        assert len(chunks) > 1 and kept == chunks[:1]
+        assert message["role"] == "system"
+        assert "[1] (" in message["content"] and "[2]" not in message["content"]
+
+class TestRetrievalRoute:
+    """Test cases for document retrieval on /api/chat"""
+    
+    def test_excerpts_sent_to_ollama(self, tmp_path, mock_ollama, monkeypatch):
+        """Test retrieved docs reach the model and retrieval time is reported"""
+        sent = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/chat":
+                sent.append(request.read())
+                return httpx.Response(200, json={"message": {"content": "Lower num_ctx"}, "done": True})
+            return httpx.Response(200, json={"models": []})
+        
+        mock_ollama(handler)
+        retriever = Retriever(path=make_index(tmp_path), embedder=bag_of_words, min_score=0.1)
+        monkeypatch.setattr(chat_pipeline, "retriever", retriever)
+        client = TestClient(app)
+        
+        with_docs = client.post("/api/chat", json={"message": "What is error E1042?", "use_docs": True})
+        without = client.post("/api/chat", json={"message": "What is error E1042?", "bypass_cache": True})
+        
+        assert with_docs.status_code == 200
+        assert b"ran out of memory" in sent[0]
+        assert b"ran out of memory" not in sent[1]
+        body = with_docs.json()
+        assert body["stats"]["retrieval_time"] is not None
+        assert body["context"]["documents"][0]["source"].endswith("errors.md")
+        assert without.json()["stats"]["retrieval_time"] is None
+    
+    def test_excerpts_stay_last_when_history_is_trimmed(self, tmp_path, mock_ollama, monkeypatch):
+        """Test trimming keeps the excerpts after the kept turns, with their tokens reserved"""
+        sent = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/chat":
+                sent.append(json.loads(request.content)["messages"])
+                return httpx.Response(200, json={"message": {"content": "Lower num_ctx"}, "done": True})
+            return httpx.Response(200, json={"models": []})
+        
+        mock_ollama(handler)
+        monkeypatch.setattr(chat_pipeline, "retriever", Retriever(
+            path=make_index(tmp_path), embedder=bag_of_words, min_score=0.1
+        ))
+        monkeypatch.setattr(context_window, "default_budget", 700)
+        session_store.delete("docs-session")
+        session_store.append("docs-session", conversation(10))
+        
+        response = TestClient(app).post("/api/chat", json={
+            "message": "What is error E1042?", "session_id": "docs-session", "use_docs": True
+        })
+        session_store.delete("docs-session")
+        
+        context = response.json()["context"]
+        messages = sent[0]
+        assert context["dropped_messages"] > 0
+        assert context["prompt_tokens_after"] <= context["budget"]
+        assert messages[0]["content"] == "You are a helpful assistant."
+        assert messages[-2]["role"] == "system" and "ran out of memory" in messages[-2]["content"]
+        assert messages[-3]["role"] == "assistant"
+        assert messages[-1]["content"] == "What is error E1042?"
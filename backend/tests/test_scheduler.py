@@ -0,0 +1,198 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.scheduler import (
+    RequestScheduler,
+    QueueFullError,
+    ClientDisconnectedError,
+    _ModelQueue,
+    request_scheduler,
+    resolve_priority
+)
+from app.core.config import settings
+
+class TestRequestScheduler:
+    """Test cases for per-model admission control"""
+    
+    def test_slots_limit_concurrency(self):
+        """Test no more than the configured slots run at once"""
+        scheduler = RequestScheduler(concurrency=2, max_queue=10, model_concurrency={})
+        running = []
+        peak = []
+        
+        async def job():
+            async with scheduler.slot("m"):
+                running.append(1)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+        
+        async def scenario():
+            await asyncio.gather(*(job() for _ in range(6)))
+        
+        asyncio.run(scenario())
+        assert max(peak) == 2
+        stats = scheduler.stats()["models"]["m:latest"]
+        assert stats["served"] == 6
+        assert stats["active"] == 0 and stats["queued"] == 0
+    
+    def test_full_queue_rejects_with_retry_after(self):
+        """Test requests beyond the queue bound are rejected immediately"""
+        scheduler = RequestScheduler(concurrency=1, max_queue=1, model_concurrency={})
+        
+        async def scenario():
+            holder = asyncio.create_task(scheduler.acquire("m"))
+            await holder
+            queued = asyncio.create_task(scheduler.acquire("m"))
+            await asyncio.sleep(0)
+            with pytest.raises(QueueFullError) as excinfo:
+                await scheduler.acquire("m")
+            scheduler.release("m", 0.1)
+            await queued
+            scheduler.release("m", 0.1)
+            return excinfo.value
+        
+        error = asyncio.run(scenario())
+        assert error.retry_after >= 1
+        assert scheduler.stats()["models"]["m:latest"]["rejected"] == 1
+    
+    def test_disconnected_waiter_is_dropped(self):
+        """Test a queued request is dropped when its client goes away"""
+        scheduler = RequestScheduler(concurrency=1, max_queue=5, model_concurrency={}, poll_interval=0.01)
+        
+        async def gone():
+            return True
+        
+        async def scenario():
+            await scheduler.acquire("m")
+            with pytest.raises(ClientDisconnectedError):
+                await scheduler.acquire("m", is_disconnected=gone)
+            scheduler.release("m", 0.1)
+        
+        asyncio.run(scenario())
+        stats = scheduler.stats()["models"]["m:latest"]
+        assert stats["dropped"] == 1
+        assert stats["active"] == 0 and stats["queued"] == 0
+    
+    def test_cancelled_waiter_releases_queue_position(self):
+        """Test cancelling a queued request does not leak a slot"""
+        scheduler = RequestScheduler(concurrency=1, max_queue=5, model_concurrency={})
+        
+        async def scenario():
+            await scheduler.acquire("m")
+            waiter = asyncio.create_task(scheduler.acquire("m"))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            scheduler.release("m", 0.1)
+            assert await asyncio.wait_for(scheduler.acquire("m"), timeout=1) == 0.0
+        
+        asyncio.run(scenario())
+
+class TestPriorityLanes:
+    """Test cases for priority classes in the scheduler"""
+    
+    def dispatch_order(self, scheduler, priorities):
+        """Queue one request per priority behind a held slot and record the grant order"""
+        order = []
+        
+        async def job(name, priority):
+            async with scheduler.slot("m", priority=priority):
+                order.append(name)
+        
+        async def scenario():
+            await scheduler.acquire("m")
+            jobs = []
+            for i, priority in enumerate(priorities):
+                jobs.append(asyncio.create_task(job(f"{priority}-{i}", priority)))
+                await asyncio.sleep(0)
+            scheduler.release("m", 0.1)
+            await asyncio.gather(*jobs)
+        
+        asyncio.run(scenario())
+        return order
+    
+    def test_interactive_dispatched_before_earlier_bulk(self):
+        """Test a later interactive request gets the slot before queued bulk work"""
+        scheduler = RequestScheduler(concurrency=1, max_queue=10, model_concurrency={})
+        
+        order = self.dispatch_order(scheduler, ["bulk", "standard", "interactive"])
+        
+        assert order == ["interactive-2", "standard-1", "bulk-0"]
+    
+    def test_starvation_limit_promotes_lower_lane(self):
+        """Test a bulk request passed over starvation_limit times goes next"""
+        scheduler = RequestScheduler(concurrency=1, max_queue=10, model_concurrency={}, starvation_limit=2)
+        
+        order = self.dispatch_order(scheduler, ["bulk"] + ["interactive"] * 4)
+        
+        assert order.index("bulk-0") == 2
+        lanes = scheduler.stats()["models"]["m:latest"]["lanes"]
+        assert lanes["bulk"]["promoted"] == 1
+        assert lanes["interactive"]["served"] == 4 and lanes["bulk"]["served"] == 1
+    
+    def test_full_bulk_lane_does_not_reject_interactive(self):
+        """Test each lane has its own queue bound"""
+        scheduler = RequestScheduler(concurrency=1, max_queue=1, model_concurrency={})
+        
+        async def scenario():
+            await scheduler.acquire("m")
+            queued = asyncio.create_task(scheduler.acquire("m", priority="bulk"))
+            await asyncio.sleep(0)
+            with pytest.raises(QueueFullError):
+                scheduler.check_admission("m", "bulk")
+            scheduler.check_admission("m", "interactive")
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+        
+        asyncio.run(scenario())
+        assert scheduler.stats()["models"]["m:latest"]["lanes"]["bulk"]["rejected"] == 1
+    
+    def test_api_key_caps_priority(self, monkeypatch):
+        """Test a key mapped to a lane cannot ask for a higher one"""
+        monkeypatch.setattr(settings, "SCHEDULER_API_KEY_PRIORITIES", {"etl": "bulk"})
+        
+        assert resolve_priority("interactive", "etl") == "bulk"
+        assert resolve_priority(None, "etl") == "bulk"
+        assert resolve_priority("interactive", "other") == "interactive"
+        assert resolve_priority(None, None) == settings.SCHEDULER_DEFAULT_PRIORITY
+    
+    def test_chat_request_waits_in_its_lane(self, mock_ollama, monkeypatch):
+        """Test /api/chat schedules a request in the lane of its API key"""
+        monkeypatch.setattr(settings, "SCHEDULER_API_KEY_PRIORITIES", {"etl": "bulk"})
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/chat":
+                return httpx.Response(200, json={"message": {"content": "ok"}, "done": True})
+            return httpx.Response(200, json={"models": []})
+        
+        mock_ollama(handler)
+        served = request_scheduler._queue("llama3.2").lanes["bulk"].served
+        
+        response = TestClient(app).post(
+            "/api/chat",
+            json={"message": "Hello", "priority": "interactive", "bypass_cache": True},
+            headers={"X-API-Key": "etl"}
+        )
+        
+        assert response.status_code == 200
+        assert request_scheduler._queue("llama3.2").lanes["bulk"].served == served + 1
+
+class TestChatAdmission:
+    """Test cases for queue rejection on the chat endpoint"""
+    
+    def test_full_queue_returns_503_with_retry_after(self, mock_ollama, monkeypatch):
+        """Test a saturated model is rejected with Retry-After"""
+        mock_ollama(lambda request: httpx.Response(200, json={"models": []}))
+        saturated = _ModelQueue(slots=1, max_queue=0)
+        saturated.active = 1
+        monkeypatch.setitem(request_scheduler._queues, "llama3.2:latest", saturated)
+        
+        response = TestClient(app).post("/api/chat", json={"message": "Hello", "model": "llama3.2"})
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
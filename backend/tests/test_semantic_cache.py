@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import re
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+np = pytest.importorskip("numpy")
+
+from app.main import app
+from app.services import chat_pipeline
+from app.services.semantic_cache import SemanticCache
+
+STOPWORDS = {"what", "is", "the", "a", "of", "please", "tell", "me", "can", "you", "s"}
+
+async def bag_of_words(text: str):
+    """Local embedder: hashed bag of content words"""
+    vector = [0.0] * 64
+    for word in re.findall(r"[a-z]+", text.lower()):
+        if word not in STOPWORDS:
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+    return vector
+
+def make_cache(**kwargs) -> SemanticCache:
+    kwargs.setdefault("threshold", 0.9)
+    kwargs.setdefault("capacity", 8)
+    return SemanticCache(embedder=bag_of_words, enabled=True, path=kwargs.pop("path", None), **kwargs)
+
+def reply(text: str):
+    return {"response": text, "model": "llama3.2", "done": True, "eval_count": 3}
+
+class TestSemanticCache:
+    """Test cases for the embedding-based cache"""
+    
+    def test_paraphrase_hits(self):
+        """Test a reworded prompt gets the stored reply and an unrelated one misses"""
+        cache = make_cache()
+        
+        async def scenario():
+            await cache.put("What is the capital of France?", "s", reply("Paris"))
+            return (
+                await cache.get("Tell me the capital of France, please", "s"),
+                await cache.get("What is the capital of Spain?", "s"),
+                await cache.get("What is the capital of France?", "other-scope")
+            )
+        
+        hit, different, other_scope = asyncio.run(scenario())
+        
+        assert hit["response"] == "Paris"
+        assert hit["semantic_similarity"] >= 0.9
+        assert different is None and other_scope is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+        assert stats["hit_rate"] == round(1 / 3, 4)
+        assert "p50" in stats["lookup_latency"]
+    
+    def test_least_recently_used_evicted(self):
+        """Test a full index overwrites the least recently used entry"""
+        cache = make_cache(capacity=2)
+        
+        async def scenario():
+            await cache.put("capital of France", "s", reply("Paris"))
+            await cache.put("capital of Spain", "s", reply("Madrid"))
+            await cache.get("capital of France", "s")
+            await cache.put("capital of Italy", "s", reply("Rome"))
+            return [await cache.get(q, "s") for q in ("capital of France", "capital of Spain", "capital of Italy")]
+        
+        france, spain, italy = asyncio.run(scenario())
+        
+        assert france["response"] == "Paris" and italy["response"] == "Rome"
+        assert spain is None
+        assert cache.stats()["evictions"] == 1
+    
+    def test_persisted_index_reloads(self, tmp_path):
+        """Test the memory-mapped index survives a restart"""
+        path = str(tmp_path / "semantic")
+        first = make_cache(path=path)
+        asyncio.run(first.put("capital of France", "s", reply("Paris")))
+        first.flush()
+        
+        second = make_cache(path=path)
+        hit = asyncio.run(second.get("the capital of France", "s"))
+        
+        assert isinstance(second.index._vectors, np.memmap)
+        assert hit["response"] == "Paris"
+    
+    def test_embedding_failure_is_a_miss(self):
+        """Test an embedder error counts as a miss instead of failing the chat"""
+        async def broken(text):
+            raise RuntimeError("no embedding model")
+        
+        cache = SemanticCache(embedder=broken, enabled=True)
+        
+        assert asyncio.run(cache.get("Hello", "s")) is None
+        assert cache.stats()["errors"] == 1
+
+class TestSemanticCacheRoute:
+    """Test cases for the semantic cache on /api/chat"""
+    
+    def test_reworded_question_served_from_cache(self, mock_ollama, monkeypatch):
+        """Test a paraphrased stateless question is answered without a generation"""
+        chats = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/chat":
+                chats.append(1)
+                return httpx.Response(200, json={"message": {"content": "Paris"}, "done": True, "eval_count": 1})
+            return httpx.Response(200, json={"models": []})
+        
+        mock_ollama(handler)
+        monkeypatch.setattr(chat_pipeline, "semantic_cache", make_cache())
+        client = TestClient(app)
+        
+        options = {"temperature": 0}
+        first = client.post("/api/chat", json={"message": "What is the capital of France?", "options": options})
+        second = client.post("/api/chat", json={"message": "Tell me the capital of France", "options": options})
+        
+        assert first.json()["cached"] is False
+        assert second.json()["cached"] is True
+        assert second.json()["response"] == "Paris"
+        assert len(chats) == 1
+    
+    def test_sampled_replies_neither_stored_nor_served(self, mock_ollama, monkeypatch):
+        """Test a request sampled at temperature > 0 bypasses the semantic cache"""
+        chats = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/chat":
+                chats.append(1)
+                return httpx.Response(200, json={"message": {"content": "Paris"}, "done": True, "eval_count": 1})
+            return httpx.Response(200, json={"models": []})
+        
+        mock_ollama(handler)
+        cache = make_cache()
+        monkeypatch.setattr(chat_pipeline, "semantic_cache", cache)
+        client = TestClient(app)
+        
+        sampled = client.post("/api/chat", json={"message": "What is the capital of France?"})
+        assert cache.stats()["entries"] == 0
+        
+        client.post("/api/chat", json={"message": "What is the capital of France?", "options": {"temperature": 0}})
+        served = client.post(
+            "/api/chat", json={"message": "Tell me the capital of France", "options": {"temperature": 0.7}}
+        )
+        
+        assert sampled.json()["cached"] is False
+        assert served.json()["cached"] is False
+        assert len(chats) == 3
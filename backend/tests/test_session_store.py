@@ -0,0 +1,115 @@
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.session_store import SessionStore, InMemorySessionStore, SQLiteSessionStore, session_store
+
+client = TestClient(app)
+
+def turn(i: int):
+    return [
+        {"role": "user", "content": f"question {i}"},
+        {"role": "assistant", "content": f"answer {i}"}
+    ]
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    """Build a store of either backend with the given limits"""
+    def build(**limits):
+        if request.param == "sqlite":
+            return SQLiteSessionStore(path=str(tmp_path / "sessions.db"), **limits)
+        return InMemorySessionStore(**limits)
+    return build
+
+class TestSessionStore:
+    """Test cases for both session store backends"""
+    
+    def test_append_and_get(self, make_store):
+        """Test history is returned oldest first"""
+        store = make_store()
+        store.append("s1", turn(1))
+        store.append("s1", turn(2))
+        history = store.get_history("s1")
+        assert [m["content"] for m in history] == ["question 1", "answer 1", "question 2", "answer 2"]
+        assert store.get_history("unknown") == []
+    
+    def test_message_cap_drops_oldest(self, make_store):
+        """Test per-session message cap keeps the most recent messages"""
+        store = make_store(max_messages=4)
+        for i in range(5):
+            store.append("s1", turn(i))
+        history = store.get_history("s1")
+        assert [m["content"] for m in history] == ["question 3", "answer 3", "question 4", "answer 4"]
+    
+    def test_lru_eviction(self, make_store):
+        """Test least recently used sessions are evicted past max_sessions"""
+        store = make_store(max_sessions=2)
+        store.append("a", turn(1))
+        store.append("b", turn(1))
+        store.get_history("a")
+        store.append("c", turn(1))
+        assert store.get_history("b") == []
+        assert store.get_history("a") and store.get_history("c")
+        assert store.stats()["evictions"] == 1
+    
+    def test_ttl_expiry(self, make_store):
+        """Test idle sessions expire"""
+        store = make_store(ttl=0.01)
+        store.append("s1", turn(1))
+        time.sleep(0.02)
+        assert store.get_history("s1") == []
+    
+    def test_memory_budget(self, make_store):
+        """Test the global memory budget evicts old sessions"""
+        store = make_store(memory_budget=1000)
+        for name in ["a", "b", "c", "d"]:
+            store.append(name, turn(1))
+        assert store.stats()["bytes"] <= 1000
+        assert store.get_history("d")
+    
+    def test_delete(self, make_store):
+        """Test deleting a session"""
+        store = make_store()
+        store.append("s1", turn(1))
+        assert store.delete("s1") is True
+        assert store.delete("s1") is False
+    
+    def test_backend_must_implement_interface(self):
+        """Test the base class and incomplete backends cannot be instantiated"""
+        class Partial(SessionStore):
+            def get_history(self, session_id):
+                return []
+        
+        for cls in (SessionStore, Partial):
+            with pytest.raises(TypeError):
+                cls()
+
+class TestChatSessions:
+    """Test cases for session-aware chat"""
+    
+    def test_history_sent_to_ollama(self, mock_ollama):
+        """Test the second turn carries the first exchange"""
+        sent = []
+        
+        def handler(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            sent.append(json.loads(request.content)["messages"])
+            return httpx.Response(200, json={"message": {"content": f"reply {len(sent)}"}, "done": True})
+        
+        mock_ollama(handler)
+        session_store.delete("test-session")
+        client.post("/api/chat", json={"message": "first", "session_id": "test-session"})
+        response = client.post("/api/chat", json={"message": "second", "session_id": "test-session"})
+        
+        assert response.status_code == 200
+        assert response.json()["session_id"] == "test-session"
+        assert [m["content"] for m in sent[1]] == ["first", "reply 1", "second"]
+        assert len(session_store.get_history("test-session")) == 4
+        
+        assert client.delete("/api/sessions/test-session").status_code == 200
+        assert client.get("/api/sessions/test-session").status_code == 404
@@ -0,0 +1,175 @@
+import asyncio
+
+import httpx
+
+from app.services.single_flight import SingleFlight
+from tests.test_mock_ollama import make_service
+from benchmarks.mock_ollama import MockConfig, MockOllama
+
+class TestSingleFlight:
+    """Test cases for coalescing calls and streams"""
+    
+    def test_concurrent_calls_share_one(self):
+        """Test identical concurrent calls run the function once"""
+        flights = SingleFlight()
+        calls = []
+        
+        async def fn(abandoned):
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+        
+        async def scenario():
+            return await asyncio.gather(*(flights.do("k", fn) for _ in range(5)))
+        
+        assert asyncio.run(scenario()) == ["result"] * 5
+        assert len(calls) == 1
+        assert flights.stats()["followers"] == {"call": 4}
+        assert flights.stats()["in_flight"] == 0
+    
+    def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        """Test a cancelled waiter leaves the call running for the others"""
+        flights = SingleFlight()
+        
+        async def fn(abandoned):
+            await asyncio.sleep(0.05)
+            return "done"
+        
+        async def scenario():
+            first = asyncio.ensure_future(flights.do("k", fn))
+            second = asyncio.ensure_future(flights.do("k", fn))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second, first.cancelled()
+        
+        assert asyncio.run(scenario()) == ("done", True)
+        assert flights.cancelled == 0
+    
+    def test_last_waiter_cancels_shared_call(self):
+        """Test the shared call is cancelled once every waiter left"""
+        flights = SingleFlight()
+        started = []
+        
+        async def fn(abandoned):
+            started.append(1)
+            await asyncio.sleep(10)
+        
+        async def scenario():
+            waiters = [asyncio.ensure_future(flights.do("k", fn)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+        
+        asyncio.run(scenario())
+        
+        assert started == [1]
+        assert flights.cancelled == 1
+    
+    def test_stream_fans_out(self):
+        """Test every subscriber gets every chunk of one upstream stream"""
+        flights = SingleFlight()
+        opened = []
+        
+        async def upstream():
+            opened.append(1)
+            for i in range(3):
+                await asyncio.sleep(0.01)
+                yield i
+        
+        async def consume():
+            return [item async for item in flights.stream("k", upstream)]
+        
+        async def scenario():
+            first = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.015)
+            # Joins after the first chunk and gets it replayed
+            return await asyncio.gather(first, consume())
+        
+        assert asyncio.run(scenario()) == [[0, 1, 2], [0, 1, 2]]
+        assert opened == [1]
+    
+    def test_subscriber_leaving_keeps_stream(self):
+        """Test one subscriber closing early does not stop the others"""
+        flights = SingleFlight()
+        
+        async def upstream():
+            for i in range(4):
+                await asyncio.sleep(0.01)
+                yield i
+        
+        async def leave_early():
+            async for item in flights.stream("k", upstream):
+                return item
+        
+        async def consume():
+            return [item async for item in flights.stream("k", upstream)]
+        
+        async def scenario():
+            return await asyncio.gather(leave_early(), consume())
+        
+        assert asyncio.run(scenario()) == [0, [0, 1, 2, 3]]
+        assert flights.cancelled == 0
+
+class TestCoalescedChat:
+    """Test cases for coalescing inside OllamaService"""
+    
+    def test_identical_chats_share_generation(self):
+        """Test identical concurrent chats hit Ollama once"""
+        mock = MockOllama(MockConfig(reply_tokens=3, latency=0.05))
+        service = make_service(mock)
+        
+        async def scenario():
+            return await asyncio.gather(
+                *(service.chat("Same question", model="llama3.2") for _ in range(5)),
+                service.chat("Other question", model="llama3.2")
+            )
+        
+        results = asyncio.run(scenario())
+        
+        assert mock.stats.chats == 2
+        assert len({r["response"] for r in results[:5]}) == 1
+    
+    def test_identical_streams_share_generation(self):
+        """Test identical concurrent streams fan out one generation"""
+        mock = MockOllama(MockConfig(reply_tokens=4, latency=0.05))
+        service = make_service(mock)
+        
+        async def consume():
+            return [chunk async for chunk in service.chat_stream("Hi", model="llama3.2")]
+        
+        async def scenario():
+            return await asyncio.gather(*(consume() for _ in range(3)))
+        
+        streams = asyncio.run(scenario())
+        
+        assert mock.stats.chats == 1
+        assert all(len(chunks) == 5 and chunks[-1]["done"] for chunks in streams)
+    
+    def test_chat_route_coalesces(self, mock_ollama):
+        """Test simultaneous identical /api/chat requests share one generation"""
+        from app.main import app
+        
+        chats = []
+        
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/chat":
+                chats.append(1)
+                await asyncio.sleep(0.05)
+                return httpx.Response(200, json={"message": {"content": "Hello!"}, "done": True})
+            return httpx.Response(200, json={"models": []})
+        
+        mock_ollama(handler)
+        
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*(
+                    client.post("/api/chat", json={"message": "Classroom demo"}) for _ in range(4)
+                ))
+        
+        responses = asyncio.run(scenario())
+        
+        assert [r.status_code for r in responses] == [200] * 4
+        assert all(r.json()["response"] == "Hello!" for r in responses)
+        assert len(chats) == 1
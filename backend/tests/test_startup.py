@@ -0,0 +1,91 @@
+import sys
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.core.lazy_import import optional_module
+from app.core.startup import StartupTimeline
+from app.main import app
+from tests.test_residency import FakeOllama, make_manager
+
+client = TestClient(app)
+
+def ollama_up(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"models": []})
+
+def ollama_down(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("Connection refused", request=request)
+
+class TestProbes:
+    """Test cases for the liveness and readiness endpoints"""
+    
+    def test_live_does_not_contact_ollama(self, mock_ollama):
+        """Test /live answers even when Ollama is down"""
+        mock_ollama(ollama_down)
+        
+        response = client.get("/api/live")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+        assert response.json()["uptime"] > 0
+    
+    def test_ready_without_warm_up_models(self, mock_ollama):
+        """Test the server is ready once Ollama answers when nothing needs warming"""
+        mock_ollama(ollama_up)
+        
+        response = client.get("/api/ready")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert "imports" in response.json()["startup"]
+    
+    def test_not_ready_while_warming(self, mock_ollama, monkeypatch):
+        """Test /ready answers 503 with the pending models until they are loaded"""
+        mock_ollama(ollama_up)
+        manager = make_manager(FakeOllama({}), warmup_models=["llama3.2"])
+        monkeypatch.setattr(routes, "residency_manager", manager)
+        
+        response = client.get("/api/ready")
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"]
+        assert response.json()["status"] == "warming"
+        assert response.json()["models"] == {"llama3.2": "loading"}
+        
+        manager.warmed_up = True
+        manager.mark_loaded("llama3.2")
+        assert client.get("/api/ready").status_code == 200
+    
+    def test_not_ready_when_ollama_down(self, mock_ollama):
+        """Test /ready reports Ollama being unreachable"""
+        mock_ollama(ollama_down)
+        
+        response = client.get("/api/ready")
+        
+        assert response.status_code == 503
+        assert response.json()["status"] == "unavailable"
+
+class TestStartupTimeline:
+    """Test cases for the startup timeline and lazy imports"""
+    
+    def test_stages_measured_from_process_start(self):
+        """Test stages are ordered, counted once and include the time before import"""
+        timeline = StartupTimeline(profile=False)
+        
+        first = timeline.mark("imports")
+        timeline.mark("startup")
+        
+        assert timeline.mark("imports") == first
+        assert list(timeline.stages()) == ["imports", "startup"]
+        assert first > 0  # the interpreter ran before the timeline was created
+    
+    def test_optional_module_imported_on_first_use(self):
+        """Test a lazy module is not imported until an attribute is read"""
+        assert optional_module("no_such_package_here") is None
+        
+        module = optional_module("json")
+        
+        assert not module.loaded
+        assert module.dumps([1]) == "[1]"
+        assert module.loaded and "json" in sys.modules
@@ -0,0 +1,75 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.stats import RingBuffer, StatsCollector, compute_chat_stats
+
+client = TestClient(app)
+
+OLLAMA_REPLY = {
+    "message": {"content": "hi"},
+    "done": True,
+    "total_duration": 5_000_000_000,
+    "load_duration": 1_500_000_000,
+    "prompt_eval_count": 20,
+    "prompt_eval_duration": 500_000_000,
+    "eval_count": 30,
+    "eval_duration": 3_000_000_000
+}
+
+class TestChatStats:
+    """Test cases for per-request stats"""
+    
+    def test_compute_chat_stats(self):
+        """Test tokens/sec and cold start are derived from Ollama fields"""
+        stats = compute_chat_stats(OLLAMA_REPLY)
+        assert stats["prompt_tokens_per_second"] == 40.0
+        assert stats["eval_tokens_per_second"] == 10.0
+        assert stats["load_time"] == 1.5
+        assert stats["cold_start"] is True
+    
+    def test_missing_fields(self):
+        """Test absent Ollama fields yield empty stats"""
+        stats = compute_chat_stats({})
+        assert stats["eval_tokens_per_second"] is None
+        assert stats["cold_start"] is False
+
+class TestRollingStats:
+    """Test cases for the ring buffer percentiles"""
+    
+    def test_ring_buffer_keeps_latest(self):
+        """Test the buffer overwrites the oldest samples"""
+        buffer = RingBuffer(4)
+        for value in range(10):
+            buffer.append(float(value))
+        assert len(buffer) == 4
+        assert buffer.percentiles((0.0, 0.99)) == {"p0": 6.0, "p99": 9.0}
+    
+    def test_collector_summary(self):
+        """Test per-model summaries"""
+        collector = StatsCollector(window=8)
+        collector.record("m", 2.0, compute_chat_stats(OLLAMA_REPLY))
+        summary = collector.summary()["models"]["m"]
+        assert summary["requests"] == 1
+        assert summary["cold_starts"] == 1
+        assert summary["latency"]["p50"] == 2.0
+
+class TestStatsEndpoints:
+    """Test cases for stats in responses and /api/stats"""
+    
+    def test_chat_returns_stats(self, mock_ollama):
+        """Test ChatResponse carries the stats block"""
+        def handler(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            return httpx.Response(200, json=OLLAMA_REPLY)
+        
+        mock_ollama(handler)
+        response = client.post("/api/chat", json={"message": "stats please", "model": "stats-test"})
+        stats = response.json()["stats"]
+        assert stats["eval_tokens_per_second"] == 10.0
+        assert stats["cold_start"] is True
+        
+        summary = client.get("/api/stats").json()["models"]["stats-test"]
+        assert summary["requests"] == 1
+        assert "p95" in summary["eval_tokens_per_second"]
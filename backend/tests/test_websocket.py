@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.config import settings
+from app.main import app
+from tests.test_api import streaming_ollama
+
+client = TestClient(app)
+
+class EndlessStream(httpx.AsyncByteStream):
+    """Slow endless upstream body that records when it is closed"""
+    
+    def __init__(self):
+        self.closed = False
+    
+    async def __aiter__(self):
+        while True:
+            await asyncio.sleep(0.01)
+            yield b'{"message": {"content": "tok"}, "done": false}\n'
+    
+    async def aclose(self):
+        self.closed = True
+
+def receive_until(websocket, predicate):
+    """Collect frames until one matches predicate"""
+    frames = []
+    while True:
+        frame = websocket.receive_json()
+        frames.append(frame)
+        if predicate(frame):
+            return frames
+
+class TestChatWebSocket:
+    """Test cases for /api/ws/chat"""
+    
+    def test_multiplexed_conversations(self, mock_ollama):
+        """Test two conversations stream over one connection"""
+        mock_ollama(streaming_ollama)
+        frames = []
+        
+        with client.websocket_connect("/api/ws/chat") as websocket:
+            websocket.send_json({"type": "chat", "id": "a", "message": "Hi", "bypass_cache": True})
+            websocket.send_json({"type": "chat", "id": "b", "message": "Hey", "bypass_cache": True})
+            while sum(f["type"] == "done" for f in frames) < 2:
+                frames.append(websocket.receive_json())
+        
+        for conversation_id in ("a", "b"):
+            tokens = [f["content"] for f in frames if f["id"] == conversation_id and f["type"] == "token"]
+            final = [f for f in frames if f["id"] == conversation_id and f["type"] == "done"]
+            assert "".join(tokens) == "Hello"
+            assert final[0]["eval_count"] == 2
+    
+    def test_cancel_aborts_upstream(self, mock_ollama):
+        """Test a cancel message stops the conversation and closes the Ollama stream"""
+        stream = EndlessStream()
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            return httpx.Response(200, stream=stream)
+        
+        mock_ollama(handler)
+        
+        with client.websocket_connect("/api/ws/chat") as websocket:
+            websocket.send_json({"type": "chat", "id": "long", "message": "Tell me everything"})
+            assert websocket.receive_json()["type"] == "token"
+            websocket.send_json({"type": "cancel", "id": "long"})
+            frames = receive_until(websocket, lambda f: f["type"] == "cancelled")
+        
+        assert frames[-1]["id"] == "long"
+        assert stream.closed
+    
+    def test_invalid_messages(self):
+        """Test malformed and invalid messages get error frames without closing"""
+        with client.websocket_connect("/api/ws/chat") as websocket:
+            websocket.send_text("not json")
+            assert websocket.receive_json()["status"] == 400
+            websocket.send_json({"type": "chat", "id": "x", "message": ""})
+            error = websocket.receive_json()
+            assert (error["type"], error["id"], error["status"]) == ("error", "x", 422)
+            websocket.send_json({"type": "ping"})
+            assert websocket.receive_json() == {"type": "pong"}
+    
+    def test_binary_frame_rejected(self):
+        """Test a binary frame gets an error frame instead of closing the socket"""
+        with client.websocket_connect("/api/ws/chat") as websocket:
+            websocket.send_bytes(b'{"type": "ping"}')
+            error = websocket.receive_json()
+            assert (error["type"], error["status"]) == ("error", 400)
+            websocket.send_json({"type": "ping"})
+            assert websocket.receive_json() == {"type": "pong"}
+    
+    def test_heartbeat(self, monkeypatch):
+        """Test the server pings and closes a connection that stays silent"""
+        monkeypatch.setattr(settings, "WS_HEARTBEAT_INTERVAL", 0.05)
+        monkeypatch.setattr(settings, "WS_HEARTBEAT_TIMEOUT", 0.2)
+        
+        with client.websocket_connect("/api/ws/chat") as websocket:
+            assert websocket.receive_json()["type"] == "ping"
+            with pytest.raises(WebSocketDisconnect) as closed:
+                while True:
+                    websocket.receive_json()
+        
+        assert closed.value.code == 1001
@@ -1,6 +1,11 @@
 import React, { useEffect, useState } from 'react'
 
 
+// Poll quickly while the server is warming up, then settle down
+const READY_INTERVAL = 30000
+const WARMING_INTERVAL = 3000
+
+
 export default function HealthStatus() {
     const [status, setStatus] = useState(null)
     const API = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
@@ -8,23 +13,42 @@ export default function HealthStatus() {
 
     async function check() {
         try {
-            const res = await fetch(`${API}/api/health`)
-            if (!res.ok) { setStatus({ ok: false }) ; return }
+            const res = await fetch(`${API}/api/ready`)
+            // 503 still carries the readiness report (warming or unavailable)
+            if (!res.ok && res.status !== 503) { setStatus({ ok: false }) ; return false }
             const j = await res.json()
-            setStatus({ ok: true, info: j })
+            setStatus({ ok: true, ready: res.ok, info: j })
+            return res.ok
         } catch (e) {
             setStatus({ ok: false, error: e.message })
+            return false
         }
     }
 
 
-    useEffect(() => { check(); const t = setInterval(check, 30000); return () => clearInterval(t) }, [])
+    useEffect(() => {
+        let timer
+        let cancelled = false
+        async function poll() {
+            const ready = await check()
+            if (!cancelled) timer = setTimeout(poll, ready ? READY_INTERVAL : WARMING_INTERVAL)
+        }
+        poll()
+        return () => { cancelled = true; clearTimeout(timer) }
+    }, [])
 
 
     if (!status) return <div className="health">Checking...</div>
+    if (!status.ok) return <div className="health"><span className="down">🔴 Down</span></div>
+    if (status.ready) return <div className="health"><span className="healthy">🟢 ready</span></div>
+
+    const info = status.info || {}
+    const loading = Object.keys(info.models || {}).filter(m => info.models[m] !== 'warm')
     return (
         <div className="health">
-            {status.ok ? <span className="healthy">🟢 {status.info?.status || 'healthy'}</span> : <span className="down">🔴 Down</span>}
+            {info.status === 'warming'
+                ? <span className="warming" title={loading.join(', ')}>🟡 Warming up {loading.join(', ')}...</span>
+                : <span className="down">🔴 Ollama {info.ollama_status || 'unavailable'}</span>}
         </div>
     )
-}
\ No newline at end of file
+}
@@ -1,28 +1,107 @@
-import { useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 
 
 export default function useChatAPI() {
     const API = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
+    const WS_URL = `${API.replace(/^http/, 'ws')}/api/ws/chat`
     const [isLoading, setIsLoading] = useState(false)
     const [lastResponse, setLastResponse] = useState(null)
+    const socketRef = useRef(null)
+    const pendingRef = useRef(new Map())
+    const nextIdRef = useRef(0)
 
 
-    async function sendMessage({ message, model = 'llama3.2', stream = false }) {
+    useEffect(() => () => socketRef.current?.then(ws => ws.close()).catch(() => {}), [])
+
+
+    // One persistent socket carries every conversation; opened on first use
+    function connect() {
+        if (socketRef.current) return socketRef.current
+        socketRef.current = new Promise((resolve, reject) => {
+            const ws = new WebSocket(WS_URL)
+            ws.onopen = () => resolve(ws)
+            ws.onerror = () => reject(new Error('WebSocket unavailable'))
+            ws.onclose = () => {
+                socketRef.current = null
+                for (const pending of pendingRef.current.values()) pending.fail('Connection closed')
+                pendingRef.current.clear()
+            }
+            ws.onmessage = (event) => {
+                const frame = JSON.parse(event.data)
+                if (frame.type === 'ping') {
+                    ws.send(JSON.stringify({ type: 'pong' }))
+                    return
+                }
+                pendingRef.current.get(frame.id)?.handle(frame)
+            }
+        })
+        socketRef.current.catch(() => { socketRef.current = null })
+        return socketRef.current
+    }
+
+
+    function sendOverSocket(ws, { message, model, onToken }) {
+        const id = `c${nextIdRef.current++}`
+        return new Promise((resolve) => {
+            let text = ''
+            const finish = (result) => {
+                pendingRef.current.delete(id)
+                resolve(result)
+            }
+            pendingRef.current.set(id, {
+                handle(frame) {
+                    if (frame.type === 'token') {
+                        text += frame.content
+                        onToken?.(text)
+                    } else if (frame.type === 'done') {
+                        setLastResponse(text)
+                        finish({ ...frame, response: text })
+                    } else if (frame.type === 'error') {
+                        setLastResponse(`Error: ${frame.status} ${frame.error || ''}`)
+                        finish(null)
+                    } else if (frame.type === 'cancelled') {
+                        finish(null)
+                    }
+                },
+                fail(reason) {
+                    setLastResponse(`Network error: ${reason}`)
+                    finish(null)
+                }
+            })
+            ws.send(JSON.stringify({ type: 'chat', id, message, model, priority: 'interactive' }))
+        })
+    }
+
+
+    async function sendOverHttp({ message, model, stream }) {
+        const res = await fetch(`${API}/api/chat`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ message, model, stream, priority: 'interactive' })
+        })
+        if (!res.ok) {
+            const e = await res.json().catch(() => null)
+            setLastResponse(`Error: ${res.status} ${e?.detail || ''}`)
+            return null
+        }
+        const j = await res.json()
+        setLastResponse(j.response)
+        return j
+    }
+
+
+    // onToken(textSoFar) is called as tokens arrive over the WebSocket
+    async function sendMessage({ message, model = 'llama3.2', stream = false, onToken }) {
         setIsLoading(true)
         try {
-            const res = await fetch(`${API}/api/chat`, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message, model, stream })
-            })
-            if (!res.ok) {
-                const e = await res.json().catch(() => null)
-                setLastResponse(`Error: ${res.status} ${e?.detail || ''}`)
-                return null
+            let ws = null
+            try {
+                ws = await connect()
+            } catch (e) {
+                // No WebSocket (e.g. blocked by a proxy): fall back to plain HTTP
             }
-            const j = await res.json()
-            setLastResponse(j.response)
-            return j
+            if (ws) return await sendOverSocket(ws, { message, model, onToken })
+            return await sendOverHttp({ message, model, stream })
         } catch (err) {
             setLastResponse(`Network error: ${err.message}`)
             return null
@@ -62,4 +141,4 @@ export default function useChatAPI() {
 
 
     return { sendMessage, getModels, loadModel, unloadModel, isLoading, lastResponse }
-}
\ No newline at end of file
+}